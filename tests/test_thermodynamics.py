@@ -4,20 +4,30 @@ import numpy as np
 # Dependencies from cobra
 from cobra.io.json import load_json_model
 from cobra.manipulation.modify import convert_to_irreversible
+from cobra.core import Model, Metabolite, Reaction
 
 # Other dependencies
 import csv,json,sys
+import pickle
 
 # Dependencies from thermodynamics
-from thermodynamics.thermodynamics_simulatedData import thermodynamics_simulatedData
+from thermodynamics.thermodynamics_simulatedData import thermodynamics_simulatedData, make_model_hash
 from sampling.optGpSampler_sampling import optGpSampler_sampling
 from thermodynamics.thermodynamics_metabolomicsData import thermodynamics_metabolomicsData
 from thermodynamics.thermodynamics_otherData import thermodynamics_otherData
 from thermodynamics.thermodynamics_dG_f_data import thermodynamics_dG_f_data
 from thermodynamics.thermodynamics_dG_r_data import thermodynamics_dG_r_data
-from thermodynamics.thermodynamics_utility import load_thermoModel, simulate_thermoConstraints, add_pykA
+from thermodynamics.thermodynamics_utility import load_thermoModel, simulate_thermoConstraints, add_pykA, \
+    get_transportIndex, invalidate_transportIndex, find_transportMets, find_transportRxns, \
+    find_transportMetsAndRxns
 from thermodynamics.thermodynamics_dG_p_data import thermodynamics_dG_p_data
 from thermodynamics.thermodynamics_tfba import thermodynamics_tfba
+from thermodynamics.thermodynamics_sweep import thermodynamics_sweep
+from thermodynamics.thermodynamics_dG0_f_store import thermodynamics_dG0_f_store, \
+    convert_dG0_f_json2store, is_dG0_f_store
+from thermodynamics.thermodynamics_io import exceptionMatcher
+from thermodynamics.thermodynamics_pseudoisomers import pack_pseudoisomers, select_pseudoisomers, \
+    transform_pseudoisomers, debye_huckel, R
 
 from . import data_dir, data_dir_tests
 
@@ -102,6 +112,41 @@ class TestThermodynamics():
         assert(solution.objective_value == 30.0)
         assert(solution.fluxes['ENO'] == 20.0)
 
+    def test_transportIndex(self):
+        cobra_model = load_json_model(data_dir_tests + '/mini.json')
+        convert_to_irreversible(cobra_model)
+        transport_index = get_transportIndex(cobra_model)
+        assert(get_transportIndex(cobra_model) is transport_index)
+        assert(sorted(find_transportMets(cobra_model,'D_LACt2')) == ['D-Lactate','H+'])
+        assert(find_transportMets(cobra_model,'ENO') == [])
+        assert('H2Ot' in find_transportRxns(cobra_model))
+        assert(find_transportMetsAndRxns(cobra_model)['H2Ot'] == ['H2O'])
+        # the index is rebuilt when the reactions change
+        cobra_model.remove_reactions([cobra_model.reactions.get_by_id('H2Ot')])
+        assert(get_transportIndex(cobra_model) is not transport_index)
+        assert(not 'H2Ot' in find_transportRxns(cobra_model))
+        assert(get_transportIndex(cobra_model.copy()) is not get_transportIndex(cobra_model))
+        # in place edits of the metabolites require an explicit invalidation
+        transport_index = get_transportIndex(cobra_model)
+        cobra_model.metabolites.get_by_id('h_e').name = 'H+ (extracellular)'
+        assert(get_transportIndex(cobra_model) is transport_index)
+        invalidate_transportIndex(cobra_model)
+        assert(find_transportMets(cobra_model,'D_LACt2') == ['D-Lactate'])
+        cobra_model.reactions.get_by_id('D_LACt2').add_metabolites({'lac__D_e':1,'lac__D_c':-1})
+        invalidate_transportIndex(cobra_model)
+        assert(not 'D_LACt2' in find_transportRxns(cobra_model))
+
+    def test_simulate_thermoConstraints(self):
+        self.init_model()
+        bounds = [(r.lower_bound,r.upper_bound) for r in self.cobra_model.reactions]
+        gr_analysis = simulate_thermoConstraints(self.cobra_model,['ENO','H2Ot'])
+        assert(gr_analysis['original'] == 30.0)
+        assert(gr_analysis['ENO'] == [0.0, 0.0])
+        assert(gr_analysis['H2Ot'] == [30.0, 100.0])
+        assert(bounds == [(r.lower_bound,r.upper_bound) for r in self.cobra_model.reactions])
+        gr_analysis_parallel = simulate_thermoConstraints(self.cobra_model,['ENO','H2Ot'],processes_I=2)
+        assert(gr_analysis_parallel == gr_analysis)
+
     def test_simulatedData(self):
         self.init_model()
         data_fva = data_dir_tests + '/test_fva.json'
@@ -133,6 +178,103 @@ class TestThermodynamics():
         assert(simulated_data.sra_data['H2Ot']['gr_ratio'] == 1.0)
         simulated_data.check_data()
 
+    def test_simulatedData_deletions_parallel(self):
+        self.init_model()
+        simulated_data = thermodynamics_simulatedData()
+        simulated_data.generate_sra_data(self.cobra_model)
+        simulated_data_parallel = thermodynamics_simulatedData()
+        simulated_data_parallel.generate_sra_data(self.cobra_model, processes_I=2)
+        assert(list(simulated_data_parallel.sra_data.keys()) == list(simulated_data.sra_data.keys()))
+        for k,v in simulated_data.sra_data.items():
+            gr,gr_parallel = v['gr'],simulated_data_parallel.sra_data[k]['gr']
+            if gr is None or np.isnan(gr):
+                assert(gr_parallel is None or np.isnan(gr_parallel))
+            else:
+                assert(gr_parallel == pytest.approx(gr))
+        gr = simulated_data._optimize_deletions(self.cobra_model,['ENO','H2Ot'],processes_I=1)
+        gr_parallel = simulated_data._optimize_deletions(self.cobra_model,['ENO','H2Ot'],processes_I=2)
+        assert(np.isnan(gr['ENO']) and np.isnan(gr_parallel['ENO']))
+        assert(gr_parallel['H2Ot'] == gr['H2Ot'] == 30.0)
+
+    def test_simulatedData_cache(self, tmpdir):
+        self.init_model()
+        simulated_data = thermodynamics_simulatedData(cache_dir_I=str(tmpdir))
+        simulated_data.generate_sra_data(self.cobra_model, processes_I=2)
+        assert(len(tmpdir.listdir()) == 1)
+        assert(simulated_data.sra_data['H2Ot']['gr'] == 30.0)
+        # the second run is read from the cache
+        simulated_data_cached = thermodynamics_simulatedData(cache_dir_I=str(tmpdir))
+        simulated_data_cached.generate_sra_data(self.cobra_model)
+        assert(len(tmpdir.listdir()) == 1)
+        assert(np.isnan(simulated_data_cached.sra_data['ENO']['gr']))
+        assert(simulated_data_cached.sra_data['H2Ot'] == simulated_data.sra_data['H2Ot'])
+        # changing the bounds changes the model hash
+        model_hash = make_model_hash(self.cobra_model)
+        self.cobra_model.reactions.get_by_id('H2Ot').upper_bound = 10.0
+        assert(make_model_hash(self.cobra_model) != model_hash)
+
+    def test_simulatedData_reduce_model(self):
+        self.init_model()
+        simulated_data = thermodynamics_simulatedData()
+        simulated_data.generate_fva_data(self.cobra_model)
+        reduced_model = simulated_data.reduce_model(self.cobra_model)
+        assert(len(reduced_model.reactions) <= len(self.cobra_model.reactions))
+        for rxn in simulated_data.blocked_reactions:
+            assert(not rxn in reduced_model.reactions)
+        assert(reduced_model.slim_optimize() == pytest.approx(self.cobra_model.slim_optimize()))
+        # the original model is not changed
+        assert(len(self.cobra_model.reactions) == len(simulated_data.fva_data))
+        # the fluxes of the reduced model cover all original reactions
+        fluxes = simulated_data.expand_reduced_fluxes(reduced_model.optimize().fluxes.to_dict())
+        assert(sorted(fluxes.keys()) == sorted(r.id for r in self.cobra_model.reactions))
+        # merge a chain of coupled reactions and map their dG_r to the lumped reaction
+        model = Model('chain')
+        mets = {m:Metabolite(m + '_c') for m in 'abc'}
+        for rxn_id,stoichiometry,lb in [('EX_a',{'a':-1},-1000),('R1',{'a':-1,'b':1},0),
+                                        ('R2',{'b':-2,'c':1},0),('EX_c',{'c':-1},0)]:
+            rxn = Reaction(rxn_id)
+            rxn.add_metabolites({mets[m]:v for m,v in stoichiometry.items()})
+            rxn.lower_bound = lb
+            rxn.upper_bound = 1000
+            model.add_reaction(rxn)
+        simulated_data = thermodynamics_simulatedData()
+        simulated_data.fva_data = {'EX_a':{'minimum':-10.0,'maximum':0.0},'R1':{'minimum':0.0,'maximum':10.0},
+                                   'R2':{'minimum':0.0,'maximum':5.0},'EX_c':{'minimum':0.0,'maximum':5.0}}
+        reduced_model = simulated_data.reduce_model(model)
+        assert(simulated_data.reduced_mapping['lumped_R1'] == {'R1':1.0,'R2':0.5})
+        dG_r = {'R1':{'dG_r':-1.0,'dG_r_var':1.0,'dG_r_lb':-2.0,'dG_r_ub':0.0,'dG_r_units':'kJ/mol'},
+                'R2':{'dG_r':-4.0,'dG_r_var':2.0,'dG_r_lb':-6.0,'dG_r_ub':-2.0,'dG_r_units':'kJ/mol'}}
+        dG_r_reduced = simulated_data.reduce_dG_r(dG_r)
+        assert(sorted(dG_r_reduced.keys()) == ['lumped_R1'])
+        assert(dG_r_reduced['lumped_R1']['dG_r'] == -3.0)
+        assert(dG_r_reduced['lumped_R1']['dG_r_var'] == 1.5)
+        assert(dG_r_reduced['lumped_R1']['dG_r_lb'] == -5.0)
+        assert(dG_r_reduced['lumped_R1']['dG_r_ub'] == -1.0)
+
+    def test_simulatedData_fluxSum(self):
+        self.init_model()
+        simulated_data = thermodynamics_simulatedData()
+        simulated_data.generate_fva_data(self.cobra_model)
+        # flux-sum of a single flux vector
+        fluxes = self.cobra_model.optimize().fluxes.to_dict()
+        simulated_data.generate_fluxSum_data(self.cobra_model, fva_data_I=fluxes)
+        fluxSum = 0.5*sum(abs(c*fluxes[r.id]) for r in self.cobra_model.metabolites.get_by_id('h2o_e').reactions
+            for m,c in r.metabolites.items() if m.id == 'h2o_e')
+        assert(simulated_data.fluxSum_data['h2o_e']['fluxSum_lb'] == pytest.approx(fluxSum))
+        assert(simulated_data.fluxSum_data['h2o_e']['fluxSum_ub'] == pytest.approx(fluxSum))
+        # the exact bounds are within the bounds from the flux ranges
+        simulated_data.generate_fluxSum_data(self.cobra_model)
+        fluxSum_fva = simulated_data.fluxSum_data
+        simulated_data.generate_fluxSum_data(self.cobra_model, method_I='lp')
+        fluxSum_lp = simulated_data.fluxSum_data
+        for k,v in fluxSum_lp.items():
+            assert(v['fluxSum_lb'] >= fluxSum_fva[k]['fluxSum_lb'] - 1e-6)
+            assert(v['fluxSum_ub'] <= fluxSum_fva[k]['fluxSum_ub'] + 1e-6)
+        simulated_data.generate_fluxSum_data(self.cobra_model, method_I='lp', processes_I=2)
+        for k,v in fluxSum_lp.items():
+            assert(simulated_data.fluxSum_data[k]['fluxSum_lb'] == pytest.approx(v['fluxSum_lb']))
+            assert(simulated_data.fluxSum_data[k]['fluxSum_ub'] == pytest.approx(v['fluxSum_ub']))
+
     def test_otherData(self):
         # load pH, ionic_strength, and temperature parameters
         other_data = thermodynamics_otherData()
@@ -190,6 +332,58 @@ class TestThermodynamics():
         assert(dG_f_data.estimated_dG_f['13dpg_c']['dG_f_ub'] == 1000000.0)  
         dG_f_data.check_data()
 
+    def test_dG_f_data_conditions(self):
+        self.init_model()
+        self.init_otherData()
+        dG_f_data = thermodynamics_dG_f_data(id2KEGGID_filename_I=data_dir + '/id2KEGGID.csv')
+        conditions = {}
+        for c in ['c','e']:
+            conditions[c] = {'pH':self.other_data.pH[c]['pH'],
+                             'temperature':self.other_data.temperature[c]['temperature'],
+                             'ionic_strength':self.other_data.ionic_strength[c]['ionic_strength']}
+        conditions['c_copy'] = dict(conditions['c'])
+        dG_f_conditions = dG_f_data.get_transformed_dG0_f_conditions(self.cobra_model,conditions)
+        # identical conditions are transformed once
+        assert(dG_f_conditions['c_copy'] is dG_f_conditions['c'])
+        assert(dG_f_conditions['e'] != dG_f_conditions['c'])
+        # the untransformed estimates are reused
+        cc_model = dG_f_data.cc_model
+        dG_f_data.get_transformed_dG0_f(self.cobra_model,self.other_data.pH,
+            self.other_data.temperature,self.other_data.ionic_strength)
+        assert(dG_f_data.cc_model is cc_model)
+        # same results as a separate component contribution run for each compartment
+        reaction_list = list(dG_f_data._make_KEGG_reaction(self.cobra_model).values())
+        for c in ['c','e']:
+            dG0_prime_f, dG0_var_f = dG_f_data._component_contribution_wrapper(reaction_list,
+                conditions[c]['pH'],conditions[c]['temperature'],conditions[c]['ionic_strength'])
+            assert(len(dG0_prime_f) == len(dG_f_conditions[c]))
+            for k,v in dG0_prime_f.items():
+                kegg_id = 'C%05d' % k
+                assert(dG_f_conditions[c][kegg_id]['dG_f'] == pytest.approx(v))
+                assert(dG_f_conditions[c][kegg_id]['dG_f_var'] == pytest.approx(dG0_var_f[k]))
+                if dG_f_data.KEGGID2id[kegg_id]:
+                    assert(dG_f_data.dG_f[dG_f_data.KEGGID2id[kegg_id] + '_' + c] == dG_f_conditions[c][kegg_id])
+
+    def test_dG_f_data_cc_cache(self, tmpdir, monkeypatch):
+        cc_cache_dir = tmpdir.mkdir('cc')
+        dG_f_data = thermodynamics_dG_f_data(id2KEGGID_filename_I=data_dir + '/id2KEGGID.csv',
+            cc_cache_dir_I=str(cc_cache_dir))
+        # the cache is keyed by the contents of the training data files
+        training_data = tmpdir.join('training_data.tsv')
+        training_data.write('C00001\t-237.19\n')
+        monkeypatch.setattr(dG_f_data,'_get_trainingData_files',lambda: [str(training_data)])
+        version = dG_f_data._get_trainingData_version()
+        assert(dG_f_data._get_trainingData_version() == version)
+        training_data.write('C00001\t-237.20\n')
+        version_changed = dG_f_data._get_trainingData_version()
+        assert(version_changed != version)
+        # the trained component contribution is read from the cache
+        with open(str(cc_cache_dir.join('component_contribution_' + version_changed + '.pkl')),'wb') as outfile:
+            pickle.dump({'cc':'cached'},outfile)
+        assert(dG_f_data._get_component_contribution() == {'cc':'cached'})
+        # the default cache is not in the package directory
+        assert(not thermodynamics_dG_f_data().cc_cache_dir.startswith(data_dir))
+
     def test_metabolomicsData(self):
         self.init_model()
         # load metabolomics data
@@ -214,6 +408,178 @@ class TestThermodynamics():
         assert(metabolomics_data.estimated_concentrations['pep_c']['concentration_var'] == 176.21560953198042)  
         assert(metabolomics_data.estimated_concentrations['pep_c']['concentration_units'] == 'M')  
 
+    def test_metabolomicsData_stream(self, tmpdir):
+        filename = str(tmpdir.join('concentrations.csv'))
+        with open(filename, 'w') as outfile:
+            outfile.write('sample_name,met_id,concentration,concentration_var,concentration_units\n')
+            outfile.write('S1,pep,1.0e-4,1.2,M\n')
+            outfile.write('S1,glu-L,2.0e-3,1.1,M\n')
+            outfile.write('S1,pyr,2.0,1.1,mM\n')
+            outfile.write('S2,pep,3.0e-4,1.3,M\n')
+        metabolomics_data = thermodynamics_metabolomicsData()
+        samples = list(metabolomics_data.import_metabolomics_data_stream(filename, chunk_size_I=2))
+        assert([s[0] for s in samples] == ['S1','S2'])
+        assert(list(samples[0][1].keys()) == ['pep','glu_DASH_L']) # pyr has invalid units
+        assert(samples[0][1]['glu_DASH_L']['concentration'] == 2.0e-3)
+        assert(samples[1][1]['pep']['concentration_var'] == 1.3)
+
+    def test_metabolomicsData_replicates(self):
+        metabolomics_data = thermodynamics_metabolomicsData()
+        # geometric mean and variance of the replicates in M
+        metabolomics_data.import_metabolomics_replicates(['pep','pyr'],
+            [[1.0,2.0,4.0],[np.nan,np.nan,np.nan]], units_I='mM')
+        assert(list(metabolomics_data.measured_concentrations.keys()) == ['pep'])
+        pep = metabolomics_data.measured_concentrations['pep']
+        assert(pep['concentration'] == pytest.approx(2.0e-3))
+        assert(pep['concentration_var'] == pytest.approx(np.exp(np.var(np.log([1.0,2.0,4.0])))))
+        assert(pep['concentration_lb']*pep['concentration_ub'] == pytest.approx(pep['concentration']**2))
+        assert(pep['concentration_units'] == 'M')
+        # samples x metabolites x replicates
+        samples = metabolomics_data._convert_replicates2concentrations(['pep','pyr'],
+            np.ones((3,2,4)), units_I='M')
+        assert(len(samples) == 3)
+        assert(samples[2]['pyr']['concentration'] == pytest.approx(1.0))
+        replicates = np.ones((2,2,3))
+        replicates[1,0,:] = np.nan
+        metabolomics_data.import_metabolomics_replicates(['pep','pyr'],
+            replicates, units_I='mM')
+        assert(list(metabolomics_data.measured_concentrations.keys()) == ['pep'])
+        assert(len(metabolomics_data.measured_concentrations_samples) == 2)
+        assert(metabolomics_data.measured_concentrations_samples[0]['pep']['concentration'] == pytest.approx(1.0e-3))
+        assert(list(metabolomics_data.measured_concentrations_samples[1].keys()) == ['pyr'])
+        # CV (%) in mM to variance in M
+        measured = metabolomics_data._convert_cv2varAndmM2M_concentrations(
+            {'pep':{'concentration':2.0,'concentration_cv':10.0,'concentration_units':'mM'}})
+        assert(measured['pep_c']['concentration'] == 2.0e-3)
+        assert(measured['pep_c']['concentration_var'] == pytest.approx(4.0e-8))
+
+    def test_metabolomicsData_generalize(self):
+        self.init_model()
+        # the last matching exception wins (e.g., 'o2_' and 'co2_' both match co2_c)
+        matcher = exceptionMatcher(['pi_','h2o_','h2_','o2_','co2_'])
+        assert(matcher.match('co2_c') == 'co2_')
+        assert(matcher.match('o2_c') == 'o2_')
+        assert(matcher.match('ppi_c') == 'pi_')
+        assert(matcher.match('pep_c') is None)
+        metabolomics_data = thermodynamics_metabolomicsData()
+        lbub = metabolomics_data._generalize_compartmentLBUB2all_concentration(self.cobra_model)
+        assert(len(lbub) == len(self.cobra_model.metabolites))
+        assert(lbub['pi_c']['concentration_lb'] == 1.0e-3)
+        assert(lbub['h2o_e']['concentration_ub'] == 55.0)
+        assert(lbub['pep_c']['concentration_ub'] == 0.01)
+        assert(lbub['pep_c'] is not lbub['g6p_c'])
+        external = metabolomics_data._generalize_externalCompartments2all_concentration(self.cobra_model)
+        assert(all(self.cobra_model.metabolites.get_by_id(k).compartment in ['e','p'] for k in external))
+
+    def test_dG0_f_store(self, tmpdir):
+        filename = str(tmpdir.join('compounds_dG0_f.sqlite'))
+        convert_dG0_f_json2store(data_dir + '/compounds_dG0_f.json', filename)
+        assert(is_dG0_f_store(filename))
+        assert(not is_dG0_f_store(data_dir + '/compounds_dG0_f.json'))
+        dG0_f = thermodynamics_dG0_f_store(filename).get_dG0_f(['C00002','C99999'])
+        assert(list(dG0_f.keys()) == ['C00002'])
+        assert([p['priority'] for p in dG0_f['C00002']] == [0,1,2])
+        assert(dG0_f['C00002'][0]['dG0_f'] == -2814.294427)
+
+    def test_combine_dG0_f_pH0(self, tmpdir):
+        filename = str(tmpdir.join('compounds_dG0_f.sqlite'))
+        dG0_f_0 = {'C00002':{'priority':0,'source':'Reactant Contribution','dG0_f':-2814.3,'dG0_f_units':'kJ/mol','dG0_f_var':17.8}}
+        dG0_f_2 = {'C00002':{'priority':2,'source':'GC','dG0_f':-2768.1,'dG0_f_units':'kJ/mol','dG0_f_var':62.0},
+                   'C00009':{'priority':2,'source':'GC','dG0_f':-1137.3,'dG0_f_units':'kJ/mol','dG0_f_var':62.0}}
+        dG_f_data = thermodynamics_dG_f_data()
+        dG_f_data._combine_dG0_f_pH0(dG0_f_0, {}, dG0_f_2, filename)
+        assert(is_dG0_f_store(filename))
+        dG0_f = thermodynamics_dG0_f_store(filename).get_dG0_f(['C00002','C00009'])
+        assert(dG0_f == {'C00002':[dG0_f_0['C00002'],dG0_f_2['C00002']],'C00009':[dG0_f_2['C00009']]})
+
+    def test_ccache(self, tmpdir):
+        # compound cache chunks as written by make_ccache
+        chunk = {'compounds':[{'id':'C00009','pKas':[12.4,7.2,2.1],'nHs':[0,1,2,3],'zs':[-3,-2,-1,0]}],
+                 'pseudoisomers':[{'CID':'C00009','pmaps':[
+                     {'priority':1,'source':'Alberty','species':[{'z':-3,'dG0_f':-1018.7},{'z':-2,'dG0_f':-1089.15}]},
+                     {'priority':2,'source':'GC','species':[{'z':-1,'dG0_f':-1130.4},{'z':0,'dG0_f':-1137.3}]}]}]}
+        with open(str(tmpdir.join('ccache_00000_test.json')),'w') as outfile:
+            json.dump(chunk,outfile)
+        with open(str(tmpdir.join('manifest.json')),'w') as outfile:
+            json.dump(['ccache_00000_test.json'],outfile)
+        dG_f_data = thermodynamics_dG_f_data()
+        ccache = dG_f_data.load_ccache(str(tmpdir))
+        assert(dG_f_data._get_pseudoisomer_priority1_pH0(ccache)['C00009']['dG0_f'] == -1018.7)
+        assert(dG_f_data._get_pseudoisomer_priority2_pH0(ccache)['C00009']['dG0_f'] == -1137.3)
+        compounds = dG_f_data._get_compounds_pseudoisomers(['C00009','C99999'],str(tmpdir))
+        assert(compounds == {'C00009':{'pKas':[12.4,7.2,2.1],'nHs':[0,1,2,3],'zs':[-3,-2,-1,0]}})
+
+    def test_pseudoisomers(self):
+        compounds = {'C00001':{'pKas':[],'nHs':[2],'zs':[0]},
+                     'C00009':{'pKas':[12.4,7.2,2.1],'nHs':[0,1,2,3],'zs':[-3,-2,-1,0]}}
+        pseudoisomers = pack_pseudoisomers(['C00001','C00009','C99999'],[-237.19,-1018.7,0.0],compounds)
+        assert(pseudoisomers['ids'] == ['C00001','C00009'])
+        assert(list(pseudoisomers['offsets']) == [0,1])
+        dG_f = transform_pseudoisomers(pseudoisomers,7.0,0.0,298.15)
+        assert(np.isclose(dG_f[0],-237.19 + 2*R*298.15*np.log(10)*7.0))
+        # a single compound gives the same result
+        dG_f_C00009 = transform_pseudoisomers(select_pseudoisomers(pseudoisomers,['C00009']),7.0,0.0,298.15)
+        assert(np.isclose(dG_f_C00009[0],dG_f[1]))
+        # the transformed value is below that of each species
+        dG_f_species = pseudoisomers['dG0'][1:] + pseudoisomers['nH'][1:]*R*298.15*np.log(10)*7.0
+        assert(dG_f[1] < min(dG_f_species))
+        assert(np.isclose(debye_huckel(0.25,298.15),2.91482*0.5/1.8,rtol=1e-4))
+        assert(np.isclose(debye_huckel(0.25),2.91482*0.5/1.8))
+
+    def test_pseudoisomers_component_contribution(self):
+        # same results as component_contribution.compound_model away from 298.15 K
+        dG_f_data = thermodynamics_dG_f_data(id2KEGGID_filename_I=data_dir + '/id2KEGGID.csv')
+        kegg_ids = ['C00001','C00002','C00009','C00022']
+        dG0_f = [-237.19,-2768.1,-1018.7,-352.4]
+        dG_f_cc = dG_f_data._get_transformed_f(kegg_ids,dG0_f,7.5,310.15,0.2)
+        pseudoisomers = pack_pseudoisomers(kegg_ids,dG0_f,dG_f_data._get_compounds_pseudoisomers(kegg_ids))
+        assert(pseudoisomers['ids'] == kegg_ids)
+        dG_f = transform_pseudoisomers(pseudoisomers,7.5,0.2,310.15)
+        assert(np.allclose(dG_f,dG_f_cc))
+
+    def test_sweep_conditions(self):
+        sweep = thermodynamics_sweep()
+        conditions = sweep.make_conditions({'c':[7.0,7.5],'e':[6.0,7.0]},
+            {'c':[0.2],'e':[0.2]},{'c':[310.15],'e':[310.15]})
+        assert(len(conditions) == 4)
+        assert(conditions[1]['pH']['c']['pH'] == 7.0)
+        assert(conditions[1]['pH']['e']['pH'] == 7.0)
+        assert(conditions[3]['temperature']['e'] == {'temperature':310.15,'temperature_units':'K'})
+
+    def test_sweep(self):
+        self.init_model()
+        self.init_otherData()
+        self.init_metabolomicsData()
+        # dG_f, dG0_r, and dG_r of a single condition
+        dG_f_data = thermodynamics_dG_f_data(id2KEGGID_filename_I=data_dir + '/id2KEGGID.csv')
+        dG_f_data.get_transformed_dG_f(data_dir + '/compounds_dG0_f.json',
+            self.cobra_model,self.other_data.pH,
+            self.other_data.temperature,self.other_data.ionic_strength)
+        dG_f_data.format_dG_f()
+        dG_f_data.generate_estimated_dG_f(self.cobra_model)
+        tcc = thermodynamics_dG_r_data()
+        tcc.calculate_dG0_r(self.cobra_model, dG_f_data.measured_dG_f, dG_f_data.estimated_dG_f,
+            self.other_data.temperature)
+        tcc.calculate_dG_r(self.cobra_model,self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,
+            self.other_data.pH, self.other_data.ionic_strength, self.other_data.temperature)
+        # the same condition as the second point of a sweep
+        sweep = thermodynamics_sweep()
+        condition = {'pH':self.other_data.pH,'ionic_strength':self.other_data.ionic_strength,
+                     'temperature':self.other_data.temperature}
+        condition_acidic = {'pH':{c:{'pH':6.0} for c in self.other_data.pH},
+                            'ionic_strength':self.other_data.ionic_strength,
+                            'temperature':self.other_data.temperature}
+        sweep.sweep(self.cobra_model, dG_f_data,
+            self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,
+            conditions_I=[condition_acidic,condition])
+        for data_I,data in [('dG0_r',tcc.dG0_r),('dG_r',tcc.dG_r)]:
+            data_sweep = sweep.get_condition(1,data_I)
+            for rxn in sweep.reaction_ids:
+                for k in ['dG_r','dG_r_lb','dG_r_ub']:
+                    assert(data_sweep[rxn][k] == pytest.approx(data[rxn][k]))
+
     def test_dG_r_data(self):
         self.init_model()
         self.init_simulatedData()
@@ -268,6 +634,94 @@ class TestThermodynamics():
         assert(tcc.dG_r['ENO']['dG_r'] == 8.716270424972741)
         assert(tcc.dG_r_coverage['ENO'] == 1.0)
 
+    def test_dG_r_data_update_concentrations(self):
+        self.init_dG_r_data()
+        # remove a measured concentration and recalculate only the affected reactions
+        measured_concentrations = dict(self.metabolomics_data.measured_concentrations)
+        self.tcc.calculate_displacement(self.cobra_model,measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,temperature=self.other_data.temperature)
+        reactions = self.tcc.update_concentrations(self.cobra_model,{'pep_c':None},
+            measured_concentrations,self.metabolomics_data.estimated_concentrations,
+            self.other_data.pH, self.other_data.ionic_strength, self.other_data.temperature)
+        assert('ENO' in reactions)
+        assert('pep_c' not in measured_concentrations)
+        assert('ENO' in self.tcc.metabolite2reactions['pep_c'])
+        # compare to a full recalculation
+        tcc = thermodynamics_dG_r_data()
+        tcc.dG0_r = self.tcc.dG0_r
+        tcc.calculate_dG_r(self.cobra_model,measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,
+            self.other_data.pH, self.other_data.ionic_strength, self.other_data.temperature)
+        tcc.calculate_displacement(self.cobra_model,measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,temperature=self.other_data.temperature)
+        assert(tcc.dG_r == self.tcc.dG_r)
+        assert(tcc.metabolomics_coverage == self.tcc.metabolomics_coverage)
+        assert(tcc.displacement == self.tcc.displacement)
+
+    def test_dG_r_data_displacement_ln(self):
+        self.init_dG_r_data()
+        self.tcc.calculate_displacement(self.cobra_model,self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations)
+        displacement = self.tcc.displacement
+        assert(np.isclose(np.exp(displacement['ENO']['ln_Q_ub']),displacement['ENO']['Q_ub']))
+        # ln(Keq) from dG0_r (within the range of the clamped Keq)
+        ln_Keq_lb = np.log(self.tcc.dG0_r['ENO']['Keq_lb'])
+        assert(np.isclose(displacement['ENO']['ln_displacement_lb'],displacement['ENO']['ln_Q_lb'] - ln_Keq_lb))
+        # the temperature defaults to that of calculate_dG0_r
+        self.tcc.calculate_displacement(self.cobra_model,self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,temperature=self.other_data.temperature)
+        assert(self.tcc.displacement == displacement)
+        tcc = thermodynamics_dG_r_data(dG0_r_I=self.tcc.dG0_r)
+        tcc.calculate_displacement(self.cobra_model,self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations)
+        assert(not tcc.displacement)
+        # ln values are not limited by the range of floats
+        self.tcc.dG0_r['ENO'] = dict(self.tcc.dG0_r['ENO'],dG_r_lb=-1.0e6)
+        self.tcc.calculate_displacement(self.cobra_model,self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,temperature=self.other_data.temperature)
+        assert(self.tcc.displacement['ENO']['displacement_lb'] == 0.0)
+        assert(np.isfinite(self.tcc.displacement['ENO']['ln_displacement_lb']))
+
+    def test_dG_r_data_bounds_methods(self):
+        self.init_dG_r_data()
+        tcc = thermodynamics_dG_r_data()
+        tcc.calculate_dG0_r(self.cobra_model,
+            self.dG_f_data.measured_dG_f, self.dG_f_data.estimated_dG_f,
+            self.other_data.temperature, bounds_method_I='v3')
+        tcc.calculate_dG_r(self.cobra_model,self.metabolomics_data.measured_concentrations,
+            self.metabolomics_data.estimated_concentrations,
+            self.other_data.pH, self.other_data.ionic_strength, self.other_data.temperature,
+            bounds_method_I='v3')
+        assert(tcc.dG0_r['ENO']['dG_r'] == self.tcc.dG0_r['ENO']['dG_r'])
+        assert(tcc.dG_r['ENO']['dG_r'] == self.tcc.dG_r['ENO']['dG_r'])
+        for k,v in tcc.dG_r.items():
+            assert(v['dG_r_lb'] <= v['dG_r_ub'])
+        with pytest.raises(Exception):
+            tcc.calculate_dG0_r(self.cobra_model,
+                self.dG_f_data.measured_dG_f, self.dG_f_data.estimated_dG_f,
+                self.other_data.temperature, bounds_method_I='v4')
+
+    def test_dG_r_data_consistency_arrays(self):
+        self.init_dG_r_data()
+        consistency = self.tcc.check_thermodynamicConsistency_arrays(self.cobra_model,
+            [self.simulated_data.fva_data,self.simulated_data.fva_data])
+        assert(consistency['feasible'].shape == (2,len(self.cobra_model.reactions)))
+        for i,rxn_id in enumerate(consistency['reaction_ids']):
+            assert(consistency['feasible'][0,i] == self.tcc.thermodynamic_consistency_check[rxn_id])
+            assert(consistency['feasible'][1,i] == self.tcc.thermodynamic_consistency_check[rxn_id])
+            assert(consistency['inconsistent'][0,i] == (rxn_id in self.tcc.inconsistent_reactions))
+
+    def test_dG_r_data_constrain_batch(self):
+        self.init_model()
+        tcc = thermodynamics_dG_r_data()
+        tcc.inconsistent_reactions = {'ENO':{'gr':30.0,'gr_ratio':100.0},
+                                      'H2Ot':{'gr':30.0,'gr_ratio':100.0}}
+        eno_bounds = self.cobra_model.reactions.get_by_id('ENO').bounds
+        tcc.constrain_infeasibleReactions(self.cobra_model,batch_I=True)
+        assert(self.cobra_model.reactions.get_by_id('ENO').bounds == eno_bounds)
+        assert(self.cobra_model.reactions.get_by_id('H2Ot').upper_bound == 0.0)
+        assert(self.cobra_model.slim_optimize() == 30.0)
+
     def test_dG_p_data(self):       
         self.init_model()
         self.init_dG_r_data() 
@@ -286,6 +740,103 @@ class TestThermodynamics():
         assert(tccp.dG_p['Glycolysis']['dG_p_lb'] == -29.148908111427986)
         assert(tccp.dG_p['Glycolysis']['dG_p_ub'] == 23.27562458558087)
         assert(tccp.dG_p['Glycolysis']['dG_p_units'] == 'kJ/mol')
+
+    def test_dG_p_data_linearPathways(self):
+        self.init_dG_r_data()
+        tccp = thermodynamics_dG_p_data()
+        pathways = tccp.find_linearPathways(self.cobra_model)
+        assert(tccp.pathways == pathways)
+        assert(pathways['lumped_GLCpts'] == {'reactions':['GLCpts','PGI'],'stoichiometry':[1,1]})
+        assert(pathways['lumped_FBA'] == {'reactions':['FBA','TPI'],'stoichiometry':[1,1]})
+        # cached on the model
+        assert(self.cobra_model._linear_pathways[1] == pathways)
+        assert(thermodynamics_dG_p_data().find_linearPathways(self.cobra_model) == pathways)
+        tccp.calculate_dG_p(self.cobra_model,self.tcc.dG0_r,self.tcc.dG_r)
+        assert(tccp.dG0_p['lumped_GLCpts']['dG0_p'] == self.tcc.dG0_r['GLCpts']['dG_r'] + self.tcc.dG0_r['PGI']['dG_r'])
+        # changing the bounds changes the cache key
+        self.cobra_model.reactions.get_by_id('PGI').upper_bound = 0.0
+        assert(not 'lumped_GLCpts' in tccp.find_linearPathways(self.cobra_model))
+        # pathways are oriented by the reaction bounds
+        model = Model('linear')
+        mets = {m:Metabolite(m + '_c') for m in 'abcdefg'}
+        for rxn_id,stoichiometry,lb in [('R1',{'a':-1,'b':1},0),('R2',{'c':-1,'b':1},-1000),
+                                        ('R3',{'d':-1,'c':1},-1000),('R4',{'e':-1,'f':1},0),
+                                        ('R5',{'g':-1,'f':1},0)]:
+            rxn = Reaction(rxn_id)
+            rxn.add_metabolites({mets[m]:v for m,v in stoichiometry.items()})
+            rxn.lower_bound = lb
+            rxn.upper_bound = 1000
+            model.add_reaction(rxn)
+        for m in 'adeg':
+            rxn = Reaction('EX_' + m)
+            rxn.add_metabolites({mets[m]:-1})
+            rxn.lower_bound = -1000
+            model.add_reaction(rxn)
+        pathways = tccp.find_linearPathways(model)
+        assert(pathways == {'lumped_R1':{'reactions':['R1','R2','R3'],'stoichiometry':[1,-1,-1]}})
+
+    def test_dG_p_data_mdf(self):
+        self.init_dG_r_data()
+        tccp = thermodynamics_dG_p_data()
+        tccp.pathways = {'Glycolysis':tccp.pathways['Glycolysis']}
+        tccp.calculate_mdf(self.cobra_model,self.tcc.dG0_r,
+            self.metabolomics_data.measured_concentrations,self.metabolomics_data.estimated_concentrations,
+            self.other_data.temperature)
+        mdf = tccp.mdf['Glycolysis']
+        assert(mdf['mdf'] is not None)
+        assert(np.isclose(min(mdf['driving_force'].values()),mdf['mdf']))
+        assert(mdf['bottlenecks'])
+        for rxn in mdf['bottlenecks']:
+            assert(np.isclose(mdf['driving_force'][rxn],mdf['mdf']))
+        mdf_conditions = tccp.calculate_mdf_conditions(self.cobra_model,
+            [{'dG0_r':self.tcc.dG0_r,'measured_concentration':self.metabolomics_data.measured_concentrations,
+              'estimated_concentration':self.metabolomics_data.estimated_concentrations,
+              'temperature':self.other_data.temperature}]*2,processes_I=2)
+        assert(mdf_conditions == [tccp.mdf,tccp.mdf])
+        # the transport term is added to the dG0_r of a proton-coupled transporter
+        tccp.pathways = {'D_LACt2':{'reactions':['D_LACt2'],'stoichiometry':[1]}}
+        tccp.calculate_mdf(self.cobra_model,self.tcc.dG0_r,
+            self.metabolomics_data.measured_concentrations,self.metabolomics_data.estimated_concentrations,
+            self.other_data.temperature)
+        assert(not 'D_LACt2' in tccp.mdf)
+        tccp.calculate_mdf(self.cobra_model,self.tcc.dG0_r,
+            self.metabolomics_data.measured_concentrations,self.metabolomics_data.estimated_concentrations,
+            self.other_data.temperature,pH=self.other_data.pH)
+        mdf = tccp.mdf['D_LACt2']
+        # dG_r at the concentrations of the MDF
+        RT = self.tcc.R*self.other_data.temperature['c']['temperature']
+        dG_r = self.tcc.dG_r['D_LACt2']['dG_r']
+        for m,c in self.cobra_model.reactions.get_by_id('D_LACt2').metabolites.items():
+            if not m.id in mdf['ln_concentration']: continue
+            if m.id in self.metabolomics_data.measured_concentrations:
+                conc = self.metabolomics_data.measured_concentrations[m.id]['concentration']
+            else:
+                conc = self.metabolomics_data.estimated_concentrations[m.id]['concentration']
+            dG_r += RT*c*(mdf['ln_concentration'][m.id] - np.log(conc))
+        assert(np.isclose(mdf['driving_force']['D_LACt2'],-dG_r))
+
+    def test_dG_p_data_arrays(self):
+        tccp = thermodynamics_dG_p_data(pathways_I={
+            'p1':{'reactions':['R1','R2'],'stoichiometry':[1,-1]},
+            'p2':{'reactions':['R2','R3','R2'],'stoichiometry':[1,1,1]}})
+        pathway_matrix = tccp.make_pathway_matrix(['R3','R2','R1'])
+        assert(pathway_matrix['S'].shape == (2,3))
+        dG_r_arrays = {'dG_r':np.array([[1.0,2.0,4.0],[0.0,1.0,1.0]]),
+                       'dG_r_var':np.ones((2,3)),
+                       'dG_r_lb':np.array([[0.0,3.0,3.0],[-1.0,0.0,0.0]]),
+                       'dG_r_ub':np.array([[2.0,1.0,5.0],[1.0,2.0,2.0]])}
+        dG_p_arrays = tccp.calculate_dG_p_arrays(dG_r_arrays,pathway_matrix)
+        assert(dG_p_arrays['dG_p'].shape == (2,2))
+        assert(list(dG_p_arrays['dG_p'][0]) == [2.0,5.0])
+        assert(list(dG_p_arrays['dG_p_lb'][0]) == [2.0,2.0])
+        assert(list(dG_p_arrays['dG_p_ub'][0]) == [2.0,8.0])
+        assert(list(dG_p_arrays['dG_p'][1]) == [0.0,2.0])
+        # reactions without dG_r do not contribute
+        tccp.calculate_dG_p(None,{'R1':{'dG_r':1.0,'dG_r_var':1.0,'dG_r_lb':0.0,'dG_r_ub':2.0}},{})
+        assert(tccp.dG0_p['p1']['dG0_p'] == 1.0)
+        assert(tccp.dG_p['p2']['dG_p'] == 0.0)
+        pathways = tccp.import_pathways_csv(data_dir + '/pathways_irreversible.csv')
+        assert(pathways['MOLYBDOPTERIN_2'] == {'reactions':['MOCDS','MOGDS'],'stoichiometry':[1,1]})
     
     def test_tfba_constraints(self):      
         self.init_model()
@@ -365,6 +916,47 @@ class TestThermodynamics():
         assert(cobra_model_copy.objective.value == 30.0)
         assert(tfba.tfba_data['ENO'] < 21 or tfba.tfba_data['ENO'] > 20) #exact solution varies
     
+    def test_tfba_sra(self):
+        self.init_dG_r_data()
+        tfba = thermodynamics_tfba()
+        cobra_model_copy = self.cobra_model.copy()
+        tfba.tfba_sra(cobra_model_copy,
+            self.tcc.dG_r, self.tcc.dG_r_coverage, self.tcc.thermodynamic_consistency_check,
+            use_measured_dG_r=True, reaction_list=['ENO','H2Ot'], solver='glpk', processes_I=2)
+        assert(list(tfba.tfba_sra_data.keys()) == ['ENO','H2Ot'])
+        assert(not tfba.tfba_sra_data['ENO']['gr'] > 0) # essential (nan if infeasible)
+        assert(tfba.tfba_sra_data['H2Ot']['gr_ratio'] == pytest.approx(1.0))
+        # the deletions are reverted
+        assert(cobra_model_copy.reactions.get_by_id('ENO').upper_bound > 0)
+
+    def test_tfba_mdf(self):
+        self.init_dG_r_data()
+        tfba = thermodynamics_tfba()
+        fluxes = self.cobra_model.optimize().fluxes.to_dict()
+        tfba.mdf(self.cobra_model,
+            self.metabolomics_data.measured_concentrations, self.metabolomics_data.estimated_concentrations,
+            self.tcc.dG0_r,self.other_data.temperature,fluxes=fluxes)
+        assert('ENO' in tfba.mdf_data['driving_force'])
+        assert(not 'EX_glc__D_e' in tfba.mdf_data['driving_force'])
+        assert(np.isclose(min(tfba.mdf_data['driving_force'].values()),tfba.mdf_data['mdf']))
+        for rxn in tfba.mdf_data['driving_force'].keys():
+            assert(fluxes[rxn] > 1e-6)
+        # a proton-coupled transporter is included with the transport term
+        fluxes = {'ENO':1.0,'D_LACt2':1.0}
+        tfba.mdf(self.cobra_model,
+            self.metabolomics_data.measured_concentrations, self.metabolomics_data.estimated_concentrations,
+            self.tcc.dG0_r,self.other_data.temperature,fluxes=fluxes)
+        assert(list(tfba.mdf_data['driving_force'].keys()) == ['ENO'])
+        tfba.mdf(self.cobra_model,
+            self.metabolomics_data.measured_concentrations, self.metabolomics_data.estimated_concentrations,
+            self.tcc.dG0_r,self.other_data.temperature,fluxes=fluxes,pH=self.other_data.pH)
+        assert(sorted(tfba.mdf_data['driving_force'].keys()) == ['D_LACt2','ENO'])
+        tccp = thermodynamics_dG_p_data(pathways_I={'D_LACt2':{'reactions':['D_LACt2'],'stoichiometry':[1]}})
+        tccp.calculate_mdf(self.cobra_model,self.tcc.dG0_r,
+            self.metabolomics_data.measured_concentrations,self.metabolomics_data.estimated_concentrations,
+            self.other_data.temperature,pH=self.other_data.pH)
+        assert(tfba.mdf_data['mdf'] <= tccp.mdf['D_LACt2']['mdf'] + 1e-9)
+
     def test_tfva(self):      
         self.init_model()
         self.init_simulatedData()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""compact, indexed store of the combined dG0_f data (see thermodynamics_dG_f_data.make_dG0_f_pH0)"""
+
+import json
+import os
+import sqlite3
+
+def write_dG0_f_store(compounds_dG0_f_I, filename_I):
+    """write the combined dG0_f data to an SQLite store indexed by KEGG id
+
+    Args:
+        compounds_dG0_f_I (dict or iterable): {KEGGID: [{'priority': int,
+                'source': str,
+                'dG0_f': float,
+                'dG0_f_units': str,
+                'dG0_f_var': float},...]}
+            or an iterable of (KEGGID, [...]) items
+        filename_I (str): name of the store
+
+    NOTES:
+      the store is written to a temporary file that replaces filename_I
+      when complete, so that a partially written store is never read
+    """
+
+    if isinstance(compounds_dG0_f_I,dict):
+        compounds_dG0_f_I = compounds_dG0_f_I.items()
+    filename_tmp = filename_I + '.tmp'
+    if os.path.exists(filename_tmp):
+        os.remove(filename_tmp)
+    conn = sqlite3.connect(filename_tmp)
+    try:
+        conn.execute('''CREATE TABLE dG0_f (
+            kegg_id TEXT NOT NULL,
+            priority INTEGER,
+            source TEXT,
+            dG0_f REAL,
+            dG0_f_units TEXT,
+            dG0_f_var REAL)''')
+        rows = ((k,p['priority'],p.get('source',''),p['dG0_f'],p['dG0_f_units'],p['dG0_f_var'])
+                for k,v in compounds_dG0_f_I for p in v)
+        conn.executemany('INSERT INTO dG0_f VALUES (?,?,?,?,?,?)',rows)
+        conn.execute('CREATE INDEX dG0_f_kegg_id ON dG0_f (kegg_id, priority)')
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(filename_tmp,filename_I)
+
+def convert_dG0_f_json2store(json_filename_I, filename_I):
+    """convert compounds_dG0_f.json to an SQLite store (see write_dG0_f_store)"""
+    with open(json_filename_I) as infile:
+        compounds_dG0_f = json.load(infile)
+    write_dG0_f_store(compounds_dG0_f, filename_I)
+
+def is_dG0_f_store(filename_I):
+    """check if a file is an SQLite store"""
+    if not os.path.isfile(filename_I):
+        return False
+    with open(filename_I,'rb') as infile:
+        return infile.read(16) == b'SQLite format 3\x00'
+
+class thermodynamics_dG0_f_store():
+    """lazy reader of a dG0_f store
+
+    only the compounds that are requested are read from disk
+    """
+
+    # maximum number of host parameters in an SQLite query
+    max_variables = 500
+
+    def __init__(self, filename_I):
+        self.filename = filename_I
+
+    def get_dG0_f(self, kegg_ids_I):
+        """get the dG0_f entries of the requested compounds
+
+        Args:
+            kegg_ids_I (list): KEGG ids
+
+        Returns:
+            dict: compounds_dG0_f_O: {KEGGID: [{'priority','source','dG0_f','dG0_f_units','dG0_f_var'},...]}
+                entries are sorted by priority (lowest first);
+                compounds that are not in the store are omitted
+        """
+
+        kegg_ids = sorted(set(kegg_ids_I))
+        compounds_dG0_f_O = {}
+        conn = sqlite3.connect(self.filename)
+        try:
+            for i in range(0,len(kegg_ids),self.max_variables):
+                chunk = kegg_ids[i:i+self.max_variables]
+                cursor = conn.execute('SELECT kegg_id, priority, source, dG0_f, dG0_f_units, dG0_f_var ' +
+                    'FROM dG0_f WHERE kegg_id IN (' + ','.join('?'*len(chunk)) + ') ' +
+                    'ORDER BY kegg_id, priority, rowid', chunk)
+                for kegg_id,priority,source,dG0_f,dG0_f_units,dG0_f_var in cursor:
+                    entry = {'priority':priority,'source':source,'dG0_f':dG0_f,
+                             'dG0_f_units':dG0_f_units,'dG0_f_var':dG0_f_var}
+                    if kegg_id in compounds_dG0_f_O:
+                        compounds_dG0_f_O[kegg_id].append(entry)
+                    else:
+                        compounds_dG0_f_O[kegg_id] = [entry]
+        finally:
+            conn.close()
+        return compounds_dG0_f_O
+
+    def get_kegg_ids(self):
+        """get all KEGG ids in the store"""
+        conn = sqlite3.connect(self.filename)
+        try:
+            kegg_ids_O = [r[0] for r in conn.execute('SELECT DISTINCT kegg_id FROM dG0_f ORDER BY kegg_id')]
+        finally:
+            conn.close()
+        return kegg_ids_O
@@ -16,13 +16,58 @@ from component_contribution.component_contribution_trainer import ComponentContr
 from component_contribution.kegg_model import KeggModel
 from component_contribution.compound_cacher import CompoundCacher
 from component_contribution.compound_model import compound_model
+import component_contribution
 
-from .thermodynamics_io import thermodynamics_io
+from .thermodynamics_io import thermodynamics_io, generalize_compartments2all
+from .thermodynamics_dG0_f_store import thermodynamics_dG0_f_store, is_dG0_f_store, write_dG0_f_store
+from .thermodynamics_pseudoisomers import pack_pseudoisomers, select_pseudoisomers, transform_pseudoisomers
 
 import csv
 import re
 from math import sqrt
 import json
+import os
+import pickle
+import hashlib
+import multiprocessing
+
+# trained component contribution objects loaded in this session {filename: ComponentContribution}
+_component_contribution_cache = {}
+# version of the component contribution training data (computed once per session)
+_trainingData_version = None
+
+# default location of the dG0_f input and output files
+_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),'thermodynamics_data')
+
+# default location of the trained component contribution cache (user cache directory)
+_cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'),'.cache'),
+    'thermodynamics')
+
+def _make_ccache_chunk(chunk_I):
+    """make the compound cache of a chunk of kegg_pseudoisomers.json items
+
+    Args:
+        chunk_I (tuple): (filename, [kegg_pseudoisomers.json items])
+
+    Returns:
+        tuple: (filename, error message or None)
+
+    NOTES:
+      the chunk is written to a temporary file that replaces filename
+      when complete, so that an interrupted chunk is made again on resume
+    """
+    filename,items = chunk_I
+    try:
+        cids = [item['CID'] for item in items]
+        model = KeggModel.from_formulas(['1 ' + cid + ' <=> 1 ' + cid for cid in cids])
+        compounds = [model.ccache.get_compound(cid).to_json_dict() for cid in cids]
+        filename_tmp = filename + '.tmp'
+        with open(filename_tmp,'w') as outfile:
+            json.dump({'compounds':compounds,'pseudoisomers':items}, outfile)
+        os.replace(filename_tmp,filename)
+    except Exception as e:
+        return filename, str(e)
+    return filename, None
 
 class thermodynamics_dG_f_data(thermodynamics_io):
     """Class for handling dG_f data
@@ -32,11 +77,14 @@ class thermodynamics_dG_f_data(thermodynamics_io):
     #3: transform the thermodynamic data to the desired pH, ionic strength and temperature
     #4: load, format, and check the data"""
 
-    def __init__(self,id2KEGGID_filename_I=None,id2KEGGID_I={},dG0_f_I={},dG_f_I={},measured_dG_f_I={},estimated_dG_f_I={}):
+    def __init__(self,id2KEGGID_filename_I=None,id2KEGGID_I={},dG0_f_I={},dG_f_I={},measured_dG_f_I={},estimated_dG_f_I={},
+                 cc_cache_dir_I=None):
         """
 
         Args:
         cobra_model_I = cobra model object
+        cc_cache_dir_I = directory of the trained component contribution cache
+            (default: $XDG_CACHE_HOME/thermodynamics or ~/.cache/thermodynamics)
                                                     
         Returns: 
             dict: measured_dG_f: transformed compound Gibbs energies of formation
@@ -70,6 +118,13 @@ class thermodynamics_dG_f_data(thermodynamics_io):
             self.estimated_dG_f = estimated_dG_f_I
         else:
             self.estimated_dG_f = {} # units of kJ/mol
+        # KeggModel with the untransformed estimates and the KEGG reactions it was made from
+        self.cc_model = None
+        self.cc_model_reactions = None
+        if cc_cache_dir_I:
+            self.cc_cache_dir = cc_cache_dir_I
+        else:
+            self.cc_cache_dir = _cache_dir
 
     def _get_id2KEGGID_csv(self, id2KEGGID_filename_I):
         """Read in the id2KEGGID mapping"""
@@ -114,34 +169,21 @@ class thermodynamics_dG_f_data(thermodynamics_io):
                 'ionic_strength_units': units}}
         """
 
-        self._add_KEGGID(cobra_model_I)
-        reaction_list = self._make_KEGG_reaction(cobra_model_I)
-
         compartments = list(set(cobra_model_I.metabolites.list_attr('compartment')))
+        conditions = {}
+        for c in compartments:
+            conditions[c] = {'pH':pH_I[c]['pH'],
+                             'temperature':temperature_I[c]['temperature'],
+                             'ionic_strength':ionic_strength_I[c]['ionic_strength']}
+        dG_f_conditions = self.get_transformed_dG0_f_conditions(cobra_model_I, conditions)
+
         for c in compartments:
-            dG_f_intkeys = {}
-            dG_var_f_intkeys = {}
-            dG_f_strkeys = {}
-            dG_var_f_strkeys = {}
-            dG_f_intkeys, dG_var_f_intkeys = self._component_contribution_wrapper(list(reaction_list.values()),
-                                                                  pH_I[c]['pH'],
-                                                                  temperature_I[c]['temperature'],
-                                                                  ionic_strength_I[c]['ionic_strength'])
-            # convert integer KEGGID to string KEGGID
-            for key,value in dG_f_intkeys.items():
-                dG_f_strkeys['C%05d' % key] = value
-
-            for key,value in dG_var_f_intkeys.items():
-                dG_var_f_strkeys['C%05d' % key] = value     
-                
             # convert KEGGID to metabolite.id
-            for key,value in dG_f_strkeys.items():
+            for key,value in dG_f_conditions[c].items():
                 id = self.KEGGID2id[key]
                 if id:
                     id_compartment = id + '_' + c
-                    self.dG_f[id_compartment] = {'dG_f':value,
-                                 'dG_f_var':dG_var_f_strkeys[key],
-                                 'dG_f_units':'kJ/mol'}
+                    self.dG_f[id_compartment] = dict(value)
 
             # works but far too slow, inverse dictionary used instead
             #for key,value in dG_f_strkeys.iteritems():
@@ -154,6 +196,56 @@ class thermodynamics_dG_f_data(thermodynamics_io):
             #                     'dG_f_var':dG_var_f_strkeys[key],
             #                     'dG_f_units':'kJ/mol'}
 
+    def get_transformed_dG0_f_conditions(self,cobra_model_I,conditions_I):
+        """get the transformed Gibbs free energies of formation for several conditions
+
+        The untransformed estimates are computed once (see _get_component_contribution_model)
+        and only the Legendre transform is applied for each unique condition.
+
+        Args:
+            cobra_model_I: cobra_model
+            conditions_I (dict): {label (e.g., compartment or sweep point):
+                {'pH': float, 'temperature': float (K), 'ionic_strength': float (M)}}
+
+        Returns:
+            dict: dG_f_O: {label: {KEGGID: {'dG_f': float,
+                'dG_f_var': float,
+                'dG_f_units': 'kJ/mol'}}}
+        """
+
+        model = self._get_component_contribution_model(cobra_model_I)
+
+        dG_f_O = {}
+        dG_f_transformed = {} # {(pH, ionic_strength, temperature): {KEGGID: {...}}}
+        for label,condition in conditions_I.items():
+            key = (condition['pH'],condition['ionic_strength'],condition['temperature'])
+            if not key in dG_f_transformed:
+                dG_f_intkeys, dG_var_f_intkeys = model.get_transformed_dG0(pH=condition['pH'],
+                                                                      I=condition['ionic_strength'],
+                                                                      T=condition['temperature'])
+                # convert integer KEGGID to string KEGGID
+                dG_f_strkeys = {}
+                for k,v in dG_f_intkeys.items():
+                    dG_f_strkeys['C%05d' % k] = {'dG_f':v,
+                                 'dG_f_var':dG_var_f_intkeys[k],
+                                 'dG_f_units':'kJ/mol'}
+                dG_f_transformed[key] = dG_f_strkeys
+            dG_f_O[label] = dG_f_transformed[key]
+        return dG_f_O
+
+    def _get_component_contribution_model(self,cobra_model_I):
+        """get the KeggModel with the untransformed component contribution estimates
+
+        The KeggModel is reused as long as the KEGG reactions of the model do not change.
+        """
+
+        self._add_KEGGID(cobra_model_I)
+        reaction_list = list(self._make_KEGG_reaction(cobra_model_I).values())
+        if self.cc_model is None or self.cc_model_reactions != reaction_list:
+            self.cc_model = self._make_component_contribution_model(reaction_list)
+            self.cc_model_reactions = reaction_list
+        return self.cc_model
+
     def export_dG0_f(self,filename_I):
         # write json to file
         with open(filename_I, 'w') as outfile:
@@ -243,16 +335,99 @@ class thermodynamics_dG_f_data(thermodynamics_io):
         #        'C00033 + C00002 + C00010 <=> C00024 + C00020 + C00013']
         #model = KeggModel.from_formulas(wolf) 
 
-        model = KeggModel.from_formulas(reaction_list_I)    
-
-        td = TrainingData()
-        cc = ComponentContribution(td)
-        model.add_thermo(cc)
+        model = self._make_component_contribution_model(reaction_list_I)
     
         dG0_prime_f, dG0_var_f = model.get_transformed_dG0(pH=pH_I, I=ionic_strength_I, T=temperature_I)
 
         return dG0_prime_f, dG0_var_f
 
+    def _make_component_contribution_model(self,reaction_list_I):
+        """make a KeggModel from a list of KEGG reactions and add the
+        trained component contribution to it"""
+
+        model = KeggModel.from_formulas(reaction_list_I)
+        model.add_thermo(self._get_component_contribution())
+        return model
+
+    def _get_trainingData_files(self):
+        """get the files the component contribution is trained from
+
+        Returns:
+            list: the training_data module and the data files
+                (i.e., not python files) of the component_contribution package
+        """
+
+        import component_contribution.training_data as training_data
+        filenames_O = [os.path.abspath(training_data.__file__)]
+        package_dir = os.path.dirname(os.path.abspath(component_contribution.__file__))
+        for dirpath,dirnames,filenames in os.walk(package_dir):
+            dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+            for f in sorted(filenames):
+                if not os.path.splitext(f)[1] in ['.py','.pyc','.pyo']:
+                    filenames_O.append(os.path.join(dirpath,f))
+        return filenames_O
+
+    def _get_trainingData_version(self):
+        """get the version of the component contribution training data
+
+        Returns:
+            str: a hash of the component_contribution version and of the
+                contents of the training data files (see _get_trainingData_files)
+
+        NOTES:
+          the training data files are hashed only once per session
+        """
+
+        global _trainingData_version
+        if _trainingData_version is not None:
+            return _trainingData_version
+        md5 = hashlib.md5(str(getattr(component_contribution,'__version__',None)).encode('utf-8'))
+        for filename in self._get_trainingData_files():
+            md5.update(filename.encode('utf-8'))
+            with open(filename,'rb') as infile:
+                for block in iter(lambda: infile.read(1 << 20), b''):
+                    md5.update(block)
+        _trainingData_version = md5.hexdigest()[:12]
+        return _trainingData_version
+
+    def _get_component_contribution(self):
+        """get the trained component contribution
+
+        The trained ComponentContribution is loaded lazily: first from memory,
+        then from the on-disk cache keyed by the training data version,
+        and only trained (and cached) if neither is available.
+        The cache is written to a temporary file that replaces the cache
+        when complete, so that a partially written cache is never read.
+
+        Returns:
+            ComponentContribution
+        """
+
+        filename = os.path.join(self.cc_cache_dir,
+            'component_contribution_' + self._get_trainingData_version() + '.pkl')
+        if filename in _component_contribution_cache:
+            return _component_contribution_cache[filename]
+        cc = None
+        if os.path.exists(filename):
+            try:
+                with open(filename,'rb') as infile:
+                    cc = pickle.load(infile)
+            except Exception as e:
+                print('could not load the component contribution cache ' + filename + ': ' + str(e))
+        if cc is None:
+            td = TrainingData()
+            cc = ComponentContribution(td)
+            try:
+                os.makedirs(self.cc_cache_dir, exist_ok=True)
+                filename_tmp = filename + '.tmp'
+                with open(filename_tmp,'wb') as outfile:
+                    pickle.dump(cc, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(filename_tmp,filename)
+            except (IOError,OSError) as e:
+                print('could not write the component contribution cache ' + filename + ': ' + str(e))
+        _component_contribution_cache[filename] = cc
+        return cc
+
     def _convert_KEGGID2id(self, KEGGID_I):
         """convert KEGGID to model id
 
@@ -279,23 +454,47 @@ class thermodynamics_dG_f_data(thermodynamics_io):
     # equates to a set of hacks to extraction out the RC data using the component contribution
     # method and combine with the bibliomic and GC data previously described using the
     # psuedoisomer contribution method that is stored on equilibrator
-    def make_dG0_f_pH0(self):
+    def make_dG0_f_pH0(self, filename_I=None, rc_filename_I=None, pseudoisomers_filename_I=None,
+                       compounds_filename_I=None, ccache_dir_I=None, processes_I=3):
         """
         Set of functions to generate a combined RC, bibliomic, and GC set of dG0_f values
 
         priority 0: RC (from component contribution see _make_ccache())
         priority 1: bibliomic (from pseudoisomer contriubtion from equilibrator website)
         priority 2: GC (from pseudoisomer contribution from equilibrator website)
+
+        Args:
+            filename_I (str): combined dG0_f data (see _combine_dG0_f_pH0)
+                (default: thermodynamics_data/compounds_dG0_f.sqlite)
+            rc_filename_I (str): RC dG0_f values (default: thermodynamics_data/dG0_f_rc_v2.csv)
+            pseudoisomers_filename_I (str): default: thermodynamics_data/kegg_pseudoisomers.json
+            compounds_filename_I (str): compound cache dump (default: thermodynamics_data/compounds.json)
+            ccache_dir_I (str): compound cache made by make_ccache
+                (used instead of pseudoisomers_filename_I and compounds_filename_I)
+            processes_I (int): number of processes for the priority 0, 1, and 2 loaders
+                (default: 3; 1: load in turn)
         """
+        if not filename_I: filename_I = os.path.join(_data_dir,'compounds_dG0_f.sqlite')
+        ccache = None
+        if ccache_dir_I: ccache = self.load_ccache(ccache_dir_I)
         # get dG0_f (pH = 0, ionic strength = 0, temperature = 298.15 K) for priority 0, 1, and 2
-        dG0_f_0 = {}
-        dG0_f_1 = {}
-        dG0_f_2 = {}
-        dG0_f_0 = self._get_pseudoisomer_priority0_pH0()
-        dG0_f_1 = self._get_pseudoisomer_priority1_pH0()
-        dG0_f_2 = self._get_pseudoisomer_priority2_pH0()
+        loaders = [(self._get_pseudoisomer_priority0_pH0,(rc_filename_I,)),
+                   (self._get_pseudoisomer_priority1_pH0,(ccache,pseudoisomers_filename_I)),
+                   (self._get_pseudoisomer_priority2_pH0,(ccache,compounds_filename_I,pseudoisomers_filename_I))]
+        if processes_I is None:
+            processes_I = multiprocessing.cpu_count()
+        if processes_I > 1:
+            pool = multiprocessing.Pool(min(processes_I,len(loaders)))
+            try:
+                results = [pool.apply_async(loader,args) for loader,args in loaders]
+                dG0_f_0,dG0_f_1,dG0_f_2 = [r.get() for r in results]
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            dG0_f_0,dG0_f_1,dG0_f_2 = [loader(*args) for loader,args in loaders]
 
-        self._combine_dG0_f_pH0(dG0_f_0, dG0_f_1, dG0_f_2, '/home/user/code/thermodynamics/thermodynamics_data/compounds_dG0_f.json')
+        self._combine_dG0_f_pH0(dG0_f_0, dG0_f_1, dG0_f_2, filename_I)
 
         #>>> len(keys)
         #12841
@@ -308,31 +507,119 @@ class thermodynamics_dG_f_data(thermodynamics_io):
         #>>> 
 
     def _make_ccache(self):
-        pseudo = json.load(open('/home/user/code/thermodynamics/thermodynamics_data/kegg_pseudoisomers.json'))
-        rxns = []
-        cnt = 0
-        for i, item in enumerate(pseudo):
-            rxns.append('1 ' + item['CID'] + ' <=> 1 ' + item['CID'])
-            cnt = cnt + 1
-            if cnt>2000:
-                model = KeggModel.from_formulas(rxns) 
-                model.ccache.dump()
-                rxns = []
-                cnt = 0
-        model = KeggModel.from_formulas(rxns) 
-        model.ccache.dump()
-
-    def _get_pseudoisomer_priority2_pH0(self):
-       # compounds = json.load(open('cobra\\thermodynamics\\component_contribution\\cache\\compounds.json'))
-        compounds = json.load(open('/home/user/code/thermodynamics/thermodynamics_data/compounds.json'))
-        pseudo = json.load(open('/home/user/code/thermodynamics/thermodynamics_data/kegg_pseudoisomers.json'))
+        self.make_ccache(os.path.join(_data_dir,'kegg_pseudoisomers.json'),
+                         os.path.join(_data_dir,'ccache'))
+
+    def make_ccache(self, pseudoisomers_filename_I, ccache_dir_I, chunk_size_I=2000, processes_I=1):
+        """make the compound cache of the compounds in kegg_pseudoisomers.json
+
+        The compounds are split into chunks that are processed in parallel;
+        each chunk is written to its own file in ccache_dir_I (see load_ccache).
+        Chunks that were already written are skipped, so that an interrupted
+        build is resumed where it stopped. The chunks of the current build
+        are listed in ccache_dir_I/manifest.json.
+
+        Args:
+            pseudoisomers_filename_I (str): kegg_pseudoisomers.json
+            ccache_dir_I (str): directory of the chunk files
+            chunk_size_I (int): number of compounds per chunk
+            processes_I (int): number of processes (default: 1; None: all cpus)
+
+        Returns:
+            list: failed_O: chunk files that could not be made
+        """
+
+        with open(pseudoisomers_filename_I) as infile:
+            pseudo = json.load(infile)
+        if not os.path.isdir(ccache_dir_I):
+            os.makedirs(ccache_dir_I)
+
+        # chunk files are named by their index and content
+        chunks = []
+        filenames = []
+        for i in range(0,len(pseudo),chunk_size_I):
+            items = pseudo[i:i+chunk_size_I]
+            cids = [item['CID'] for item in items]
+            checksum = hashlib.md5(','.join(cids).encode('utf-8')).hexdigest()[:8]
+            filename = os.path.join(ccache_dir_I,'ccache_%05d_%s.json' %(i//chunk_size_I,checksum))
+            filenames.append(os.path.basename(filename))
+            if not os.path.exists(filename):
+                chunks.append((filename,items))
+
+        failed_O = []
+        if processes_I is None:
+            processes_I = multiprocessing.cpu_count()
+        processes_I = min(processes_I,len(chunks))
+        if processes_I > 1:
+            pool = multiprocessing.Pool(processes_I)
+            try:
+                results = list(pool.imap_unordered(_make_ccache_chunk,chunks))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_make_ccache_chunk(chunk) for chunk in chunks]
+        for filename,error in results:
+            if error:
+                print('could not make the compound cache chunk ' + filename + ': ' + error)
+                failed_O.append(filename)
+
+        # list the chunks that were made
+        manifest_filename = os.path.join(ccache_dir_I,'manifest.json')
+        with open(manifest_filename + '.tmp','w') as outfile:
+            json.dump([f for f in filenames if os.path.exists(os.path.join(ccache_dir_I,f))], outfile)
+        os.replace(manifest_filename + '.tmp',manifest_filename)
+        return failed_O
+
+    def load_ccache(self, ccache_dir_I):
+        """load the compound cache made by make_ccache
+
+        Args:
+            ccache_dir_I (str): directory of the chunk files
+
+        Returns:
+            dict: ccache_O: {'compounds': [{'id','pKas','nHs','zs',...},...],
+                             'pseudoisomers': [kegg_pseudoisomers.json items]}
+        """
+
+        ccache_O = {'compounds':[],'pseudoisomers':[]}
+        with open(os.path.join(ccache_dir_I,'manifest.json')) as infile:
+            filenames = json.load(infile)
+        for f in filenames:
+            with open(os.path.join(ccache_dir_I,f)) as infile:
+                chunk = json.load(infile)
+            ccache_O['compounds'].extend(chunk['compounds'])
+            ccache_O['pseudoisomers'].extend(chunk['pseudoisomers'])
+        return ccache_O
+
+    @staticmethod
+    def _get_pseudoisomer_priority2_pH0(ccache_I=None, compounds_filename_I=None, pseudoisomers_filename_I=None):
+        """get the priority 2 (GC) dG0_f values
+
+        Args:
+            ccache_I (dict): compound cache (see load_ccache)
+            compounds_filename_I (str): compound cache dump, if ccache_I is not given
+                (default: thermodynamics_data/compounds.json)
+            pseudoisomers_filename_I (str): if ccache_I is not given
+                (default: thermodynamics_data/kegg_pseudoisomers.json)
+        """
+        if ccache_I:
+            compounds = ccache_I['compounds']
+            pseudo = ccache_I['pseudoisomers']
+        else:
+            if not compounds_filename_I: compounds_filename_I = os.path.join(_data_dir,'compounds.json')
+            if not pseudoisomers_filename_I: pseudoisomers_filename_I = os.path.join(_data_dir,'kegg_pseudoisomers.json')
+            with open(compounds_filename_I) as infile:
+                compounds = json.load(infile)
+            with open(pseudoisomers_filename_I) as infile:
+                pseudo = json.load(infile)
         # units: dG0_f: kJ/mol
         #        variance = (kJ/mol)^2
         # variance: we are estimating that the variance for the GC method is 62.0 (kJ/mol)^2,
         #           based on an estimate of the uncertainties in the groups in the GC method
         #           doi:10.1371/journal.pcbi.1003098 page 10
 
-        zs_neg = []
+        pKas_neg = []
         zs_min = {}
         for item in compounds:
              pKas = item['pKas']
@@ -367,8 +654,21 @@ class thermodynamics_dG_f_data(thermodynamics_io):
                                         dG0_f[item['CID']] = {'priority':2,'source':'', 'dG0_f':value, 'dG0_f_units': 'kJ/mol', 'dG0_f_var':62.0}
         return dG0_f
 
-    def _get_pseudoisomer_priority1_pH0(self):
-        pseudo = json.load(open('/home/user/code/thermodynamics/thermodynamics_data/kegg_pseudoisomers.json'))
+    @staticmethod
+    def _get_pseudoisomer_priority1_pH0(ccache_I=None, pseudoisomers_filename_I=None):
+        """get the priority 1 (bibliomic) dG0_f values
+
+        Args:
+            ccache_I (dict): compound cache (see load_ccache)
+            pseudoisomers_filename_I (str): if ccache_I is not given
+                (default: thermodynamics_data/kegg_pseudoisomers.json)
+        """
+        if ccache_I:
+            pseudo = ccache_I['pseudoisomers']
+        else:
+            if not pseudoisomers_filename_I: pseudoisomers_filename_I = os.path.join(_data_dir,'kegg_pseudoisomers.json')
+            with open(pseudoisomers_filename_I) as infile:
+                pseudo = json.load(infile)
         # units: dG0_f: kJ/mol
         #        variance = (kJ/mol)^2
         # variance: we are estimating that the experimental variance for bibliomic data is 31.0 (kJ/mol)^2,
@@ -396,14 +696,21 @@ class thermodynamics_dG_f_data(thermodynamics_io):
                                         dG0_f[item['CID']] = {'priority':1,'source':'', 'dG0_f':value, 'dG0_f_units': 'kJ/mol', 'dG0_f_var':31.0}
         return dG0_f
 
-    def _get_pseudoisomer_priority0_pH0(self):
+    @staticmethod
+    def _get_pseudoisomer_priority0_pH0(rc_filename_I=None):
+        """get the priority 0 (RC) dG0_f values
+
+        Args:
+            rc_filename_I (str): default: thermodynamics_data/dG0_f_rc_v2.csv
+        """
+        if not rc_filename_I: rc_filename_I = os.path.join(_data_dir,'dG0_f_rc_v2.csv')
         # units: dG0_f: kJ/mol
         #        variance = (kJ/mol)^2
         # variance: we are estimating that the variance for the RC method is 17.8 (kJ/mol)^2,
         #           doi:10.1371/journal.pcbi.1003098 page 10
 
         dG0_f = {}
-        with open('/home/user/code/thermodynamics/thermodynamics_data/dG0_f_rc_v2.csv','r') as infile:
+        with open(rc_filename_I,'r') as infile:
             reader = csv.reader(infile)
             headers = next(reader)
             for r in reader:
@@ -415,48 +722,65 @@ class thermodynamics_dG_f_data(thermodynamics_io):
 
     def _combine_dG0_f_pH0(self, dG0_f_0, dG0_f_1, dG0_f_2, filename):
         """
-        combine priority 0, 1, and 2 dG0_f values into a single json datafile
+        combine priority 0, 1, and 2 dG0_f values into a single datafile
+
+        Args:
+            dG0_f_0, dG0_f_1, dG0_f_2 (dict): {KEGGID: {'priority','source','dG0_f','dG0_f_units','dG0_f_var'}}
+            filename (str): a dG0_f store (see thermodynamics_dG0_f_store)
+                or, if the name ends with .json, a compounds_dG0_f.json file
         """
-        compounds_dG0_f = {}
-        keys = []
-        if dG0_f_0:keys.extend(list(dG0_f_0.keys()))
-        if dG0_f_1:keys.extend(list(dG0_f_1.keys()))
-        if dG0_f_2: keys.extend(list(dG0_f_2.keys()))
-        keys = sorted(list(set(keys)))
-        # add the data into a single json file
-        for k in keys:
-            compounds_dG0_f[k] = []
-            if k in list(dG0_f_0.keys()):
-                compounds_dG0_f[k].append(dG0_f_0[k])
-            if k in list(dG0_f_1.keys()):
-                compounds_dG0_f[k].append(dG0_f_1[k])
-            if k in list(dG0_f_2.keys()):
-                compounds_dG0_f[k].append(dG0_f_2[k])
-        with open(filename,'w') as outfile:
-            json.dump(compounds_dG0_f, outfile, indent=4)
+        dG0_f_list = [d for d in [dG0_f_0, dG0_f_1, dG0_f_2] if d]
+        keys = set()
+        for d in dG0_f_list: keys.update(d.keys())
+        # entries of each compound in order of priority
+        compounds_dG0_f = ((k,[d[k] for d in dG0_f_list if k in d]) for k in sorted(keys))
+        if filename.endswith('.json'):
+            with open(filename,'w') as outfile:
+                json.dump(dict(compounds_dG0_f), outfile, indent=4)
+        else:
+            write_dG0_f_store(compounds_dG0_f, filename)
 
     ### 2 End ###
 
     ### 3 Start ###
     # upload the combined dG0_f data file and tranfsorm to the desired ph, temp, and ionic strength         
-    def get_transformed_dG_f(self,dG0_f_I, cobra_model_I, pH_I,temperature_I,ionic_strength_I):
+    def get_transformed_dG_f(self,dG0_f_I, cobra_model_I, pH_I,temperature_I,ionic_strength_I,
+                             method_I='component_contribution',compounds_I=None):
         """get the transformed Gibbs free energies of formation
 
         relies on RC data taken from the component_contribution: doi:10.1371/journal.pcbi.1003098
         and bibliomic/GC data taken from the psuedoisomer contribution method: doi:10.1093/bioinformatics/bts317
 
         Args:
+            dG0_f_I (dict or str): combined dG0_f data, or the name of a compounds_dG0_f.json file
+                or of a dG0_f store (see thermodynamics_dG0_f_store)
             cobra_model_I: cobra_model
             pH (dict): {metabolite.compartment {'pH': float}}
             temperature (dict): {metabolite.compartment {'temperature': float,
                 'temperature_units': K}}
             ionic strength (dict): {metabolite.compartment {'ionic_strength': float,
                 'ionic_strength_units': units}}
+            method_I (str): 'component_contribution': transform all dG0_f values with
+                                component_contribution.compound_model for each compartment
+                            'numpy': transform only the metabolites in each compartment
+                                with the packed pseudoisomers (see thermodynamics_pseudoisomers)
+            compounds_I (str, list, or dict): pseudoisomer data for method_I='numpy'
+                (see _get_compounds_pseudoisomers)
         """
 
+        # KEGG ids of the metabolites in the model
+        m_ids_kegg = []
+        for m in cobra_model_I.metabolites:
+            m_id_model = m.id[:-2] # assuming that the compartment is a 1 letter abbreviation!
+            if m_id_model in self.id2KEGGID and not(m_id_model in self.dG0_f):
+                m_ids_kegg.append(self.id2KEGGID[m_id_model])
+
         # upload dG0_f values
         dG0_f_KEGG_all = {}
         if type(dG0_f_I) == type({}): dG0_f_KEGG_all=dG0_f_I
+        elif type(dG0_f_I) == type('') and is_dG0_f_store(dG0_f_I):
+            # only the compounds in the model are read
+            dG0_f_KEGG_all = thermodynamics_dG0_f_store(dG0_f_I).get_dG0_f([k for k in m_ids_kegg if k])
         elif type(dG0_f_I) == type(''):
             try:
                 dG0_f_KEGG_all = json.load(open(dG0_f_I))
@@ -465,14 +789,8 @@ class thermodynamics_dG_f_data(thermodynamics_io):
                 return
 
         # extract out dG0_f values in the model
-        for m in cobra_model_I.metabolites:
-            m_id_model = m.id[:-2] # assuming that the compartment is a 1 letter abbreviation!
-            m_id_kegg = ''
-            if m_id_model in list(self.id2KEGGID.keys()):
-                m_id_kegg = self.id2KEGGID[m_id_model]
-            else: 
-                continue
-            if m_id_kegg and m_id_kegg in list(dG0_f_KEGG_all.keys()) and not(m_id_model in list(self.dG0_f.keys())):
+        for m_id_kegg in m_ids_kegg:
+            if m_id_kegg and m_id_kegg in dG0_f_KEGG_all:
                 # get minimum priority value
                 priority = []
                 min_priority = 0
@@ -488,6 +806,10 @@ class thermodynamics_dG_f_data(thermodynamics_io):
 
         # transform the data
         compartments = list(set(cobra_model_I.metabolites.list_attr('compartment')))
+        if method_I == 'numpy':
+            self._get_transformed_dG_f_pseudoisomers(cobra_model_I, compartments,
+                pH_I, temperature_I, ionic_strength_I, compounds_I)
+            return
         for c in compartments:
             # get metabolite ids and dG0_f data of the particular compartment
             dG0_f_ids = []
@@ -523,6 +845,68 @@ class thermodynamics_dG_f_data(thermodynamics_io):
         with open(filename_I, 'w') as outfile:
             json.dump(self.dG_f, outfile, indent=4)
 
+    def _get_transformed_dG_f_pseudoisomers(self, cobra_model_I, compartments_I,
+                                            pH_I, temperature_I, ionic_strength_I, compounds_I=None):
+        """transform self.dG0_f for the metabolites in each compartment
+        using the packed pseudoisomers"""
+
+        dG0_f_ids = list(self.dG0_f.keys())
+        pseudoisomers = pack_pseudoisomers(dG0_f_ids,
+            [self.dG0_f[k]['dG_f'] for k in dG0_f_ids],
+            self._get_compounds_pseudoisomers(dG0_f_ids, compounds_I))
+        met_ids = set([m.id for m in cobra_model_I.metabolites])
+        for c in compartments_I:
+            # only the metabolites in the compartment
+            kegg_ids = [k for k in pseudoisomers['ids']
+                if k in self.KEGGID2id and self.KEGGID2id[k] + '_' + c in met_ids]
+            pseudoisomers_c = select_pseudoisomers(pseudoisomers, kegg_ids)
+            dG_f_data = transform_pseudoisomers(pseudoisomers_c,
+                                                pH_I[c]['pH'],
+                                                ionic_strength_I[c]['ionic_strength'],
+                                                temperature_I[c]['temperature'])
+            for i,kegg_id in enumerate(pseudoisomers_c['ids']):
+                id_compartment = self.KEGGID2id[kegg_id] + '_' + c
+                self.dG_f[id_compartment] = {'dG_f':float(dG_f_data[i]),
+                             'dG_f_var':self.dG0_f[kegg_id]['dG_f_var'],
+                             'dG_f_units':self.dG0_f[kegg_id]['dG_f_units']}
+
+    def _get_compounds_pseudoisomers(self, kegg_ids_I, compounds_I=None):
+        """get the pseudoisomer data of each compound
+
+        Args:
+            kegg_ids_I (list): KEGG ids
+            compounds_I (str, list, or dict): compound cache dump (filename or list of
+                {'id','pKas','nHs','zs'}), compound cache directory (see make_ccache),
+                or {KEGGID: {'pKas','nHs','zs'}};
+                default: the component_contribution CompoundCacher
+
+        Returns:
+            dict: compounds_O: {KEGGID: {'pKas': list, 'nHs': list, 'zs': list}}
+        """
+
+        if type(compounds_I) == type('') and os.path.isdir(compounds_I):
+            compounds_I = self.load_ccache(compounds_I)['compounds']
+        elif type(compounds_I) == type(''):
+            compounds_I = json.load(open(compounds_I))
+        if type(compounds_I) == type([]):
+            compounds_I = {c['id']:c for c in compounds_I}
+
+        compounds_O = {}
+        if compounds_I is None:
+            ccache = CompoundCacher()
+            for cid in kegg_ids_I:
+                try:
+                    compound = ccache.get_compound(cid)
+                except Exception as e:
+                    print('no pseudoisomer data for ' + cid + ': ' + str(e))
+                    continue
+                compounds_O[cid] = {'pKas':compound.pKas,'nHs':compound.nHs,'zs':compound.zs}
+        else:
+            for cid in kegg_ids_I:
+                if cid in compounds_I:
+                    compounds_O[cid] = {k:compounds_I[cid][k] for k in ['pKas','nHs','zs']}
+        return compounds_O
+
     def _get_transformed_f(self, dG0_f_id_I, dG0_f_I, pH_I, temperature_I, ionic_strength_I):
 
         c_model = compound_model(dG0_f_id_I, dG0_f_I)
@@ -676,18 +1060,10 @@ class thermodynamics_dG_f_data(thermodynamics_io):
                 lbub[c] = {'dG_f_lb':-1e6,
                                        'dG_f_ub':1e6,
                                        'dG_f_units':'kJ/mol'}
-        default_values = {}
-        for m in cobra_model.metabolites:
-            default_values[m.id] = {'dG_f_lb': lbub[m.compartment]['dG_f_lb'],
-                                   'dG_f_ub': lbub[m.compartment]['dG_f_ub'],
-                                   'dG_f_units': lbub[m.compartment]['dG_f_units']}
-            if exceptions:    
-                for k,v in exceptions.items():
-                    if k in m.id:
-                        default_values[m.id] = {'dG_f_lb':v['dG_f_lb'],
-                                       'dG_f_ub':v['dG_f_ub'],
-                                       'dG_f_units':v['dG_f_units']}
-    
+        default_values = generalize_compartments2all(cobra_model.metabolites, lbub,
+            ['dG_f_lb','dG_f_ub','dG_f_units'],
+            exceptions)
+
         return default_values
 
     def _generalize_compartment2all_dG_f(self, cobra_model, dG_f=None, exceptions=None):
@@ -722,22 +1098,13 @@ class thermodynamics_dG_f_data(thermodynamics_io):
                                        'dG_f_var':1e12, # based on the convention described in
                                                        # doi:10.1371/journal.pcbi.1003098
                                        'dG_f_units':'kJ/mol'}
-        default_values = {}
-        for m in cobra_model.metabolites:
-            default_values[m.id] = {'dG_f': dG_f[m.compartment]['dG_f'],
-                                   'dG_f_var': dG_f[m.compartment]['dG_f_var'],
-                                   'dG_f_lb': dG_f[m.compartment]['dG_f'] - sqrt(dG_f[m.compartment]['dG_f_var']),
-                                   'dG_f_ub': dG_f[m.compartment]['dG_f'] + sqrt(dG_f[m.compartment]['dG_f_var']),
-                                   'dG_f_units': dG_f[m.compartment]['dG_f_units']}
-            if exceptions:    
-                for k,v in exceptions.items():
-                    if k in m.id:
-                        default_values[m.id] = {'dG_f':v['dG_f'],
-                                       'dG_f_var':v['dG_f_var'],
-                                       'dG_f_lb':v['dG_f_lb'],
-                                       'dG_f_ub':v['dG_f_ub'],
-                                       'dG_f_units':v['dG_f_units']}
-    
+        # the lower and upper bounds are estimated from the variance
+        dG_f = {c:dict(v,dG_f_lb=v['dG_f'] - sqrt(v['dG_f_var']),
+            dG_f_ub=v['dG_f'] + sqrt(v['dG_f_var'])) for c,v in dG_f.items()}
+        default_values = generalize_compartments2all(cobra_model.metabolites, dG_f,
+            ['dG_f','dG_f_var','dG_f_lb','dG_f_ub','dG_f_units'],
+            exceptions)
+
         return default_values    
 
     def remove_measured_dG_f(self,mets_I):
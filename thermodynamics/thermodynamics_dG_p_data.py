@@ -1,8 +1,50 @@
 
 # -*- coding: utf-8 -*-
-from math import floor,ceil,log,sqrt,pow,exp,fabs
+from math import floor,ceil,log,sqrt,pow,exp,fabs,gcd
 from copy import deepcopy
 from collections import Counter
+from functools import reduce
+import json, csv, ast
+
+# Other dependencies
+import numpy
+from scipy.sparse import csr_matrix
+from scipy.optimize import linprog
+import multiprocessing
+
+from .thermodynamics_dG_r_data import thermodynamics_dG_r_data
+from .thermodynamics_utility import make_stoichiometry, find_coupledReactions
+from .thermodynamics_simulatedData import make_model_hash
+
+def _solve_mdf(problem_I):
+    """solve the max-min driving force LP of a pathway
+
+    Args:
+        problem_I (dict): see thermodynamics_dG_p_data._make_mdf_problems
+
+    Returns:
+        dict: mdf_O: see thermodynamics_dG_p_data.calculate_mdf
+    """
+    A_ub = problem_I['A_ub'];
+    b_ub = problem_I['b_ub'];
+    # maximize the minimum driving force B
+    c = numpy.zeros(A_ub.shape[1]);
+    c[-1] = -1.0;
+    res = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=problem_I['bounds'], method='highs');
+    mdf_O = {'mdf':None,'mdf_units':'kJ/mol','feasible':None,'bottlenecks':[],
+             'driving_force':{},'ln_concentration':{},'status':res.message};
+    if res.status != 0:
+        return mdf_O;
+    x = res.x;
+    driving_force = b_ub - A_ub[:,:-1].dot(x[:-1]);
+    # reactions with a non-zero shadow price limit the driving force
+    bottlenecks = numpy.abs(res.ineqlin.marginals) > 1e-9;
+    mdf_O['mdf'] = float(x[-1]);
+    mdf_O['feasible'] = bool(x[-1] > 0.0);
+    mdf_O['bottlenecks'] = [r for r,b in zip(problem_I['reaction_ids'],bottlenecks) if b];
+    mdf_O['driving_force'] = {r:float(df) for r,df in zip(problem_I['reaction_ids'],driving_force)};
+    mdf_O['ln_concentration'] = {m:float(v) for m,v in zip(problem_I['metabolite_ids'],x[:-1])};
+    return mdf_O;
 
 class thermodynamics_dG_p_data():
     """Runs pathway thermodynamic analysis analysis on a cobra.Model object
@@ -66,6 +108,7 @@ class thermodynamics_dG_p_data():
         else:
             self.dG_p = {};
         self.dG_p_coverage = {}
+        self.mdf = {}
         self.metabolomics_coverage = {}
         self.thermodynamic_consistency_check = {}
 
@@ -96,72 +139,382 @@ class thermodynamics_dG_p_data():
             dict: dG_p
             dict: thermodynamic_consistency_check
 
+        NOTES:
+          reactions without a dG0_r or dG_r do not contribute to the pathway
         """
 
+        pathway_matrix = self.make_pathway_matrix();
+        reaction_ids = pathway_matrix['reaction_ids'];
+        dG0_p_arrays = self.calculate_dG_p_arrays(
+            self._make_dG_r_arrays(dG0_r, reaction_ids, 'dG0_r'), pathway_matrix);
+        dG_p_arrays = self.calculate_dG_p_arrays(
+            self._make_dG_r_arrays(dG_r, reaction_ids, 'dG_r'), pathway_matrix);
+
         dG0_p = {};
         dG_p = {};
-        # iterate through each pathway
-        for path,v in self.pathways.items():
-            dG0_p[path] = None;
-            dG_p[path] = None;
-            dG0_p_dict = {};
-            dG_p_dict = {};
-            dG0_p_tmp = 0.0;
-            dG0_p_var_tmp = 0.0;
-            dG0_p_lb_tmp = 0.0;
-            dG0_p_ub_tmp = 0.0;
-            dG_p_tmp = 0.0;
-            dG_p_var_tmp = 0.0;
-            dG_p_lb_tmp = 0.0;
-            dG_p_ub_tmp = 0.0;
-            # iterate through each reaction
-            for i,rxn in enumerate(v['reactions']):
-                if rxn in dG0_r:
-                    # dG0 calculations
-                    dG0_p_tmp += dG0_r[rxn]['dG_r']*v['stoichiometry'][i];
-                    dG0_p_var_tmp += dG0_r[rxn]['dG_r_var']*v['stoichiometry'][i];
-                    # ensure bounds are correct
-                    if dG0_r[rxn]['dG_r_lb']>dG0_r[rxn]['dG_r_ub']:
-                        dG0_p_lb_tmp += dG0_r[rxn]['dG_r_ub']*v['stoichiometry'][i];
-                        dG0_p_ub_tmp += dG0_r[rxn]['dG_r_lb']*v['stoichiometry'][i];
-                    else:
-                        dG0_p_lb_tmp += dG0_r[rxn]['dG_r_lb']*v['stoichiometry'][i];
-                        dG0_p_ub_tmp += dG0_r[rxn]['dG_r_ub']*v['stoichiometry'][i];
-                else: print(('dG0_r not calculated for reaction ' + rxn + '!'));
-                if rxn in dG_r:
-                    # dG calculations
-                    dG_p_tmp += dG_r[rxn]['dG_r']*v['stoichiometry'][i];
-                    dG_p_var_tmp += dG_r[rxn]['dG_r_var']*v['stoichiometry'][i];
-                    # ensure bounds are correct
-                    if dG_r[rxn]['dG_r_lb']>dG_r[rxn]['dG_r_ub']:
-                        dG_p_lb_tmp += dG_r[rxn]['dG_r_ub']*v['stoichiometry'][i];
-                        dG_p_ub_tmp += dG_r[rxn]['dG_r_lb']*v['stoichiometry'][i];
-                    else:
-                        dG_p_lb_tmp += dG_r[rxn]['dG_r_lb']*v['stoichiometry'][i];
-                        dG_p_ub_tmp += dG_r[rxn]['dG_r_ub']*v['stoichiometry'][i];
-                else: print(('dG0_r not calculated for reaction ' + rxn + '!'));
+        for i,path in enumerate(pathway_matrix['pathway_ids']):
+            v = self.pathways[path];
             # copy information into dG0
-            dG0_p_dict['reactions'] = v['reactions'];
-            dG0_p_dict['stoichiometry'] = v['stoichiometry'];
-            dG0_p_dict['dG0_p'] = dG0_p_tmp;
-            dG0_p_dict['dG0_p_var'] = dG0_p_var_tmp;
-            dG0_p_dict['dG0_p_lb'] = dG0_p_lb_tmp;
-            dG0_p_dict['dG0_p_ub'] = dG0_p_ub_tmp;
-            dG0_p_dict['dG0_p_units'] = 'kJ/mol';
-            dG0_p[path] = dG0_p_dict;
+            dG0_p[path] = {'reactions':v['reactions'],
+                           'stoichiometry':v['stoichiometry'],
+                           'dG0_p':float(dG0_p_arrays['dG_p'][i]),
+                           'dG0_p_var':float(dG0_p_arrays['dG_p_var'][i]),
+                           'dG0_p_lb':float(dG0_p_arrays['dG_p_lb'][i]),
+                           'dG0_p_ub':float(dG0_p_arrays['dG_p_ub'][i]),
+                           'dG0_p_units':'kJ/mol'};
             # copy information into dG
-            dG_p_dict['reactions'] = v['reactions'];
-            dG_p_dict['stoichiometry'] = v['stoichiometry'];
-            dG_p_dict['dG_p'] = dG_p_tmp;
-            dG_p_dict['dG_p_var'] = dG_p_var_tmp;
-            dG_p_dict['dG_p_lb'] = dG_p_lb_tmp;
-            dG_p_dict['dG_p_ub'] = dG_p_ub_tmp;
-            dG_p_dict['dG_p_units'] = 'kJ/mol';
-            dG_p[path] = dG_p_dict;
+            dG_p[path] = {'reactions':v['reactions'],
+                          'stoichiometry':v['stoichiometry'],
+                          'dG_p':float(dG_p_arrays['dG_p'][i]),
+                          'dG_p_var':float(dG_p_arrays['dG_p_var'][i]),
+                          'dG_p_lb':float(dG_p_arrays['dG_p_lb'][i]),
+                          'dG_p_ub':float(dG_p_arrays['dG_p_ub'][i]),
+                          'dG_p_units':'kJ/mol'};
         # return dG0 and dG for all pathways
         self.dG0_p = dG0_p;
         self.dG_p = dG_p;
-    
+
+    def make_pathway_matrix(self, reaction_ids_I=None):
+        """make a sparse pathway x reaction stoichiometric matrix of self.pathways
+
+        Args:
+            reaction_ids_I (list): column ids (e.g., the reaction ids of a
+                thermodynamics_sweep); pathway reactions that are not
+                in the list are left out
+                (default: the reactions of all pathways, in order of appearance)
+
+        Returns:
+            dict: pathway_matrix_O: {'pathway_ids': list (row ids),
+                                     'reaction_ids': list (column ids),
+                                     'S': scipy.sparse.csr_matrix (pathways x reactions)}
+
+        NOTES:
+          the entries of each row are kept in the order of the pathway reactions
+          (and reactions that appear twice are kept twice), so that the sums
+          are the same as those of a loop over the pathway reactions
+        """
+
+        pathway_ids = list(self.pathways.keys());
+        if reaction_ids_I is None:
+            reaction_ids = [];
+            rxn2col = {};
+            for path in pathway_ids:
+                for rxn in self.pathways[path]['reactions']:
+                    if not rxn in rxn2col:
+                        rxn2col[rxn] = len(reaction_ids);
+                        reaction_ids.append(rxn);
+        else:
+            reaction_ids = list(reaction_ids_I);
+            rxn2col = {rxn:j for j,rxn in enumerate(reaction_ids)};
+        coefficients,cols,indptr = [],[],[0];
+        for path in pathway_ids:
+            v = self.pathways[path];
+            for rxn,stoich in zip(v['reactions'],v['stoichiometry']):
+                if rxn in rxn2col:
+                    coefficients.append(stoich);
+                    cols.append(rxn2col[rxn]);
+            indptr.append(len(cols));
+        S = csr_matrix((numpy.array(coefficients,dtype=float),numpy.array(cols,dtype=int),numpy.array(indptr,dtype=int)),
+            shape=(len(pathway_ids),len(reaction_ids)));
+        pathway_matrix_O = {'pathway_ids':pathway_ids,
+                            'reaction_ids':reaction_ids,
+                            'S':S};
+        return pathway_matrix_O;
+
+    def calculate_dG_p_arrays(self, dG_r_arrays_I, pathway_matrix_I):
+        """calculate the Gibbs free energy of all pathways from arrays of dG_r
+
+        Args:
+            dG_r_arrays_I (dict): {'dG_r','dG_r_var','dG_r_lb','dG_r_ub':
+                numpy.array (reactions) or (conditions x reactions)}
+                aligned to pathway_matrix_I['reaction_ids']
+                (e.g., thermodynamics_sweep.dG_r for a matrix made with
+                reaction_ids_I=thermodynamics_sweep.reaction_ids)
+            pathway_matrix_I (dict): see make_pathway_matrix
+
+        Returns:
+            dict: dG_p_arrays_O: {'dG_p','dG_p_var','dG_p_lb','dG_p_ub':
+                numpy.array (pathways) or (conditions x pathways)}
+
+        NOTES:
+          dG_p_var is the stoichiometry weighted sum of dG_r_var
+          missing values (numpy.nan) must be replaced (see _make_dG_r_arrays)
+        """
+
+        S = pathway_matrix_I['S'];
+        dG_r_lb = numpy.asarray(dG_r_arrays_I['dG_r_lb'],dtype=float);
+        dG_r_ub = numpy.asarray(dG_r_arrays_I['dG_r_ub'],dtype=float);
+        # ensure bounds are correct
+        swap = dG_r_lb>dG_r_ub;
+        data = {'dG_p':dG_r_arrays_I['dG_r'],
+                'dG_p_var':dG_r_arrays_I['dG_r_var'],
+                'dG_p_lb':numpy.where(swap,dG_r_ub,dG_r_lb),
+                'dG_p_ub':numpy.where(swap,dG_r_lb,dG_r_ub)};
+        dG_p_arrays_O = {};
+        for k,v in data.items():
+            v = numpy.asarray(v,dtype=float);
+            if v.ndim == 1:
+                dG_p_arrays_O[k] = S.dot(v);
+            else:
+                dG_p_arrays_O[k] = numpy.asarray(S.dot(v.T)).T;
+        return dG_p_arrays_O;
+
+    def _make_dG_r_arrays(self, dG_r_I, reaction_ids_I, data_I='dG_r'):
+        """make arrays of dG_r aligned to reaction_ids_I
+
+        Args:
+            dG_r_I (dict): {reaction.id: {'dG_r','dG_r_var','dG_r_lb','dG_r_ub'}}
+            reaction_ids_I (list)
+            data_I (str): name of the data in the warning
+
+        Returns:
+            dict: dG_r_arrays_O: {'dG_r','dG_r_var','dG_r_lb','dG_r_ub': numpy.array}
+                reactions that are not in dG_r_I are given 0.0
+        """
+
+        keys = ['dG_r','dG_r_var','dG_r_lb','dG_r_ub'];
+        dG_r_arrays_O = {k:numpy.zeros(len(reaction_ids_I)) for k in keys};
+        missing = [];
+        for j,rxn in enumerate(reaction_ids_I):
+            if rxn in dG_r_I:
+                for k in keys:
+                    dG_r_arrays_O[k][j] = dG_r_I[rxn][k];
+            else:
+                missing.append(rxn);
+        if missing:
+            print((data_I + ' not calculated for reactions ' + ', '.join(missing) + '!'));
+        return dG_r_arrays_O;
+
+    def import_pathways_csv(self, filename_I):
+        """import pathways from a csv file (see thermodynamics_data/pathways_irreversible.csv)
+
+        Args:
+            filename_I (str): csv file with columns pathway_id, reactions, stoichiometry
+                (reactions and stoichiometry as python lists)
+
+        Returns:
+            dict: pathways_O: {pathway_id: {'reactions': list, 'stoichiometry': list}}
+        """
+
+        pathways_O = {};
+        with open(filename_I,'r') as infile:
+            reader = csv.DictReader(infile);
+            for row in reader:
+                pathways_O[row['pathway_id']] = {'reactions':ast.literal_eval(row['reactions']),
+                                                 'stoichiometry':ast.literal_eval(row['stoichiometry'])};
+        self.pathways = pathways_O;
+        return pathways_O;
+
+    def calculate_mdf(self, cobra_model, dG0_r, measured_concentration, estimated_concentration,
+                      temperature, processes_I=1, pH=None):
+        """calculate the max-min driving force (MDF) of each pathway
+
+        The MDF is the largest B such that a set of metabolite concentrations
+        within their measured or estimated bounds gives every pathway reaction
+        a driving force (-dG_r in the direction of the pathway) of at least B.
+
+        Args:
+            cobra_model (cobra.Model)
+            dG0_r (dict): {reaction.id: {'dG_r': float,...}} (see thermodynamics_dG_r_data)
+            measured_concentration (dict)
+            estimated_concentration (dict)
+            temperature (dict)
+            processes_I (int): number of processes (default: 1; None: all cpus)
+            pH (dict): used to add the transport term (membrane potential and proton transport)
+                to the dG_r of transport reactions (see thermodynamics_dG_r_data.calculate_dG_r)
+
+        Returns:
+            dict: mdf: {pathway.id: {'mdf': float (None if the LP was not solved),
+                'mdf_units': 'kJ/mol',
+                'feasible': boolean (mdf > 0),
+                'bottlenecks': list (reactions that limit the mdf),
+                'driving_force': {reaction.id: float},
+                'ln_concentration': {metabolite.id: float},
+                'status': string}}
+
+        NOTES:
+          see calculate_mdf_conditions
+        """
+
+        self.mdf = self.calculate_mdf_conditions(cobra_model,
+            [{'dG0_r':dG0_r,'measured_concentration':measured_concentration,
+              'estimated_concentration':estimated_concentration,'temperature':temperature,
+              'pH':pH}],
+            processes_I)[0];
+
+    def calculate_mdf_conditions(self, cobra_model, conditions_I, processes_I=1):
+        """calculate the max-min driving force (MDF) of each pathway for each condition
+
+        Args:
+            cobra_model (cobra.Model)
+            conditions_I (list): [{'dG0_r': dict, 'measured_concentration': dict,
+                'estimated_concentration': dict, 'temperature': dict, 'pH': dict (optional)},...]
+                (e.g., dG0_r from thermodynamics_sweep.get_condition(i,'dG0_r'))
+            processes_I (int): number of processes (default: 1; None: all cpus)
+
+        Returns:
+            list: mdf_O: [{pathway.id: see calculate_mdf},...] for each condition
+
+        NOTES:
+          one LP is solved for each pathway and condition; the LPs are spread over the processes
+          hydrogens (accounted for by pH) and metabolites without a measured or estimated
+          concentration are fixed at a concentration of 1 M (as in thermodynamics_dG_r_data)
+          reactions without a dG0_r are left out of the pathway
+          transport reactions are left out of the pathway if no pH is given
+        """
+
+        problems = [];
+        for i,condition in enumerate(conditions_I):
+            for problem in self._make_mdf_problems(cobra_model, condition['dG0_r'],
+                    condition['measured_concentration'], condition['estimated_concentration'],
+                    condition['temperature'], condition.get('pH')):
+                problem['condition'] = i;
+                problems.append(problem);
+        if processes_I is None:
+            processes_I = multiprocessing.cpu_count();
+        processes_I = min(processes_I,len(problems));
+        if processes_I > 1:
+            chunksize = max(1,len(problems)//(processes_I*4));
+            pool = multiprocessing.Pool(processes_I);
+            try:
+                results = pool.map(_solve_mdf,problems,chunksize=chunksize);
+            finally:
+                pool.close();
+                pool.join();
+        else:
+            results = [_solve_mdf(problem) for problem in problems];
+        mdf_O = [{} for condition in conditions_I];
+        for problem,result in zip(problems,results):
+            mdf_O[problem['condition']][problem['pathway_id']] = result;
+        return mdf_O;
+
+    def _make_mdf_problems(self, cobra_model, dG0_r, measured_concentration, estimated_concentration, temperature,
+                           pH=None):
+        """make the max-min driving force LP of each pathway
+
+        variables: ln concentrations of the pathway metabolites and B
+        constraints: d*(dG0_r + dG_r_trans + RT*SUM[S*ln(c)]) + B <= 0 for each reaction,
+            where d is the direction of the reaction in the pathway
+            and dG_r_trans is the transport term of transport reactions
+            (see thermodynamics_dG_r_data._calculate_dG_r_trans_arrays)
+
+        Returns:
+            list: problems_O: [{'pathway_id','reaction_ids','metabolite_ids',
+                'A_ub','b_ub','bounds'},...]
+        """
+
+        tcc = thermodynamics_dG_r_data();
+        reaction_ids,metabolite_ids,S = make_stoichiometry(cobra_model);
+        rxn2row = {r:i for i,r in enumerate(reaction_ids)};
+        ln_conc = tcc._make_ln_concentrations(cobra_model, measured_concentration, estimated_concentration);
+        RT = tcc._make_RT(cobra_model, S, temperature);
+        reaction_arrays = tcc._make_reaction_arrays(cobra_model);
+        transport = reaction_arrays['products']['transport'].any(axis=1) | reaction_arrays['reactants']['transport'].any(axis=1);
+        if pH is None:
+            dG_r_trans = numpy.zeros(len(reaction_ids));
+        else:
+            dG_r_trans = tcc._calculate_dG_r_trans_arrays(reaction_arrays, tcc._get_hydrogens(cobra_model), pH, temperature);
+        problems_O = [];
+        for path,v in self.pathways.items():
+            # net stoichiometry of each reaction
+            stoichiometry = {};
+            for rxn,stoich in zip(v['reactions'],v['stoichiometry']):
+                stoichiometry[rxn] = stoichiometry.get(rxn,0) + stoich;
+            missing = [r for r in stoichiometry if not (r in rxn2row and r in dG0_r)];
+            if missing:
+                print(('dG0_r not calculated for reactions ' + ', '.join(missing) + ' of pathway ' + path + '!'));
+            if pH is None:
+                transport_rxns = [r for r in stoichiometry if r in rxn2row and transport[rxn2row[r]]];
+                if transport_rxns:
+                    print(('no pH given for transport reactions ' + ', '.join(transport_rxns) + ' of pathway ' + path + '!'));
+                missing.extend(transport_rxns);
+            rxns = [r for r,stoich in stoichiometry.items() if stoich != 0 and not r in missing];
+            if not rxns: continue;
+            rows = [rxn2row[r] for r in rxns];
+            S_p = S[rows];
+            cols = numpy.unique(S_p.indices);
+            cols = cols[ln_conc['included'][cols]];
+            direction = numpy.sign([stoichiometry[r] for r in rxns]);
+            A_ub = numpy.hstack([(direction*RT[rows])[:,None]*S_p[:,cols].toarray(),
+                                 numpy.ones((len(rxns),1))]);
+            b_ub = -direction*(numpy.array([dG0_r[r]['dG_r'] for r in rxns]) + dG_r_trans[rows]);
+            bounds = list(zip(ln_conc['ln_concentration_lb'][cols],ln_conc['ln_concentration_ub'][cols])) + [(None,None)];
+            problems_O.append({'pathway_id':path,
+                               'reaction_ids':rxns,
+                               'metabolite_ids':[metabolite_ids[j] for j in cols],
+                               'A_ub':A_ub,
+                               'b_ub':b_ub,
+                               'bounds':bounds});
+        return problems_O;
+
+    def find_linearPathways(self, cobra_model_I, min_reactions_I=2):
+        """find the unbranched chains of fully coupled reactions of the model
+        and use them as pathways
+
+        Two reactions are fully coupled through a metabolite that takes part
+        in only these two reactions (at steady state, a*v_a + b*v_b = 0).
+        Each connected group of coupled reactions is lumped into a pathway.
+
+        Args:
+            cobra_model_I (cobra.Model): reversible or irreversible
+                (reaction.id + '_reverse') cobra model
+            min_reactions_I (int): minimum number of reactions of a pathway
+
+        Returns:
+            dict: pathways_O: {'lumped_' + first reaction.id: {'reactions': list,
+                'stoichiometry': list}}
+                reactions are ordered along the chain and given in a direction in which
+                all reactions can carry flux (the '_reverse' reaction if it exists,
+                otherwise a negative stoichiometry if the lower bound is negative)
+
+        NOTES:
+          the coupled reactions are found by thermodynamics_utility.find_coupledReactions
+          groups without a feasible direction (given the reaction bounds) are left out
+          the pathways are cached on the model by its stoichiometry, bounds, and objective
+          (see thermodynamics_simulatedData.make_model_hash)
+        """
+
+        model_hash = (make_model_hash(cobra_model_I),min_reactions_I);
+        cached = getattr(cobra_model_I,'_linear_pathways',None);
+        if cached is not None and cached[0] == model_hash:
+            self.pathways = deepcopy(cached[1]);
+            return deepcopy(cached[1]);
+
+        def feasible(rxn_id,v):
+            rxn = cobra_model_I.reactions.get_by_id(rxn_id);
+            if v > 0:
+                return rxn.upper_bound > 0;
+            return rxn.lower_bound < 0 or (rxn_id + '_reverse' in cobra_model_I.reactions and
+                cobra_model_I.reactions.get_by_id(rxn_id + '_reverse').upper_bound > 0);
+
+        pathways_O = {};
+        for group in find_coupledReactions(cobra_model_I):
+            if len(group) < min_reactions_I: continue;
+            # orient the pathway in a feasible direction (of most reactions, if both are feasible)
+            directions = [d for d in [1,-1] if all([feasible(n,d*ratio) for n,ratio,m in group])];
+            if not directions: continue;
+            direction = max(directions,key=lambda d: len([n for n,ratio,m in group if d*ratio > 0]));
+            # start from the reaction that produces the first intermediate
+            root = cobra_model_I.reactions.get_by_id(group[0][0]);
+            if len(group) > 1 and direction*root.get_coefficient(group[1][2]) < 0:
+                group = group[::-1];
+            scale = reduce(lambda x,y: x*y//gcd(x,y),[ratio.denominator for n,ratio,m in group],1);
+            reactions = [];
+            stoichiometry = [];
+            for n,ratio,m in group:
+                v = direction*ratio*scale;
+                if v < 0 and n + '_reverse' in cobra_model_I.reactions:
+                    reactions.append(n + '_reverse');
+                    v = -v;
+                else:
+                    reactions.append(n);
+                stoichiometry.append(int(v) if v.denominator == 1 else float(v));
+            pathways_O['lumped_' + reactions[0]] = {'reactions':reactions,
+                                                    'stoichiometry':stoichiometry};
+        cobra_model_I._linear_pathways = (model_hash,pathways_O);
+        self.pathways = deepcopy(pathways_O);
+        return deepcopy(pathways_O);
+
     def init_pathways(self):
         # pathways:
         pathways_irreversible = {
@@ -8,8 +8,10 @@ from collections import Counter
 
 # Other dependencies
 import csv,json,sys
+import numpy
 
 from .thermodynamics_io import thermodynamics_io
+from .thermodynamics_utility import get_transportIndex, optimize_thermoConstraints
 
 class thermodynamics_dG_r_data(thermodynamics_io):
     """Runs thermodynamic analysis analysis on a cobra.Model object
@@ -146,6 +148,11 @@ class thermodynamics_dG_r_data(thermodynamics_io):
         else:
             self.inconsistent_reactions = {};
 
+        # index of metabolite.id: [reaction.id,...] used for incremental updates
+        self.metabolite2reactions = {};
+        # temperature of calculate_dG0_r (default temperature of calculate_displacement)
+        self.temperature = {};
+
     def export_dG0_r_json(self, filename_I):
         # save the results to json file
         with open(filename_I, 'w') as outfile:
@@ -247,13 +254,16 @@ class thermodynamics_dG_r_data(thermodynamics_io):
         self.thermodynamic_consistency_check = {};
         self.thermodynamic_consistency_check = self.import_values_json(tcc_filename_I);
 
-    def calculate_dG0_r(self, cobra_model, measured_dG_f, estimated_dG_f, temperature):
+    def calculate_dG0_r(self, cobra_model, measured_dG_f, estimated_dG_f, temperature,
+                        bounds_method_I = 'v1'):
         """calculate the standard Gibbs free energy of reaction
 
         Args:
             dG_f (adjusted from dG0_f to in vivo conditions)
             thermodynamic_consistency_check
             temperature
+            bounds_method_I (str): method used to combine the lb/ub of the dG_f
+                (see _calculate_dG0_r_arrays)
 
         Returns:
             dG0_r
@@ -267,123 +277,39 @@ class thermodynamics_dG_r_data(thermodynamics_io):
 
         y = ln(x)
         sigm2y = sigma2x/x
-    
+
         y = R*T*ln(x)
         sigma2y = R*T/x * sigma2x
         """
 
+        reaction_arrays = self._make_reaction_arrays(cobra_model);
+        dG0_r_arrays = self._calculate_dG0_r_arrays(reaction_arrays,
+            measured_dG_f, estimated_dG_f, temperature, bounds_method_I);
+        if dG0_r_arrays is None:
+            # raise error
+            return
+
         dG0_r_I = {};
-        dG_r_coverage_I = {}
-        for r in cobra_model.reactions:
-            dG0_r_I[r.id] = {'dG_r': None,
-                           'dG_r_var': None,
-                           'dG_r_lb': None,
-                           'dG_r_ub': None,
-                           'dG_r_units': None,
-                           'Keq_lb': None,
-                           'Keq_ub': None};
-            dG_r_coverage_I[r.id] = None; # will determine the coverage of thermodynamic
-        
-            nMets = 0.0; # number of metabolites in each reaction
-            nMets_measured = 0.0; # number of measured metabolites in each reaction
-            temperatures = [];
-            # calculate dG0_r for products
-            dG0_r_product = 0.0;
-            dG0_r_product_var = 0.0;
-            dG0_r_product_lb = 0.0;
-            dG0_r_product_ub = 0.0;
-            for p in r.products:
-                if p.id in list(measured_dG_f.keys()):
-                    dG0_r_product = dG0_r_product + measured_dG_f[p.id]['dG_f']*r.get_coefficient(p.id)
-                    dG0_r_product_var = dG0_r_product_var + measured_dG_f[p.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_product_lb = dG0_r_product_lb + measured_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    dG0_r_product_ub = dG0_r_product_ub + measured_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    ## calculate the lb and ub for dG implementation #2 
-                    #dG0_r_product_lb = dG0_r_product_lb + measured_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    #dG0_r_product_ub = dG0_r_product_ub + measured_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    nMets = nMets + 1.0;
-                    nMets_measured = nMets_measured + 1.0;
-                    temperatures.append(temperature[p.compartment]['temperature']);
-                elif p.id in list(estimated_dG_f.keys()):
-                    dG0_r_product = dG0_r_product + estimated_dG_f[p.id]['dG_f']*r.get_coefficient(p.id)
-                    dG0_r_product_var = dG0_r_product_var + estimated_dG_f[p.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_product_lb = dG0_r_product_lb + estimated_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    dG0_r_product_ub = dG0_r_product_ub + estimated_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    ## calculate the lb and ub for dG implementation #2 
-                    #dG0_r_product_lb = dG0_r_product_lb + estimated_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    #dG0_r_product_ub = dG0_r_product_ub + estimated_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    nMets = nMets + 1.0;
-                    temperatures.append(temperature[p.compartment]['temperature']);
-                else:
-                    # raise error
-                    return
-            # calculate dG0_r for reactants
-            dG0_r_reactant = 0.0;
-            dG0_r_reactant_var = 0.0;
-            dG0_r_reactant_lb = 0.0;
-            dG0_r_reactant_ub = 0.0;
-            for react in r.reactants:
-                if react.id in list(measured_dG_f.keys()):
-                    dG0_r_reactant = dG0_r_reactant + measured_dG_f[react.id]['dG_f']*r.get_coefficient(react.id)
-                    dG0_r_reactant_var = dG0_r_reactant_var + measured_dG_f[react.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_reactant_lb = dG0_r_reactant_lb + measured_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    dG0_r_reactant_ub = dG0_r_reactant_ub + measured_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    ## calculate the lb and ub for dG implementation #2
-                    #dG0_r_reactant_lb = dG0_r_reactant_lb + measured_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    #dG0_r_reactant_ub = dG0_r_reactant_ub + measured_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    nMets = nMets + 1.0;
-                    nMets_measured = nMets_measured + 1.0;
-                    temperatures.append(temperature[react.compartment]['temperature']);
-                elif react.id in list(estimated_dG_f.keys()):
-                    dG0_r_reactant = dG0_r_reactant + estimated_dG_f[react.id]['dG_f']*r.get_coefficient(react.id)
-                    dG0_r_reactant_var = dG0_r_reactant_var + estimated_dG_f[react.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_reactant_lb = dG0_r_reactant_lb + estimated_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    dG0_r_reactant_ub = dG0_r_reactant_ub + estimated_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    ## calculate the lb and ub for dG implementation #2
-                    #dG0_r_reactant_lb = dG0_r_reactant_lb + estimated_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    #dG0_r_reactant_ub = dG0_r_reactant_ub + estimated_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    nMets = nMets + 1.0;
-                    temperatures.append(temperature[react.compartment]['temperature']);
-                else:
-                    # raise error
-                    return
-            # calculate the dG0_r for the reaction
-            dG0_r_I[r.id]['dG_r'] = dG0_r_product + dG0_r_reactant;
-            dG0_r_I[r.id]['dG_r_var'] = dG0_r_product_var + dG0_r_reactant_var;
-            # implementation 1 to calculate the bounds
-            #dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product + dG0_r_reactant - sqrt(dG0_r_product_var + dG0_r_reactant_var);
-            #dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product + dG0_r_reactant + sqrt(dG0_r_product_var + dG0_r_reactant_var);
-            # implementation 2 to calculate the bounds
-            dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product_lb + dG0_r_reactant_lb;
-            dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product_ub + dG0_r_reactant_ub;
-            dG0_r_I[r.id]['dG_r_units'] = 'kJ/mol';
-            
-            # not the best way to calculate the Keq
-            Keq_exp_lb = -dG0_r_I[r.id]['dG_r_lb']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_lb>100: Keq_exp_lb = 100;
-            elif Keq_exp_lb<-100: Keq_exp_lb = -100;
-            dG0_r_I[r.id]['Keq_lb'] = exp(Keq_exp_lb);
-            Keq_exp_ub = -dG0_r_I[r.id]['dG_r_ub']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_ub>100: Keq_exp_ub = 100;
-            elif Keq_exp_ub<-100: Keq_exp_ub = -100;
-            dG0_r_I[r.id]['Keq_ub'] = exp(Keq_exp_ub);
-
-            # determine the thermodynamic coverage
-            if nMets == 0:  dG_r_coverage_tmp = 0;
-            else: dG_r_coverage_tmp = nMets_measured/nMets
-            dG_r_coverage_I[r.id] = dG_r_coverage_tmp;
+        dG_r_coverage_I = {};
+        for i,rxn_id in enumerate(reaction_arrays['reaction_ids']):
+            dG0_r_I[rxn_id] = {'dG_r': float(dG0_r_arrays['dG_r'][i]),
+                           'dG_r_var': float(dG0_r_arrays['dG_r_var'][i]),
+                           'dG_r_lb': float(dG0_r_arrays['dG_r_lb'][i]),
+                           'dG_r_ub': float(dG0_r_arrays['dG_r_ub'][i]),
+                           'dG_r_units': 'kJ/mol',
+                           'Keq_lb': exp(dG0_r_arrays['Keq_exp_lb'][i]),
+                           'Keq_ub': exp(dG0_r_arrays['Keq_exp_ub'][i])};
+            dG_r_coverage_I[rxn_id] = self._get_coverage(
+                dG0_r_arrays['nMets_measured'][i],dG0_r_arrays['nMets'][i]);
 
         self.dG0_r = dG0_r_I;
         self.dG_r_coverage = dG_r_coverage_I;
+        self.temperature = temperature;
 
     def calculate_dG_r(self, cobra_model, measured_concentration, estimated_concentration,
-                           pH, ionic_strength, temperature):
+                           pH, ionic_strength, temperature, bounds_method_I = 'v1'):
         """calculate the Gibbs free energy of reaction accounting for the following:
-        
+
         metabolite concentrations
         pH (proton concentration)
         temperature: accounted for in dG_f
@@ -398,1053 +324,431 @@ class thermodynamics_dG_r_data(thermodynamics_io):
             temperature
             pH
             ionic_strength
+            bounds_method_I (str): method used to combine the lb/ub of the concentrations
+                (see _calculate_dG_r_arrays)
 
         Returns:
             dG_r
             thermodynamic_consistency_check
 
         NOTES:
-          The lower and upper bounds for dG_r can be calculated in two ways:
+          The lower and upper bounds for dG_r can be calculated in three ways:
           #1 provides a more conservative estimate, but can often reverse lb/ub dG_r values
               depending on how wide the lb/ub is for reactants and products (default)
           #2 provides a less conservative estimate, but avoids reversing the lb/ub dG_r values
               even when the lb/ub for reactants and products is wide
+          #3 same as #1, but reversed lb/ub dG_r values are swapped
         """
-    
-        # initialize hydrogens:
+
+        hydrogens = self._get_hydrogens(cobra_model);
+        reaction_arrays = self._make_reaction_arrays(cobra_model);
+        dG_r_arrays = self._calculate_dG_r_arrays(reaction_arrays, hydrogens,
+            measured_concentration, estimated_concentration,
+            pH, ionic_strength, temperature, bounds_method_I);
+        if dG_r_arrays is None:
+            # raise error
+            return
+
+        dG_r_I,metabolomics_coverage_I = self._convert_dG_r_arrays(reaction_arrays,dG_r_arrays);
+        self.dG_r = dG_r_I;
+        self.metabolomics_coverage = metabolomics_coverage_I;
+        self.metabolite2reactions = self._make_metabolite2reactions(cobra_model);
+
+    def _get_hydrogens(self, cobra_model):
+        """return the compartment specific hydrogen ids of the model"""
         hydrogens = [];
         compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
         for compart in compartments:
              hydrogens.append('h_' + compart);
+        return hydrogens;
 
-        dG_r_I = {};
-        metabolomics_coverage_I = {};
-        for r in cobra_model.reactions:
-            dG_r_I[r.id] = {'dG_r': None,
-                           'dG_r_var': None,
-                           'dG_r_units': None,
-                           'dG_r_lb': None,
-                           'dG_r_ub': None,
-                           'Keq_lb': None,
-                           'Keq_ub': None
-                           #'ri_estimate': None,
-                           #'ri': None,
-                           #'Q_estimate': None,
-                           #'Q': None
-                           };
-
-            metabolomics_coverage_I[r.id] = None; # will determine the coverage of metabolomics data
-
-            nMets = 0.0; # number of metabolites in each reaction
-            nMets_measured = 0.0; # number of measured metabolites in each reaction
-
-            temperatures = [];
-
-            dG_r_ionic = 0.0; # adjustment for ionic strength (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
-
-            # adjustment for transport reactions (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
-            mets_trans = self.find_transportMets(cobra_model,r.id);
-            d_h = 0; # change in proton transfer accross the membrane
-            compartments_charge = {}; # compartments of the products {metabolite.compartment:{metabolite.id:metabolite.charge}}
-            dG_r_mem = 0.0; # change in membrane potential
-            dG_r_pH = 0.0; # adjustment for pH (Robert A. Alberty, Thermodynamics of biochemical reactions (Hoboken N.J.: Wiley-Interscience, 2003).
-            dG_r_trans = 0.0;
-
-            # calculate dG_r for products
-            dG_r_product = 0.0;
-            dG_r_product_var = 0.0;
-            dG_r_product_lb = 0.0;
-            dG_r_product_ub = 0.0;
-            for p in r.products:
-                if not(p.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-                    if p.id in list(measured_concentration.keys()):
-                        # calculate the dG_r of the reactants using measured concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        dG_r_product = dG_r_product + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_product_var = dG_r_product_var + pow(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id)),2)/measured_concentration[p.id]['concentration']*measured_concentration[p.id]['concentration_var'];
-                        #dG_r_product_var = dG_r_product_var + exp(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/log(measured_concentration[p.id]['concentration'])*log(measured_concentration[p.id]['concentration_var']));
-                    
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        dG_r_product_ub = dG_r_product_ub + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                        ## calculate the lb and ub for dG implementation #2
-                        #dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(measured_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        #dG_r_product_ub = dG_r_product_ub + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
-                        #           where c = net charge transport
-                        #                 F = Faradays constant
-                        #                 deltaPSI = electrochemical potential
-                        #                 deltaPH = pH gradient
-                        #   for transport reactions involving the movement of reactant to product
-                        #           of the form a*produc = b*react, the equation
-                        #           can be broken into two parts: 1 for product and 1 for reactant  
-                        #           each with 1/2 the contribution to the net reactions
-                        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
-                        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
-                        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if p.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        nMets_measured = nMets_measured + 1.0;
-                        temperatures.append(temperature[p.compartment]['temperature']);
-
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[p.compartment]['temperature']*A*\
-                        #                (p.charge*p.charge*r.get_coefficient(p.id)*ionic_strength[p.compartment]['ionic_strength'])/(1+B*ionic_strength[p.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH'];
-
-                    elif p.id in list(estimated_concentration.keys()):
-                        # calculate the dG_r of the reactants using estimated concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        dG_r_product = dG_r_product + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_product_var = dG_r_product_var + self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/estimated_concentration[p.id]['concentration']*\
-                        #                                        estimated_concentration[p.id]['concentration_var'];
-                        #dG_r_product_var = dG_r_product_var + exp(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/log(estimated_concentration[p.id]['concentration'])*\
-                        #                                        log(estimated_concentration[p.id]['concentration_var']));
-
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        dG_r_product_ub = dG_r_product_ub + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                        ## calculate the lb and ub for dG implementation #2
-                        #dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        #dG_r_product_ub = dG_r_product_ub + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if p.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        temperatures.append(temperature[p.compartment]['temperature']);
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[p.compartment]['temperature']*A*\
-                        #                (p.charge*p.charge*r.get_coefficient(p.id)*ionic_strength[p.compartment]['ionic_strength'])/(1+B*ionic_strength[p.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH'];
-
-                    else:
-                        # raise error
-                        return
-                else:
-                    if p.name in mets_trans: 
-                        dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-                        dG_r_pH = dG_r_pH - log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH']*r.get_coefficient(p.id)/2.0;
-
-                temperatures.append(temperature[p.compartment]['temperature']);
-            # calculate dG_r for reactants
-            dG_r_reactant = 0.0;
-            dG_r_reactant_var = 0.0;
-            dG_r_reactant_lb = 0.0;
-            dG_r_reactant_ub = 0.0;
-            for react in r.reactants:
-                if not(react.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-                    if react.id in list(measured_concentration.keys()):
-                        # calculate the dG_r of the reactants using measured concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        dG_r_reactant = dG_r_reactant + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_reactant_var = dG_r_reactant_var + self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/measured_concentration[react.id]['concentration']*measured_concentration[react.id]['concentration_var'];
-                        #dG_r_reactant_var = dG_r_reactant_var + exp(self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/log(measured_concentration[react.id]['concentration'])*log(measured_concentration[react.id]['concentration_var']));
-                    
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                        dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        ## calculate the lb and ub for dG implementation #2
-                        #dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        #dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
-                        #           where c = net charge transport
-                        #                 F = Faradays constant
-                        #                 deltaPSI = electrochemical potential
-                        #                 deltaPH = pH gradient
-                        #   for transport reactions involving the movement of reactant to product
-                        #           of the form a*produc = b*react, the equation
-                        #           can be broken into two parts: 1 for product and 1 for reactant  
-                        #           each with 1/2 the contribution to the net reactions
-                        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
-                        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
-                        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
-                        if react.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        nMets_measured = nMets_measured + 1.0;
-                        temperatures.append(temperature[react.compartment]['temperature']);
-
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[react.compartment]['temperature']*A*\
-                        #                (react.charge*react.charge*r.get_coefficient(react.id)*ionic_strength[react.compartment]['ionic_strength'])/(1+B*ionic_strength[react.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[react.compartment]['temperature']*react.charge*pH[react.compartment]['pH']*r.get_coefficient(react.id);
-
-                    elif react.id in list(estimated_concentration.keys()):
-                        # calculate the dG_r of the reactants using estimated concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        dG_r_reactant = dG_r_reactant + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_reactant_var = dG_r_reactant_var + self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/estimated_concentration[react.id]['concentration']*\
-                        #                                        estimated_concentration[react.id]['concentration_var'];
-                        #dG_r_reactant_var = dG_r_reactant_var + exp(self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/log(estimated_concentration[react.id]['concentration'])*\
-                        #                                        log(estimated_concentration[react.id]['concentration_var']));
-                    
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                        dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        ## calculate the lb and ub for dG implementation #2
-                        #dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        #dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if react.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        temperatures.append(temperature[react.compartment]['temperature']);
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[react.compartment]['temperature']*A*\
-                        #                (react.charge*react.charge*r.get_coefficient(react.id)*ionic_strength[react.compartment]['ionic_strength'])/(1+B*ionic_strength[react.compartment]['ionic_strength']);
-                    else:
-                        # raise error
-                        return
-                else: 
-                    if react.name in mets_trans: 
-                        dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-                        dG_r_pH = dG_r_pH + log(10)*self.R*temperature[react.compartment]['temperature']*pH[react.compartment]['pH']*r.get_coefficient(react.id)/2.0;
-                temperatures.append(temperature[react.compartment]['temperature']);
-
-            # adjustment for transport reactions:
-            dG_r_trans = dG_r_mem + dG_r_pH;
-
-            # calculate the dG_r for the reaction
-            dG_r_I[r.id]['dG_r'] = self.dG0_r[r.id]['dG_r'] + dG_r_product + dG_r_reactant + dG_r_trans;
-            dG_r_I[r.id]['dG_r_var'] = self.dG0_r[r.id]['dG_r_var'] + dG_r_product_var + dG_r_reactant_var;
-            dG_r_I[r.id]['dG_r_lb'] = self.dG0_r[r.id]['dG_r_lb'] + dG_r_product_lb + dG_r_reactant_lb + dG_r_trans;
-            dG_r_I[r.id]['dG_r_ub'] = self.dG0_r[r.id]['dG_r_ub'] + dG_r_product_ub + dG_r_reactant_ub + dG_r_trans;
-            dG_r_I[r.id]['dG_r_units'] = 'kJ/mol';
-
-            # not the best way to calculate the Keq
-            Keq_exp_lb = -dG_r_I[r.id]['dG_r_lb']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_lb>100: Keq_exp_lb = 100;
-            elif Keq_exp_lb<-100: Keq_exp_lb = -100;
-            dG_r_I[r.id]['Keq_lb'] = exp(Keq_exp_lb);
-            Keq_exp_ub = -dG_r_I[r.id]['dG_r_ub']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_ub>100: Keq_exp_ub = 100;
-            elif Keq_exp_ub<-100: Keq_exp_ub = -100;
-            dG_r_I[r.id]['Keq_ub'] = exp(Keq_exp_ub);
-
-            # determine the thermodynamic coverage
-            if nMets == 0:  conc_coverage = 0;
-            else: conc_coverage = nMets_measured/nMets
-            metabolomics_coverage_I[r.id] = conc_coverage;
+    def _get_coverage(self, nMets_measured, nMets):
+        """return the fraction of measured metabolites"""
+        if nMets == 0:  return 0;
+        else: return float(nMets_measured/nMets);
 
-        self.dG_r = dG_r_I;
-        self.metabolomics_coverage = metabolomics_coverage_I;
+    def _check_bounds_method(self, bounds_method_I):
+        """check the lb/ub combination method"""
+        if not bounds_method_I in ['v1','v2','v3']:
+            raise Exception('bounds_method_I must be one of "v1", "v2", or "v3"')
 
-    def _calculate_dG0_r_v2(self, cobra_model, measured_dG_f, estimated_dG_f, temperature):
-        """calculate the standard Gibbs free energy of reaction"""
+    def _make_reaction_arrays(self, cobra_model, reactions=None):
+        """make padded arrays of the products and reactants of each reaction
 
-        """
-        a quick primer on the propogation of uncertainty:
-        Thanks to Glen Tesler
-        http://books.google.com/books?id=csTsQr-v0d0C&pg=PA56
+        Args:
+            cobra_model (cobra.Model)
+            reactions (list(cobra.Reaction)): subset of reactions (default: all reactions)
 
-        y = ln(x)
-        sigm2y = sigma2x/x
-    
-        y = R*T*ln(x)
-        sigma2y = R*T/x * sigma2x
+        Returns:
+            dict: reaction_arrays_O: {'reaction_ids': list,
+                                      'metabolites': list(cobra.Metabolite),
+                                      'products': {'index': numpy.array (reactions x max products),
+                                                   'coefficient': numpy.array,
+                                                   'transport': numpy.array (boolean)},
+                                      'reactants': {...}}
+
+        NOTES:
+          products and reactants are kept in the same order as reaction.products
+          and reaction.reactants so that sums are accumulated in the same order
+          padding entries have an index of len(metabolites) and a coefficient of 0.0
         """
 
-        dG0_r_I = {};
-        dG_r_coverage_I = {}
-        for r in cobra_model.reactions:
-            dG0_r_I[r.id] = {'dG_r': None,
-                           'dG_r_var': None,
-                           'dG_r_lb': None,
-                           'dG_r_ub': None,
-                           'dG_r_units': None,
-                           'Keq_lb': None,
-                           'Keq_ub': None};
-            dG_r_coverage_I[r.id] = None; # will determine the coverage of thermodynamic
-        
-            nMets = 0.0; # number of metabolites in each reaction
-            nMets_measured = 0.0; # number of measured metabolites in each reaction
-            temperatures = [];
-            # calculate dG0_r for products
-            dG0_r_product = 0.0;
-            dG0_r_product_var = 0.0;
-            dG0_r_product_lb = 0.0;
-            dG0_r_product_ub = 0.0;
-            for p in r.products:
-                if p.id in list(measured_dG_f.keys()):
-                    dG0_r_product = dG0_r_product + measured_dG_f[p.id]['dG_f']*r.get_coefficient(p.id)
-                    dG0_r_product_var = dG0_r_product_var + measured_dG_f[p.id]['dG_f_var']
-                    ## calculate the lb and ub for dG implementation #1
-                    #dG0_r_product_lb = dG0_r_product_lb + measured_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    #dG0_r_product_ub = dG0_r_product_ub + measured_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    # calculate the lb and ub for dG implementation #2 
-                    dG0_r_product_lb = dG0_r_product_lb + measured_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    dG0_r_product_ub = dG0_r_product_ub + measured_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    nMets = nMets + 1.0;
-                    nMets_measured = nMets_measured + 1.0;
-                    temperatures.append(temperature[p.compartment]['temperature']);
-                elif p.id in list(estimated_dG_f.keys()):
-                    dG0_r_product = dG0_r_product + estimated_dG_f[p.id]['dG_f']*r.get_coefficient(p.id)
-                    #dG0_r_product_var = dG0_r_product_var + estimated_dG_f[p.id]['dG_f_var']
-                    ## calculate the lb and ub for dG implementation #1
-                    #dG0_r_product_lb = dG0_r_product_lb + estimated_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    #dG0_r_product_ub = dG0_r_product_ub + estimated_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    # calculate the lb and ub for dG implementation #2 
-                    dG0_r_product_lb = dG0_r_product_lb + estimated_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    dG0_r_product_ub = dG0_r_product_ub + estimated_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    nMets = nMets + 1.0;
-                    temperatures.append(temperature[p.compartment]['temperature']);
-                else:
-                    # raise error
-                    return
-            # calculate dG0_r for reactants
-            dG0_r_reactant = 0.0;
-            dG0_r_reactant_var = 0.0;
-            dG0_r_reactant_lb = 0.0;
-            dG0_r_reactant_ub = 0.0;
-            for react in r.reactants:
-                if react.id in list(measured_dG_f.keys()):
-                    dG0_r_reactant = dG0_r_reactant + measured_dG_f[react.id]['dG_f']*r.get_coefficient(react.id)
-                    dG0_r_reactant_var = dG0_r_reactant_var + measured_dG_f[react.id]['dG_f_var']
-                    ## calculate the lb and ub for dG implementation #1
-                    #dG0_r_reactant_lb = dG0_r_reactant_lb + measured_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    #dG0_r_reactant_ub = dG0_r_reactant_ub + measured_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    # calculate the lb and ub for dG implementation #2
-                    dG0_r_reactant_lb = dG0_r_reactant_lb + measured_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    dG0_r_reactant_ub = dG0_r_reactant_ub + measured_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    nMets = nMets + 1.0;
-                    nMets_measured = nMets_measured + 1.0;
-                    temperatures.append(temperature[react.compartment]['temperature']);
-                elif react.id in list(estimated_dG_f.keys()):
-                    dG0_r_reactant = dG0_r_reactant + estimated_dG_f[react.id]['dG_f']*r.get_coefficient(react.id)
-                    dG0_r_reactant_var = dG0_r_reactant_var + estimated_dG_f[react.id]['dG_f_var']
-                    ## calculate the lb and ub for dG implementation #1
-                    #dG0_r_reactant_lb = dG0_r_reactant_lb + estimated_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    #dG0_r_reactant_ub = dG0_r_reactant_ub + estimated_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    # calculate the lb and ub for dG implementation #2
-                    dG0_r_reactant_lb = dG0_r_reactant_lb + estimated_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    dG0_r_reactant_ub = dG0_r_reactant_ub + estimated_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    nMets = nMets + 1.0;
-                    temperatures.append(temperature[react.compartment]['temperature']);
-                else:
-                    # raise error
-                    return
-            # calculate the dG0_r for the reaction
-            dG0_r_I[r.id]['dG_r'] = dG0_r_product + dG0_r_reactant;
-            dG0_r_I[r.id]['dG_r_var'] = dG0_r_product_var + dG0_r_reactant_var;
-            # implementation 1 to calculate the bounds
-            #dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product + dG0_r_reactant - sqrt(dG0_r_product_var + dG0_r_reactant_var);
-            #dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product + dG0_r_reactant + sqrt(dG0_r_product_var + dG0_r_reactant_var);
-            # implementation 2 to calculate the bounds
-            dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product_lb + dG0_r_reactant_lb;
-            dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product_ub + dG0_r_reactant_ub;
-            dG0_r_I[r.id]['dG_r_units'] = 'kJ/mol';
-
-            # not the best way to calculate the Keq
-            Keq_exp_lb = -dG0_r_I[r.id]['dG_r_lb']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_lb>100: Keq_exp_lb = 100;
-            elif Keq_exp_lb<-100: Keq_exp_lb = -100;
-            dG0_r_I[r.id]['Keq_lb'] = exp(Keq_exp_lb);
-            Keq_exp_ub = -dG0_r_I[r.id]['dG_r_ub']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_ub>100: Keq_exp_ub = 100;
-            elif Keq_exp_ub<-100: Keq_exp_ub = -100;
-            dG0_r_I[r.id]['Keq_ub'] = exp(Keq_exp_ub);
-
-            # determine the thermodynamic coverage
-            if nMets == 0:  dG_r_coverage_tmp = 0;
-            else: dG_r_coverage_tmp = nMets_measured/nMets
-            dG_r_coverage_I[r.id] = dG_r_coverage_tmp;
+        if reactions is None: reactions = cobra_model.reactions;
+        transportMets = get_transportIndex(cobra_model).transportMets;
+        reaction_ids = [];
+        metabolites = [];
+        met2index = {};
+        products = [];
+        reactants = [];
+        for r in reactions:
+            reaction_ids.append(r.id);
+            # transport metabolites (same name, different compartment)
+            mets_trans = set(transportMets.get(r.id,[]));
+            for mets,rows in [(r.products,products),(r.reactants,reactants)]:
+                row = [];
+                for m in mets:
+                    if not m.id in met2index:
+                        met2index[m.id] = len(metabolites);
+                        metabolites.append(m);
+                    row.append((met2index[m.id],r.get_coefficient(m.id),m.name in mets_trans));
+                rows.append(row);
+
+        reaction_arrays_O = {'reaction_ids':reaction_ids,
+                             'metabolites':metabolites};
+        n_mets = len(metabolites);
+        for key,rows in [('products',products),('reactants',reactants)]:
+            width = max([len(row) for row in rows] + [0]);
+            index = numpy.full((len(rows),width),n_mets,dtype=int);
+            coefficient = numpy.zeros((len(rows),width));
+            transport = numpy.zeros((len(rows),width),dtype=bool);
+            for i,row in enumerate(rows):
+                for k,(j,c,t) in enumerate(row):
+                    index[i,k] = j;
+                    coefficient[i,k] = c;
+                    transport[i,k] = t;
+            reaction_arrays_O[key] = {'index':index,
+                                      'coefficient':coefficient,
+                                      'transport':transport};
+        return reaction_arrays_O;
+
+    def _sum_columns(self, terms, initial = None):
+        """sum the columns of a 2D array in column order
+        (i.e., in the same order as a per-reaction loop)"""
+        if initial is None:
+            total = numpy.zeros(terms.shape[0]);
+        else:
+            total = numpy.array(initial,dtype=float);
+        for k in range(terms.shape[1]):
+            total = total + terms[:,k];
+        return total;
 
-        self.dG0_r = dG0_r_I;
-        self.dG_r_coverage = dG_r_coverage_I;
+    def _calculate_Keq_exp(self, dG_r, T_sum, nT):
+        """calculate the clamped exponent of Keq from the average temperature"""
+        with numpy.errstate(divide='ignore',invalid='ignore'):
+            Keq_exp = -dG_r/(T_sum/nT*self.R);
+        return numpy.clip(Keq_exp,-100,100);
 
-    def _calculate_dG_r_v2(self, cobra_model, measured_concentration, estimated_concentration,
-                           pH, ionic_strength, temperature):
-        """calculate the Gibbs free energy of reaction accounting for the following:
-        metabolite concentrations
-        pH (proton concentration)
-        temperature: accounted for in dG_f
-        change in ionic_strength: accounted for in dG_f
-        transport processes (membrane potential and  proton exchange)"""
-
-        # NOTES:
-        #   The lower and upper bounds for dG_r can be calculated in two ways:
-        #   #1 provides a more conservative estimate, but can often reverse lb/ub dG_r values
-        #       depending on how wide the lb/ub is for reactants and products (default)
-        #   #2 provides a less conservative estimate, but avoids reversing the lb/ub dG_r values
-        #       even when the lb/ub for reactants and products is wide
-    
-        # initialize hydrogens:
-        hydrogens = [];
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        for compart in compartments:
-             hydrogens.append('h_' + compart);
+    def _calculate_dG0_r_arrays(self, reaction_arrays, measured_dG_f, estimated_dG_f, temperature,
+                                bounds_method_I = 'v1'):
+        """calculate the standard Gibbs free energy of reaction for all reactions at once
 
-        dG_r_I = {};
-        metabolomics_coverage_I = {};
-        for r in cobra_model.reactions:
-            dG_r_I[r.id] = {'dG_r': None,
-                           'dG_r_var': None,
-                           'dG_r_units': None,
-                           'dG_r_lb': None,
-                           'dG_r_ub': None,
-                           'Keq_lb': None,
-                           'Keq_ub': None
-                           #'ri_estimate': None,
-                           #'ri': None,
-                           #'Q_estimate': None,
-                           #'Q': None
-                           };
-
-            metabolomics_coverage_I[r.id] = None; # will determine the coverage of metabolomics data
-
-            nMets = 0.0; # number of metabolites in each reaction
-            nMets_measured = 0.0; # number of measured metabolites in each reaction
-
-            temperatures = [];
-
-            dG_r_ionic = 0.0; # adjustment for ionic strength (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
-
-            # adjustment for transport reactions (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
-            mets_trans = self.find_transportMets(cobra_model,r.id);
-            d_h = 0; # change in proton transfer accross the membrane
-            compartments_charge = {}; # compartments of the products {metabolite.compartment:{metabolite.id:metabolite.charge}}
-            dG_r_mem = 0.0; # change in membrane potential
-            dG_r_pH = 0.0; # adjustment for pH (Robert A. Alberty, Thermodynamics of biochemical reactions (Hoboken N.J.: Wiley-Interscience, 2003).
-            dG_r_trans = 0.0;
-
-            # calculate dG_r for products
-            dG_r_product = 0.0;
-            dG_r_product_var = 0.0;
-            dG_r_product_lb = 0.0;
-            dG_r_product_ub = 0.0;
-            for p in r.products:
-                if not(p.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-                    if p.id in list(measured_concentration.keys()):
-                        # calculate the dG_r of the reactants using measured concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_product = dG_r_product + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(measured_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_product_var = dG_r_product_var + pow(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id)),2)/measured_concentration[p.id]['concentration']*measured_concentration[p.id]['concentration_var'];
-                        #dG_r_product_var = dG_r_product_var + exp(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/log(measured_concentration[p.id]['concentration'])*log(measured_concentration[p.id]['concentration_var']));
-                    
-                        ## calculate the lb and ub for dG implementation #1
-                        #dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(measured_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        #dG_r_product_ub = dG_r_product_ub + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                        # calculate the lb and ub for dG implementation #2
-                        dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        dG_r_product_ub = dG_r_product_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
-                        #           where c = net charge transport
-                        #                 F = Faradays constant
-                        #                 deltaPSI = electrochemical potential
-                        #                 deltaPH = pH gradient
-                        #   for transport reactions involving the movement of reactant to product
-                        #           of the form a*produc = b*react, the equation
-                        #           can be broken into two parts: 1 for product and 1 for reactant  
-                        #           each with 1/2 the contribution to the net reactions
-                        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
-                        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
-                        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if p.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        nMets_measured = nMets_measured + 1.0;
-                        temperatures.append(temperature[p.compartment]['temperature']);
-
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[p.compartment]['temperature']*A*\
-                        #                (p.charge*p.charge*r.get_coefficient(p.id)*ionic_strength[p.compartment]['ionic_strength'])/(1+B*ionic_strength[p.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH'];
-
-                    elif p.id in list(estimated_concentration.keys()):
-                        # calculate the dG_r of the reactants using estimated concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_product = dG_r_product + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_product_var = dG_r_product_var + self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/estimated_concentration[p.id]['concentration']*\
-                        #                                        estimated_concentration[p.id]['concentration_var'];
-                        #dG_r_product_var = dG_r_product_var + exp(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/log(estimated_concentration[p.id]['concentration'])*\
-                        #                                        log(estimated_concentration[p.id]['concentration_var']));
-
-                        ## calculate the lb and ub for dG implementation #1
-                        #dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        #dG_r_product_ub = dG_r_product_ub + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                        # calculate the lb and ub for dG implementation #2
-                        dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        dG_r_product_ub = dG_r_product_ub + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if p.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        temperatures.append(temperature[p.compartment]['temperature']);
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[p.compartment]['temperature']*A*\
-                        #                (p.charge*p.charge*r.get_coefficient(p.id)*ionic_strength[p.compartment]['ionic_strength'])/(1+B*ionic_strength[p.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH'];
-
-                    else:
-                        # raise error
-                        return
-                else:
-                    if p.name in mets_trans: 
-                        dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-                        dG_r_pH = dG_r_pH - log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH']*r.get_coefficient(p.id)/2.0;
-
-                temperatures.append(temperature[p.compartment]['temperature']);
-            # calculate dG_r for reactants
-            dG_r_reactant = 0.0;
-            dG_r_reactant_var = 0.0;
-            dG_r_reactant_lb = 0.0;
-            dG_r_reactant_ub = 0.0;
-            for react in r.reactants:
-                if not(react.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-                    if react.id in list(measured_concentration.keys()):
-                        # calculate the dG_r of the reactants using measured concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_reactant = dG_r_reactant + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_reactant_var = dG_r_reactant_var + self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/measured_concentration[react.id]['concentration']*measured_concentration[react.id]['concentration_var'];
-                        #dG_r_reactant_var = dG_r_reactant_var + exp(self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/log(measured_concentration[react.id]['concentration'])*log(measured_concentration[react.id]['concentration_var']));
-                    
-                        ## calculate the lb and ub for dG implementation #1
-                        #dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                        #dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        # calculate the lb and ub for dG implementation #2
-                        dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
-                        #           where c = net charge transport
-                        #                 F = Faradays constant
-                        #                 deltaPSI = electrochemical potential
-                        #                 deltaPH = pH gradient
-                        #   for transport reactions involving the movement of reactant to product
-                        #           of the form a*produc = b*react, the equation
-                        #           can be broken into two parts: 1 for product and 1 for reactant  
-                        #           each with 1/2 the contribution to the net reactions
-                        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
-                        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
-                        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
-                        if react.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        nMets_measured = nMets_measured + 1.0;
-                        temperatures.append(temperature[react.compartment]['temperature']);
-
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[react.compartment]['temperature']*A*\
-                        #                (react.charge*react.charge*r.get_coefficient(react.id)*ionic_strength[react.compartment]['ionic_strength'])/(1+B*ionic_strength[react.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[react.compartment]['temperature']*react.charge*pH[react.compartment]['pH']*r.get_coefficient(react.id);
-
-                    elif react.id in list(estimated_concentration.keys()):
-                        # calculate the dG_r of the reactants using estimated concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_reactant = dG_r_reactant + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_reactant_var = dG_r_reactant_var + self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/estimated_concentration[react.id]['concentration']*\
-                        #                                        estimated_concentration[react.id]['concentration_var'];
-                        #dG_r_reactant_var = dG_r_reactant_var + exp(self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/log(estimated_concentration[react.id]['concentration'])*\
-                        #                                        log(estimated_concentration[react.id]['concentration_var']));
-                    
-                        ## calculate the lb and ub for dG implementation #1
-                        #dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                        #dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        # calculate the lb and ub for dG implementation #2
-                        dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                        dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if react.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        temperatures.append(temperature[react.compartment]['temperature']);
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[react.compartment]['temperature']*A*\
-                        #                (react.charge*react.charge*r.get_coefficient(react.id)*ionic_strength[react.compartment]['ionic_strength'])/(1+B*ionic_strength[react.compartment]['ionic_strength']);
-                    else:
-                        # raise error
-                        return
-                else: 
-                    if react.name in mets_trans: 
-                        dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-                        dG_r_pH = dG_r_pH + log(10)*self.R*temperature[react.compartment]['temperature']*pH[react.compartment]['pH']*r.get_coefficient(react.id)/2.0;
-                temperatures.append(temperature[react.compartment]['temperature']);
-
-            # adjustment for transport reactions:
-            dG_r_trans = dG_r_mem + dG_r_pH;
-
-            # calculate the dG_r for the reaction
-            dG_r_I[r.id]['dG_r'] = self.dG0_r[r.id]['dG_r'] + dG_r_product + dG_r_reactant + dG_r_trans;
-            dG_r_I[r.id]['dG_r_var'] = self.dG0_r[r.id]['dG_r_var'] + dG_r_product_var + dG_r_reactant_var;
-            dG_r_I[r.id]['dG_r_lb'] = self.dG0_r[r.id]['dG_r_lb'] + dG_r_product_lb + dG_r_reactant_lb + dG_r_trans;
-            dG_r_I[r.id]['dG_r_ub'] = self.dG0_r[r.id]['dG_r_ub'] + dG_r_product_ub + dG_r_reactant_ub + dG_r_trans;
-            dG_r_I[r.id]['dG_r_units'] = 'kJ/mol';
-            
-            # not the best way to calculate the Keq
-            Keq_exp_lb = -dG_r_I[r.id]['dG_r_lb']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_lb>100: Keq_exp_lb = 100;
-            elif Keq_exp_lb<-100: Keq_exp_lb = -100;
-            dG_r_I[r.id]['Keq_lb'] = exp(Keq_exp_lb);
-            Keq_exp_ub = -dG_r_I[r.id]['dG_r_ub']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_ub>100: Keq_exp_ub = 100;
-            elif Keq_exp_ub<-100: Keq_exp_ub = -100;
-            dG_r_I[r.id]['Keq_ub'] = exp(Keq_exp_ub);
-
-            # determine the thermodynamic coverage
-            if nMets == 0:  conc_coverage = 0;
-            else: conc_coverage = nMets_measured/nMets
-            metabolomics_coverage_I[r.id] = conc_coverage;
+        Args:
+            reaction_arrays (dict): see _make_reaction_arrays
+            measured_dG_f (dict)
+            estimated_dG_f (dict)
+            temperature (dict)
+            bounds_method_I (str): method used to combine the lb/ub of the dG_f
+                v1: products and reactants use dG_f_lb for dG_r_lb and dG_f_ub for dG_r_ub (default)
+                v2: reactants use dG_f_ub for dG_r_lb and dG_f_lb for dG_r_ub
+                v3: same as v1, but dG_r_lb and dG_r_ub are swapped if dG_r_lb > dG_r_ub
 
-        self.dG_r = dG_r_I;
-        self.metabolomics_coverage = metabolomics_coverage_I;
+        Returns:
+            dict: dG0_r_O: {'dG_r','dG_r_var','dG_r_lb','dG_r_ub','Keq_exp_lb','Keq_exp_ub',
+                            'nMets','nMets_measured'} of numpy.arrays
+            (None if a metabolite has neither a measured nor an estimated dG_f)
+        """
 
-    def _calculate_dG0_r_v3(self, cobra_model, measured_dG_f, estimated_dG_f, temperature):
-        """calculate the standard Gibbs free energy of reaction"""
+        self._check_bounds_method(bounds_method_I);
+
+        # metabolite values (padded with an additional 0.0 entry)
+        metabolites = reaction_arrays['metabolites'];
+        n = len(metabolites) + 1;
+        dG_f,dG_f_var,dG_f_lb,dG_f_ub,T = numpy.zeros(n),numpy.zeros(n),numpy.zeros(n),numpy.zeros(n),numpy.zeros(n);
+        measured,found = numpy.zeros(n,dtype=bool),numpy.zeros(n,dtype=bool);
+        for j,m in enumerate(metabolites):
+            if m.id in measured_dG_f:
+                dG_f_tmp = measured_dG_f[m.id];
+                measured[j] = True;
+            elif m.id in estimated_dG_f:
+                dG_f_tmp = estimated_dG_f[m.id];
+            else:
+                continue;
+            found[j] = True;
+            dG_f[j] = dG_f_tmp['dG_f'];
+            dG_f_var[j] = dG_f_tmp['dG_f_var'];
+            dG_f_lb[j] = dG_f_tmp['dG_f_lb'];
+            dG_f_ub[j] = dG_f_tmp['dG_f_ub'];
+            T[j] = temperature[m.compartment]['temperature'];
+        found[-1] = True;
+
+        prod,react = reaction_arrays['products'],reaction_arrays['reactants'];
+        if not found[prod['index']].all() or not found[react['index']].all():
+            return None;
+
+        # calculate dG0_r for products and reactants
+        dG0_r_product = self._sum_columns(dG_f[prod['index']]*prod['coefficient']);
+        dG0_r_product_var = self._sum_columns(dG_f_var[prod['index']]);
+        dG0_r_product_lb = self._sum_columns(dG_f_lb[prod['index']]*prod['coefficient']);
+        dG0_r_product_ub = self._sum_columns(dG_f_ub[prod['index']]*prod['coefficient']);
+        dG0_r_reactant = self._sum_columns(dG_f[react['index']]*react['coefficient']);
+        dG0_r_reactant_var = self._sum_columns(dG_f_var[react['index']]);
+        if bounds_method_I == 'v2':
+            dG0_r_reactant_lb = self._sum_columns(dG_f_ub[react['index']]*react['coefficient']);
+            dG0_r_reactant_ub = self._sum_columns(dG_f_lb[react['index']]*react['coefficient']);
+        else:
+            dG0_r_reactant_lb = self._sum_columns(dG_f_lb[react['index']]*react['coefficient']);
+            dG0_r_reactant_ub = self._sum_columns(dG_f_ub[react['index']]*react['coefficient']);
+
+        # calculate the dG0_r for the reaction
+        dG0_r_O = {};
+        dG0_r_O['dG_r'] = dG0_r_product + dG0_r_reactant;
+        dG0_r_O['dG_r_var'] = dG0_r_product_var + dG0_r_reactant_var;
+        dG0_r_O['dG_r_lb'] = dG0_r_product_lb + dG0_r_reactant_lb;
+        dG0_r_O['dG_r_ub'] = dG0_r_product_ub + dG0_r_reactant_ub;
+        if bounds_method_I == 'v3':
+            swap = dG0_r_O['dG_r_lb']>dG0_r_O['dG_r_ub'];
+            dG0_r_O['dG_r_lb'],dG0_r_O['dG_r_ub'] = numpy.where(swap,dG0_r_O['dG_r_ub'],dG0_r_O['dG_r_lb']),\
+                numpy.where(swap,dG0_r_O['dG_r_lb'],dG0_r_O['dG_r_ub']);
+
+        # not the best way to calculate the Keq
+        T_sum = self._sum_columns(T[react['index']],self._sum_columns(T[prod['index']]));
+        nMets = (prod['index']<n-1).sum(axis=1) + (react['index']<n-1).sum(axis=1);
+        dG0_r_O['Keq_exp_lb'] = self._calculate_Keq_exp(dG0_r_O['dG_r_lb'],T_sum,nMets);
+        dG0_r_O['Keq_exp_ub'] = self._calculate_Keq_exp(dG0_r_O['dG_r_ub'],T_sum,nMets);
+
+        # determine the thermodynamic coverage
+        dG0_r_O['nMets'] = nMets.astype(float);
+        dG0_r_O['nMets_measured'] = (measured[prod['index']].sum(axis=1) + measured[react['index']].sum(axis=1)).astype(float);
+        return dG0_r_O;
+
+    def _calculate_dG_r_arrays(self, reaction_arrays, hydrogens, measured_concentration, estimated_concentration,
+                           pH, ionic_strength, temperature, bounds_method_I = 'v1', dG0_r_arrays = None):
+        """calculate the Gibbs free energy of reaction for all reactions at once
+
+        Args:
+            reaction_arrays (dict): see _make_reaction_arrays
+            hydrogens (list): compartment specific hydrogen ids
+            measured_concentration (dict)
+            estimated_concentration (dict)
+            pH (dict)
+            ionic_strength (dict)
+            temperature (dict)
+            bounds_method_I (str): method used to combine the lb/ub of the concentrations
+                v1: products and reactants use concentration_lb for dG_r_lb and concentration_ub for dG_r_ub (default)
+                v2: reactants use concentration_ub for dG_r_lb and concentration_lb for dG_r_ub
+                v3: same as v1, but dG_r_lb and dG_r_ub are swapped if dG_r_lb > dG_r_ub
+            dG0_r_arrays (dict): output of _calculate_dG0_r_arrays (default: taken from self.dG0_r)
 
+        Returns:
+            dict: dG_r_O: {'dG_r','dG_r_var','dG_r_lb','dG_r_ub','Keq_exp_lb','Keq_exp_ub',
+                           'nMets','nMets_measured'} of numpy.arrays
+            (None if a metabolite has neither a measured nor an estimated concentration)
         """
-        a quick primer on the propogation of uncertainty:
-        Thanks to Glen Tesler
-        http://books.google.com/books?id=csTsQr-v0d0C&pg=PA56
 
-        y = ln(x)
-        sigm2y = sigma2x/x
-    
-        y = R*T*ln(x)
-        sigma2y = R*T/x * sigma2x
+        self._check_bounds_method(bounds_method_I);
+        hydrogens = set(hydrogens);
+
+        # metabolite values (padded with an additional 0.0 entry)
+        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
+        metabolites = reaction_arrays['metabolites'];
+        n = len(metabolites) + 1;
+        ln_conc,ln_conc_lb,ln_conc_ub,T = numpy.zeros(n),numpy.zeros(n),numpy.zeros(n),numpy.zeros(n);
+        measured,found,is_h = numpy.zeros(n,dtype=bool),numpy.zeros(n,dtype=bool),numpy.zeros(n,dtype=bool);
+        for j,m in enumerate(metabolites):
+            T[j] = temperature[m.compartment]['temperature'];
+            if m.id in hydrogens:
+                # exclude hydrogen because it has already been accounted for when adjusting for the pH
+                is_h[j] = True;
+                found[j] = True;
+                continue;
+            if m.id in measured_concentration:
+                conc_tmp = measured_concentration[m.id];
+                measured[j] = True;
+            elif m.id in estimated_concentration:
+                conc_tmp = estimated_concentration[m.id];
+            else:
+                continue;
+            found[j] = True;
+            ln_conc[j] = log(conc_tmp['concentration']);
+            ln_conc_lb[j] = log(conc_tmp['concentration_lb']);
+            ln_conc_ub[j] = log(conc_tmp['concentration_ub']);
+        found[-1] = True;
+        RT = self.R*T;
+
+        prod,react = reaction_arrays['products'],reaction_arrays['reactants'];
+        if not found[prod['index']].all() or not found[react['index']].all():
+            return None;
+
+        def _terms(arrays, values):
+            return RT[arrays['index']]*values[arrays['index']]*arrays['coefficient'];
+
+        # calculate dG_r for products and reactants
+        dG_r_product = self._sum_columns(_terms(prod,ln_conc));
+        dG_r_product_lb = self._sum_columns(_terms(prod,ln_conc_lb));
+        dG_r_product_ub = self._sum_columns(_terms(prod,ln_conc_ub));
+        dG_r_reactant = self._sum_columns(_terms(react,ln_conc));
+        if bounds_method_I == 'v2':
+            dG_r_reactant_lb = self._sum_columns(_terms(react,ln_conc_ub));
+            dG_r_reactant_ub = self._sum_columns(_terms(react,ln_conc_lb));
+        else:
+            dG_r_reactant_lb = self._sum_columns(_terms(react,ln_conc_lb));
+            dG_r_reactant_ub = self._sum_columns(_terms(react,ln_conc_ub));
+        # the variance contributed by the uncertainty in the concentrations is not calculated
+        dG_r_product_var = 0.0;
+        dG_r_reactant_var = 0.0;
+
+        # adjustment for transport reactions:
+        dG_r_trans = self._calculate_dG_r_trans_arrays(reaction_arrays, hydrogens, pH, temperature);
+
+        # calculate the dG_r for the reaction
+        dG0_r = {};
+        for k in ['dG_r','dG_r_var','dG_r_lb','dG_r_ub']:
+            if dG0_r_arrays is not None:
+                dG0_r[k] = dG0_r_arrays[k];
+            else:
+                dG0_r[k] = numpy.array([self.dG0_r[rxn_id][k] for rxn_id in reaction_arrays['reaction_ids']],dtype=float);
+        dG_r_O = {};
+        dG_r_O['dG_r'] = dG0_r['dG_r'] + dG_r_product + dG_r_reactant + dG_r_trans;
+        dG_r_O['dG_r_var'] = dG0_r['dG_r_var'] + dG_r_product_var + dG_r_reactant_var;
+        dG_r_O['dG_r_lb'] = dG0_r['dG_r_lb'] + dG_r_product_lb + dG_r_reactant_lb + dG_r_trans;
+        dG_r_O['dG_r_ub'] = dG0_r['dG_r_ub'] + dG_r_product_ub + dG_r_reactant_ub + dG_r_trans;
+        if bounds_method_I == 'v3':
+            swap = dG_r_O['dG_r_lb']>dG_r_O['dG_r_ub'];
+            dG_r_O['dG_r_lb'],dG_r_O['dG_r_ub'] = numpy.where(swap,dG_r_O['dG_r_ub'],dG_r_O['dG_r_lb']),\
+                numpy.where(swap,dG_r_O['dG_r_lb'],dG_r_O['dG_r_ub']);
+
+        # not the best way to calculate the Keq
+        #   NOTE: non-hydrogen metabolites are counted twice
+        not_h_prod = ~is_h[prod['index']] & (prod['index']<n-1);
+        not_h_react = ~is_h[react['index']] & (react['index']<n-1);
+        T_prod = T[prod['index']];
+        T_react = T[react['index']];
+        T_sum = numpy.zeros(len(reaction_arrays['reaction_ids']));
+        for k in range(T_prod.shape[1]):
+            T_sum = T_sum + numpy.where(not_h_prod[:,k],T_prod[:,k],0.0);
+            T_sum = T_sum + T_prod[:,k];
+        for k in range(T_react.shape[1]):
+            T_sum = T_sum + numpy.where(not_h_react[:,k],T_react[:,k],0.0);
+            T_sum = T_sum + T_react[:,k];
+        nT = (prod['index']<n-1).sum(axis=1) + (react['index']<n-1).sum(axis=1) + not_h_prod.sum(axis=1) + not_h_react.sum(axis=1);
+        dG_r_O['Keq_exp_lb'] = self._calculate_Keq_exp(dG_r_O['dG_r_lb'],T_sum,nT);
+        dG_r_O['Keq_exp_ub'] = self._calculate_Keq_exp(dG_r_O['dG_r_ub'],T_sum,nT);
+
+        # determine the metabolomics coverage
+        dG_r_O['nMets'] = (not_h_prod.sum(axis=1) + not_h_react.sum(axis=1)).astype(float);
+        dG_r_O['nMets_measured'] = (measured[prod['index']].sum(axis=1) + measured[react['index']].sum(axis=1)).astype(float);
+        return dG_r_O;
+
+    def _calculate_dG_r_trans_arrays(self, reaction_arrays, hydrogens, pH, temperature):
+        """calculate the contribution of transport (membrane potential and proton
+        transport) to the Gibbs free energy of reaction for all reactions at once
+
+        Args:
+            reaction_arrays (dict): see _make_reaction_arrays
+            hydrogens (list): compartment specific hydrogen ids
+            pH (dict)
+            temperature (dict)
+
+        Returns:
+            numpy.array: dG_r_trans_O (0.0 for reactions that are not transport reactions)
         """
 
-        ## metabolites that do not count towards the total coverage
-        #compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        #exceptions_ = ['pi_','h2o_','h2_','o2_','co2_']
-        #exceptions = [];
-        #for c in compartments:
-        #    for e in exceptions_:
-        #        exceptions.append(e+c);
+        hydrogens = set(hydrogens);
+
+        # metabolite values (padded with an additional 0.0 entry)
+        metabolites = reaction_arrays['metabolites'];
+        n = len(metabolites) + 1;
+        T,charge,pH_met = numpy.zeros(n),numpy.zeros(n),numpy.zeros(n);
+        is_h = numpy.zeros(n,dtype=bool);
+        for j,m in enumerate(metabolites):
+            T[j] = temperature[m.compartment]['temperature'];
+            pH_met[j] = pH[m.compartment]['pH'];
+            if m.charge is not None: charge[j] = m.charge;
+            is_h[j] = m.id in hydrogens;
+
+        prod,react = reaction_arrays['products'],reaction_arrays['reactants'];
+
+        # calculate the contribution of charge transfer accross the membrane to dG_r
+        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
+        #           where c = net charge transport
+        #                 F = Faradays constant
+        #                 deltaPSI = electrochemical potential
+        #                 deltaPH = pH gradient
+        #   for transport reactions involving the movement of reactant to product
+        #           of the form a*produc = b*react, the equation
+        #           can be broken into two parts: 1 for product and 1 for reactant
+        #           each with 1/2 the contribution to the net reactions
+        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
+        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
+        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
+        # adjustment for pH (Robert A. Alberty, Thermodynamics of biochemical reactions (Hoboken N.J.: Wiley-Interscience, 2003).
+        def _mem_terms(arrays):
+            c = arrays['coefficient'];
+            with numpy.errstate(divide='ignore',invalid='ignore'):
+                terms = numpy.fabs(c)/2.0*charge[arrays['index']]/2.0*self.F*(33.3*c/numpy.fabs(c)*pH_met[arrays['index']]-143.33/2.0);
+            return numpy.where(arrays['transport'],terms,0.0);
+        dG_r_mem = self._sum_columns(_mem_terms(react),self._sum_columns(_mem_terms(prod)));
+        h_trans_prod = prod['transport'] & is_h[prod['index']];
+        h_trans_react = react['transport'] & is_h[react['index']];
+        dG_r_pH = self._sum_columns(-numpy.where(h_trans_prod,
+            log(10)*self.R*T[prod['index']]*charge[prod['index']]*pH_met[prod['index']]*prod['coefficient']/2.0,0.0));
+        dG_r_pH = self._sum_columns(numpy.where(h_trans_react,
+            log(10)*self.R*T[react['index']]*pH_met[react['index']]*react['coefficient']/2.0,0.0),dG_r_pH);
+
+        dG_r_trans_O = dG_r_mem + dG_r_pH;
+        return dG_r_trans_O;
+
+    def _convert_dG_r_arrays(self, reaction_arrays, dG_r_arrays):
+        """convert the output of _calculate_dG_r_arrays to dictionaries
 
-        dG0_r_I = {};
-        dG_r_coverage_I = {}
-        for r in cobra_model.reactions:
-            dG0_r_I[r.id] = {'dG_r': None,
-                           'dG_r_var': None,
-                           'dG_r_lb': None,
-                           'dG_r_ub': None,
-                           'dG_r_units': None,
-                           'Keq_lb': None,
-                           'Keq_ub': None};
-            dG_r_coverage_I[r.id] = None; # will determine the coverage of thermodynamic
-        
-            nMets = 0.0; # number of metabolites in each reaction
-            nMets_measured = 0.0; # number of measured metabolites in each reaction
-            temperatures = [];
-            # calculate dG0_r for products
-            dG0_r_product = 0.0;
-            dG0_r_product_var = 0.0;
-            dG0_r_product_lb = 0.0;
-            dG0_r_product_ub = 0.0;
-            for p in r.products:
-                if p.id in list(measured_dG_f.keys()):
-                    dG0_r_product = dG0_r_product + measured_dG_f[p.id]['dG_f']*r.get_coefficient(p.id)
-                    dG0_r_product_var = dG0_r_product_var + measured_dG_f[p.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_product_lb = dG0_r_product_lb + measured_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    dG0_r_product_ub = dG0_r_product_ub + measured_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    nMets = nMets + 1.0;
-                    nMets_measured = nMets_measured + 1.0;
-                    temperatures.append(temperature[p.compartment]['temperature']);
-                elif p.id in list(estimated_dG_f.keys()):
-                    dG0_r_product = dG0_r_product + estimated_dG_f[p.id]['dG_f']*r.get_coefficient(p.id)
-                    #dG0_r_product_var = dG0_r_product_var + estimated_dG_f[p.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_product_lb = dG0_r_product_lb + estimated_dG_f[p.id]['dG_f_lb']*r.get_coefficient(p.id)
-                    dG0_r_product_ub = dG0_r_product_ub + estimated_dG_f[p.id]['dG_f_ub']*r.get_coefficient(p.id)
-                    #if p.id in exceptions:
-                    #    nMets_measured = nMets_measured + 1.0;
-                    nMets = nMets + 1.0;
-                    temperatures.append(temperature[p.compartment]['temperature']);
-                else:
-                    # raise error
-                    return
-            # calculate dG0_r for reactants
-            dG0_r_reactant = 0.0;
-            dG0_r_reactant_var = 0.0;
-            dG0_r_reactant_lb = 0.0;
-            dG0_r_reactant_ub = 0.0;
-            for react in r.reactants:
-                if react.id in list(measured_dG_f.keys()):
-                    dG0_r_reactant = dG0_r_reactant + measured_dG_f[react.id]['dG_f']*r.get_coefficient(react.id)
-                    dG0_r_reactant_var = dG0_r_reactant_var + measured_dG_f[react.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_reactant_lb = dG0_r_reactant_lb + measured_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    dG0_r_reactant_ub = dG0_r_reactant_ub + measured_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    nMets = nMets + 1.0;
-                    nMets_measured = nMets_measured + 1.0;
-                    temperatures.append(temperature[react.compartment]['temperature']);
-                elif react.id in list(estimated_dG_f.keys()):
-                    dG0_r_reactant = dG0_r_reactant + estimated_dG_f[react.id]['dG_f']*r.get_coefficient(react.id)
-                    dG0_r_reactant_var = dG0_r_reactant_var + estimated_dG_f[react.id]['dG_f_var']
-                    # calculate the lb and ub for dG implementation #1
-                    dG0_r_reactant_lb = dG0_r_reactant_lb + estimated_dG_f[react.id]['dG_f_lb']*r.get_coefficient(react.id)
-                    dG0_r_reactant_ub = dG0_r_reactant_ub + estimated_dG_f[react.id]['dG_f_ub']*r.get_coefficient(react.id)
-                    #if react.id in exceptions:
-                    #    nMets_measured = nMets_measured + 1.0;
-                    nMets = nMets + 1.0;
-                    temperatures.append(temperature[react.compartment]['temperature']);
-                else:
-                    # raise error
-                    return
-            # calculate the dG0_r for the reaction
-            dG0_r_I[r.id]['dG_r'] = dG0_r_product + dG0_r_reactant;
-            dG0_r_I[r.id]['dG_r_var'] = dG0_r_product_var + dG0_r_reactant_var;
-            # implementation 1 to calculate the bounds
-            #dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product + dG0_r_reactant - sqrt(dG0_r_product_var + dG0_r_reactant_var);
-            #dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product + dG0_r_reactant + sqrt(dG0_r_product_var + dG0_r_reactant_var);
-            # implementation 3 to calculate the bounds
-            dG_r_lb_tmp = dG0_r_product_lb + dG0_r_reactant_lb;
-            dG_r_ub_tmp = dG0_r_product_ub + dG0_r_reactant_ub;
-            if dG_r_lb_tmp>dG_r_ub_tmp:
-                dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product_ub + dG0_r_reactant_ub;
-                dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product_lb + dG0_r_reactant_lb;
-            else:
-                dG0_r_I[r.id]['dG_r_lb'] = dG0_r_product_lb + dG0_r_reactant_lb;
-                dG0_r_I[r.id]['dG_r_ub'] = dG0_r_product_ub + dG0_r_reactant_ub;
-            dG0_r_I[r.id]['dG_r_units'] = 'kJ/mol';
-
-            # not the best way to calculate the Keq
-            Keq_exp_lb = -dG0_r_I[r.id]['dG_r_lb']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_lb>100: Keq_exp_lb = 100;
-            elif Keq_exp_lb<-100: Keq_exp_lb = -100;
-            dG0_r_I[r.id]['Keq_lb'] = exp(Keq_exp_lb);
-            Keq_exp_ub = -dG0_r_I[r.id]['dG_r_ub']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_ub>100: Keq_exp_ub = 100;
-            elif Keq_exp_ub<-100: Keq_exp_ub = -100;
-            dG0_r_I[r.id]['Keq_ub'] = exp(Keq_exp_ub);
-
-            # determine the thermodynamic coverage
-            if nMets == 0:  dG_r_coverage_tmp = 0;
-            else: dG_r_coverage_tmp = nMets_measured/nMets
-            dG_r_coverage_I[r.id] = dG_r_coverage_tmp;
+        Returns:
+            dict: dG_r_O: {reaction.id: {'dG_r','dG_r_var','dG_r_units','dG_r_lb','dG_r_ub','Keq_lb','Keq_ub'}}
+            dict: metabolomics_coverage_O: {reaction.id: float}
+        """
 
-        self.dG0_r = dG0_r_I;
-        self.dG_r_coverage = dG_r_coverage_I;
+        dG_r_O = {};
+        metabolomics_coverage_O = {};
+        for i,rxn_id in enumerate(reaction_arrays['reaction_ids']):
+            dG_r_O[rxn_id] = {'dG_r': float(dG_r_arrays['dG_r'][i]),
+                           'dG_r_var': float(dG_r_arrays['dG_r_var'][i]),
+                           'dG_r_units': 'kJ/mol',
+                           'dG_r_lb': float(dG_r_arrays['dG_r_lb'][i]),
+                           'dG_r_ub': float(dG_r_arrays['dG_r_ub'][i]),
+                           'Keq_lb': exp(dG_r_arrays['Keq_exp_lb'][i]),
+                           'Keq_ub': exp(dG_r_arrays['Keq_exp_ub'][i])};
+            metabolomics_coverage_O[rxn_id] = self._get_coverage(
+                dG_r_arrays['nMets_measured'][i],dG_r_arrays['nMets'][i]);
+        return dG_r_O,metabolomics_coverage_O;
 
-    def _calculate_dG_r_v3(self, cobra_model, measured_concentration, estimated_concentration,
+    def _calculate_dG0_r_v2(self, cobra_model, measured_dG_f, estimated_dG_f, temperature):
+        """calculate the standard Gibbs free energy of reaction (bounds method v2)"""
+        self.calculate_dG0_r(cobra_model, measured_dG_f, estimated_dG_f, temperature, bounds_method_I = 'v2');
+
+    def _calculate_dG_r_v2(self, cobra_model, measured_concentration, estimated_concentration,
                            pH, ionic_strength, temperature):
-        """calculate the Gibbs free energy of reaction accounting for the following:
-        metabolite concentrations
-        pH (proton concentration)
-        temperature: accounted for in dG_f
-        change in ionic_strength: accounted for in dG_f
-        transport processes (membrane potential and  proton exchange)"""
-
-        # NOTES:
-        #   The lower and upper bounds for dG_r can be calculated in two ways:
-        #   #1 provides a more conservative estimate, but can often reverse lb/ub dG_r values
-        #       depending on how wide the lb/ub is for reactants and products (default)
-        #   #2 provides a less conservative estimate, but avoids reversing the lb/ub dG_r values
-        #       even when the lb/ub for reactants and products is wide
-    
-        # initialize hydrogens:
-        hydrogens = [];
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        for compart in compartments:
-             hydrogens.append('h_' + compart);
+        """calculate the Gibbs free energy of reaction (bounds method v2)"""
+        self.calculate_dG_r(cobra_model, measured_concentration, estimated_concentration,
+                           pH, ionic_strength, temperature, bounds_method_I = 'v2');
 
-        dG_r_I = {};
-        metabolomics_coverage_I = {};
-        for r in cobra_model.reactions:
-            dG_r_I[r.id] = {'dG_r': None,
-                           'dG_r_var': None,
-                           'dG_r_units': None,
-                           'dG_r_lb': None,
-                           'dG_r_ub': None,
-                           'Keq_lb': None,
-                           'Keq_ub': None
-                           #'ri_estimate': None,
-                           #'ri': None,
-                           #'Q_estimate': None,
-                           #'Q': None
-                           };
-
-            metabolomics_coverage_I[r.id] = None; # will determine the coverage of metabolomics data
-
-            nMets = 0.0; # number of metabolites in each reaction
-            nMets_measured = 0.0; # number of measured metabolites in each reaction
-
-            temperatures = [];
-
-            dG_r_ionic = 0.0; # adjustment for ionic strength (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
-
-            # adjustment for transport reactions (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
-            mets_trans = self.find_transportMets(cobra_model,r.id);
-            d_h = 0; # change in proton transfer accross the membrane
-            compartments_charge = {}; # compartments of the products {metabolite.compartment:{metabolite.id:metabolite.charge}}
-            dG_r_mem = 0.0; # change in membrane potential
-            dG_r_pH = 0.0; # adjustment for pH (Robert A. Alberty, Thermodynamics of biochemical reactions (Hoboken N.J.: Wiley-Interscience, 2003).
-            dG_r_trans = 0.0;
-
-            # calculate dG_r for products
-            dG_r_product = 0.0;
-            dG_r_product_var = 0.0;
-            dG_r_product_lb = 0.0;
-            dG_r_product_ub = 0.0;
-            for p in r.products:
-                if not(p.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-                    if p.id in list(measured_concentration.keys()):
-                        # calculate the dG_r of the reactants using measured concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_product = dG_r_product + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(measured_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_product_var = dG_r_product_var + pow(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id)),2)/measured_concentration[p.id]['concentration']*measured_concentration[p.id]['concentration_var'];
-                        #dG_r_product_var = dG_r_product_var + exp(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/log(measured_concentration[p.id]['concentration'])*log(measured_concentration[p.id]['concentration_var']));
-                    
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        dG_r_product_ub = dG_r_product_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
-                        #           where c = net charge transport
-                        #                 F = Faradays constant
-                        #                 deltaPSI = electrochemical potential
-                        #                 deltaPH = pH gradient
-                        #   for transport reactions involving the movement of reactant to product
-                        #           of the form a*produc = b*react, the equation
-                        #           can be broken into two parts: 1 for product and 1 for reactant  
-                        #           each with 1/2 the contribution to the net reactions
-                        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
-                        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
-                        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if p.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        nMets_measured = nMets_measured + 1.0;
-                        temperatures.append(temperature[p.compartment]['temperature']);
-
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[p.compartment]['temperature']*A*\
-                        #                (p.charge*p.charge*r.get_coefficient(p.id)*ionic_strength[p.compartment]['ionic_strength'])/(1+B*ionic_strength[p.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH'];
-
-                    elif p.id in list(estimated_concentration.keys()):
-                        # calculate the dG_r of the reactants using estimated concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_product = dG_r_product + self.R*temperature[p.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_product_var = dG_r_product_var + self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/estimated_concentration[p.id]['concentration']*\
-                        #                                        estimated_concentration[p.id]['concentration_var'];
-                        #dG_r_product_var = dG_r_product_var + exp(self.R*temperature[p.compartment]['temperature']*fabs(r.get_coefficient(p.id))/log(estimated_concentration[p.id]['concentration'])*\
-                        #                                        log(estimated_concentration[p.id]['concentration_var']));
-
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_product_lb = dG_r_product_lb + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration_lb'])*r.get_coefficient(p.id);
-                        dG_r_product_ub = dG_r_product_ub + self.R*temperature[p.compartment]['temperature']*\
-                                                            log(estimated_concentration[p.id]['concentration_ub'])*r.get_coefficient(p.id);
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if p.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        temperatures.append(temperature[p.compartment]['temperature']);
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[p.compartment]['temperature']*A*\
-                        #                (p.charge*p.charge*r.get_coefficient(p.id)*ionic_strength[p.compartment]['ionic_strength'])/(1+B*ionic_strength[p.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH'];
-
-                    else:
-                        # raise error
-                        return
-                else:
-                    if p.name in mets_trans: 
-                        dG_r_mem += fabs(r.get_coefficient(p.id))/2.0*p.charge/2.0*self.F*(33.3*r.get_coefficient(p.id)/fabs(r.get_coefficient(p.id))*pH[p.compartment]['pH']-143.33/2.0);
-                        dG_r_pH = dG_r_pH - log(10)*self.R*temperature[p.compartment]['temperature']*p.charge*pH[p.compartment]['pH']*r.get_coefficient(p.id)/2.0;
-
-                temperatures.append(temperature[p.compartment]['temperature']);
-            # calculate dG_r for reactants
-            dG_r_reactant = 0.0;
-            dG_r_reactant_var = 0.0;
-            dG_r_reactant_lb = 0.0;
-            dG_r_reactant_ub = 0.0;
-            for react in r.reactants:
-                if not(react.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-                    if react.id in list(measured_concentration.keys()):
-                        # calculate the dG_r of the reactants using measured concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_reactant = dG_r_reactant + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(measured_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_reactant_var = dG_r_reactant_var + self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/measured_concentration[react.id]['concentration']*measured_concentration[react.id]['concentration_var'];
-                        #dG_r_reactant_var = dG_r_reactant_var + exp(self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/log(measured_concentration[react.id]['concentration'])*log(measured_concentration[react.id]['concentration_var']));
-                    
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                        dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(measured_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        #   NOTE: dG_r_mem = c*F*deltaPsi = c*F*(33.33*deltaPH-143.33)
-                        #           where c = net charge transport
-                        #                 F = Faradays constant
-                        #                 deltaPSI = electrochemical potential
-                        #                 deltaPH = pH gradient
-                        #   for transport reactions involving the movement of reactant to product
-                        #           of the form a*produc = b*react, the equation
-                        #           can be broken into two parts: 1 for product and 1 for reactant  
-                        #           each with 1/2 the contribution to the net reactions
-                        #         dG_r_mem = dG_r_mem_prod + dG_r_mem_react
-                        #           where dG_r_mem_prod = abs(a)/2*charge_prod/2*F(33.3*sign(a)*pH_comp_prod-143.33/2)
-                        #                 dG_r_mem_react = abs(b)/2*charge_react/2*F(33.3*sign(b)*pH_comp_react-143.33/2)
-                        if react.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        nMets_measured = nMets_measured + 1.0;
-                        temperatures.append(temperature[react.compartment]['temperature']);
-
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[react.compartment]['temperature']*A*\
-                        #                (react.charge*react.charge*r.get_coefficient(react.id)*ionic_strength[react.compartment]['ionic_strength'])/(1+B*ionic_strength[react.compartment]['ionic_strength']);
-                        #dG_r_pH = dG_r_pH + log(10)*self.R*temperature[react.compartment]['temperature']*react.charge*pH[react.compartment]['pH']*r.get_coefficient(react.id);
-
-                    elif react.id in list(estimated_concentration.keys()):
-                        # calculate the dG_r of the reactants using estimated concentrations
-                        #   NOTE: since the geometric mean is linear with respect to dG, no adjustments needs to be made
-                        #dG_r_reactant = dG_r_reactant + self.R*temperature[react.compartment]['temperature']*\
-                        #                                    log(estimated_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-                        # calculate the variance contributed to dG_r by the uncertainty in the measured concentrations
-                        #   NOTE: provides an estimate only...
-                        #         i.e. improvements need to be made
-                        #dG_r_reactant_var = dG_r_reactant_var + self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/estimated_concentration[react.id]['concentration']*\
-                        #                                        estimated_concentration[react.id]['concentration_var'];
-                        #dG_r_reactant_var = dG_r_reactant_var + exp(self.R*temperature[react.compartment]['temperature']*fabs(r.get_coefficient(react.id))/log(estimated_concentration[react.id]['concentration'])*\
-                        #                                        log(estimated_concentration[react.id]['concentration_var']));
-                    
-                        # calculate the lb and ub for dG implementation #1
-                        dG_r_reactant_lb = dG_r_reactant_lb + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration_lb'])*r.get_coefficient(react.id);
-                        dG_r_reactant_ub = dG_r_reactant_ub + self.R*temperature[react.compartment]['temperature']*\
-                                                            log(estimated_concentration[react.id]['concentration_ub'])*r.get_coefficient(react.id);
-                    
-                        # calculate the contribution of charge transfer accross the membrane to dG_r
-                        if react.name in mets_trans: dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-
-                        nMets = nMets + 1.0;
-                        temperatures.append(temperature[react.compartment]['temperature']);
-                        #dG_r_ionic = dG_r_ionic - log(10)*self.R*temperature[react.compartment]['temperature']*A*\
-                        #                (react.charge*react.charge*r.get_coefficient(react.id)*ionic_strength[react.compartment]['ionic_strength'])/(1+B*ionic_strength[react.compartment]['ionic_strength']);
-                    else:
-                        # raise error
-                        return
-                else: 
-                    if react.name in mets_trans: 
-                        dG_r_mem += fabs(r.get_coefficient(react.id))/2.0*react.charge/2.0*self.F*(33.3*r.get_coefficient(react.id)/fabs(r.get_coefficient(react.id))*pH[react.compartment]['pH']-143.33/2.0);
-                        dG_r_pH = dG_r_pH + log(10)*self.R*temperature[react.compartment]['temperature']*pH[react.compartment]['pH']*r.get_coefficient(react.id)/2.0;
-                temperatures.append(temperature[react.compartment]['temperature']);
-
-            # adjustment for transport reactions:
-            dG_r_trans = dG_r_mem + dG_r_pH;
-
-            # calculate the dG_r for the reaction
-            dG_r_I[r.id]['dG_r'] = self.dG0_r[r.id]['dG_r'] + dG_r_product + dG_r_reactant + dG_r_trans;
-            dG_r_I[r.id]['dG_r_var'] = self.dG0_r[r.id]['dG_r_var'] + dG_r_product_var + dG_r_reactant_var;
-            dG_r_lb_tmp = self.dG0_r[r.id]['dG_r_lb'] + dG_r_product_lb + dG_r_reactant_lb + dG_r_trans;
-            dG_r_ub_tmp = self.dG0_r[r.id]['dG_r_ub'] + dG_r_product_ub + dG_r_reactant_ub + dG_r_trans;
-            if dG_r_lb_tmp>dG_r_ub_tmp:
-                dG_r_I[r.id]['dG_r_lb'] = self.dG0_r[r.id]['dG_r_ub'] + dG_r_product_ub + dG_r_reactant_ub + dG_r_trans;
-                dG_r_I[r.id]['dG_r_ub'] = self.dG0_r[r.id]['dG_r_lb'] + dG_r_product_lb + dG_r_reactant_lb + dG_r_trans;
-            else:
-                dG_r_I[r.id]['dG_r_lb'] = self.dG0_r[r.id]['dG_r_lb'] + dG_r_product_lb + dG_r_reactant_lb + dG_r_trans;
-                dG_r_I[r.id]['dG_r_ub'] = self.dG0_r[r.id]['dG_r_ub'] + dG_r_product_ub + dG_r_reactant_ub + dG_r_trans;
-            dG_r_I[r.id]['dG_r_units'] = 'kJ/mol';
-            
-            # not the best way to calculate the Keq
-            Keq_exp_lb = -dG_r_I[r.id]['dG_r_lb']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_lb>100: Keq_exp_lb = 100;
-            elif Keq_exp_lb<-100: Keq_exp_lb = -100;
-            dG_r_I[r.id]['Keq_lb'] = exp(Keq_exp_lb);
-            Keq_exp_ub = -dG_r_I[r.id]['dG_r_ub']/(sum(temperatures)/len(temperatures)*self.R);
-            if Keq_exp_ub>100: Keq_exp_ub = 100;
-            elif Keq_exp_ub<-100: Keq_exp_ub = -100;
-            dG_r_I[r.id]['Keq_ub'] = exp(Keq_exp_ub);
-
-            # determine the thermodynamic coverage
-            if nMets == 0:  conc_coverage = 0;
-            else: conc_coverage = nMets_measured/nMets
-            metabolomics_coverage_I[r.id] = conc_coverage;
+    def _calculate_dG0_r_v3(self, cobra_model, measured_dG_f, estimated_dG_f, temperature):
+        """calculate the standard Gibbs free energy of reaction (bounds method v3)"""
+        self.calculate_dG0_r(cobra_model, measured_dG_f, estimated_dG_f, temperature, bounds_method_I = 'v3');
 
-        self.dG_r = dG_r_I;
-        self.metabolomics_coverage = metabolomics_coverage_I;
+    def _calculate_dG_r_v3(self, cobra_model, measured_concentration, estimated_concentration,
+                           pH, ionic_strength, temperature):
+        """calculate the Gibbs free energy of reaction (bounds method v3)"""
+        self.calculate_dG_r(cobra_model, measured_concentration, estimated_concentration,
+                           pH, ionic_strength, temperature, bounds_method_I = 'v3');
 
     def check_thermodynamicConsistency(self, cobra_model, reaction_bounds,
                            measured_concentration, estimated_concentration,
@@ -1457,71 +761,14 @@ class thermodynamics_dG_r_data(thermodynamics_io):
         # In progress:
         #   calculate the reversibility index under pseudo-conditions
         #   calculate the reversibility index in vivo
-    
-        # initialize hydrogens:
-        hydrogens = [];
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        for compart in compartments:
-             hydrogens.append('h_' + compart);
 
-        for r in cobra_model.reactions:
-            self.thermodynamic_consistency_check[r.id] = None;
-
-            ## In progress...
-            #np = 0.0;
-            #nr = 0.0;
-            #Q_estimate = 0.0;
-            #Q = 0.0;
-            #for p in r.products:
-            #    if not(p.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-            #        if p.id in measured_concentration.keys():
-            #            Q += log(measured_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-            #            Q_estimate += log(estimated_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-            #            np += 1.0;
-            #        elif p.id in estimated_concentration.keys():
-            #            Q += log(estimated_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-            #            Q_estimate += log(estimated_concentration[p.id]['concentration'])*r.get_coefficient(p.id);
-            #            np += 1.0;
-            #        else:
-            #            # raise error
-            #            return
-        
-            #for react in r.reactants:
-            #    if not(react.id in hydrogens): # exclude hydrogen because it has already been accounted for when adjusting for the pH
-            #        if react.id in measured_concentration.keys():
-            #            Q += log(measured_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-            #            Q_estimate += log(estimated_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-            #            nr += 1.0;
-            #        elif react.id in estimated_concentration.keys():
-            #            Q += log(estimated_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-            #            Q_estimate += log(estimated_concentration[react.id]['concentration'])*r.get_coefficient(react.id);
-            #            nr += 1.0;
-            #        else:
-            #            # raise error
-            #            return
-
-            #Q = exp(Q);
-            #Q_estimate = exp(Q_estimate);
-            #self.dG_r[r.id]['Q'] = Q;
-            #self.dG_r[r.id]['Q_estimate'] = Q_estimate;
-            #if not (np+nr==0):
-            #    self.dG_r[r.id]['ri'] = pow((self.dG_r[r.id]['Keq']/Q),(2.0/(np+nr)));
-            #    self.dG_r[r.id]['ri_estimate'] = pow((self.dG_r[r.id]['Keq']/Q_estimate),(2.0/(np+nr)));
-
-            feasible = False;
-            if self.dG_r[r.id]['dG_r_ub']*reaction_bounds[r.id]['flux_lb']<=0 or\
-               self.dG_r[r.id]['dG_r_ub']*reaction_bounds[r.id]['flux_ub']<=0 or\
-               self.dG_r[r.id]['dG_r_lb']*reaction_bounds[r.id]['flux_lb']<=0 or\
-               self.dG_r[r.id]['dG_r_lb']*reaction_bounds[r.id]['flux_ub']<=0:
-                feasible = True;
-
-            self.thermodynamic_consistency_check[r.id] = feasible;
+        consistency = self.check_thermodynamicConsistency_arrays(cobra_model, [reaction_bounds],
+            measured_concentration_coverage_criteria, measured_dG_f_coverage_criteria);
 
         infeasible_reactions = [];
-        for r in cobra_model.reactions:
-            if not self.thermodynamic_consistency_check[r.id] and \
-                self.metabolomics_coverage[r.id] > measured_concentration_coverage_criteria and \
-                self.dG_r_coverage[r.id]>measured_dG_f_coverage_criteria:
+        for i,r in enumerate(cobra_model.reactions):
+            self.thermodynamic_consistency_check[r.id] = bool(consistency['feasible'][0,i]);
+            if consistency['inconsistent'][0,i]:
                 infeasible_reactions.append(r);
                 self.inconsistent_reactions[r.id] = {};
 
@@ -1545,6 +792,49 @@ class thermodynamics_dG_r_data(thermodynamics_io):
                 #print k, v
         print(('total # of reactions with required thermodynamic coverage = ' + str(dG_f_coverage_cnt)))
     
+    def check_thermodynamicConsistency_arrays(self, cobra_model, reaction_bounds_list,
+                           measured_concentration_coverage_criteria = 0.5,
+                           measured_dG_f_coverage_criteria = 0.99):
+        """identify thermodynamically infeasible reactions for several sets of flux bounds at once
+
+        Args:
+            cobra_model (cobra.Model)
+            reaction_bounds_list (list(dict)): [{reaction.id: {'flux_lb': float, 'flux_ub': float}},...]
+                e.g., fva_data at several fraction_of_optimum values
+            measured_concentration_coverage_criteria (float)
+            measured_dG_f_coverage_criteria (float)
+
+        Returns:
+            dict: consistency_O: {'reaction_ids': list,
+                                  'feasible': numpy.array (bound sets x reactions, boolean),
+                                  'inconsistent': numpy.array (bound sets x reactions, boolean)}
+
+        NOTES:
+          a reaction is feasible if the sign of dG_r allows flux in the direction of one of the flux bounds
+          inconsistent reactions are infeasible and meet both coverage criteria
+        """
+
+        reaction_ids = [r.id for r in cobra_model.reactions];
+        n_sets = len(reaction_bounds_list);
+        dG_r_lb = numpy.array([self.dG_r[rxn_id]['dG_r_lb'] for rxn_id in reaction_ids],dtype=float);
+        dG_r_ub = numpy.array([self.dG_r[rxn_id]['dG_r_ub'] for rxn_id in reaction_ids],dtype=float);
+        flux_lb = numpy.array([[reaction_bounds[rxn_id]['flux_lb'] for rxn_id in reaction_ids]
+            for reaction_bounds in reaction_bounds_list],dtype=float).reshape(n_sets,len(reaction_ids));
+        flux_ub = numpy.array([[reaction_bounds[rxn_id]['flux_ub'] for rxn_id in reaction_ids]
+            for reaction_bounds in reaction_bounds_list],dtype=float).reshape(n_sets,len(reaction_ids));
+
+        feasible = (dG_r_ub*flux_lb<=0) | (dG_r_ub*flux_ub<=0) | \
+                   (dG_r_lb*flux_lb<=0) | (dG_r_lb*flux_ub<=0);
+        coverage = (numpy.array([self.metabolomics_coverage[rxn_id] for rxn_id in reaction_ids],dtype=float)
+                        > measured_concentration_coverage_criteria) & \
+                   (numpy.array([self.dG_r_coverage[rxn_id] for rxn_id in reaction_ids],dtype=float)
+                        > measured_dG_f_coverage_criteria);
+
+        consistency_O = {'reaction_ids':reaction_ids,
+                         'feasible':feasible,
+                         'inconsistent':~feasible & coverage};
+        return consistency_O;
+
     def find_transportMets(self, cobra_model_I, reaction_id_I):
         """Find transport metabolites
 
@@ -1562,237 +852,311 @@ class thermodynamics_dG_r_data(thermodynamics_io):
             3. different compartment
         """
 
-        """ Not full proof
-        import re
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        met_ID
-        for compart in compartments:
-	        comp_tmp = '_' + compart;
-	        met_tmp = re.sub(comp_tmp,'',met_ID)
-        met_ids.append(met_tmp)"""
-
-        met_ids = cobra_model_I.reactions.get_by_id(reaction_id_I).products + cobra_model_I.reactions.get_by_id(reaction_id_I).reactants
-        met_names = [];
-        mets_O = [];
-        for m in met_ids:
-            met_names.append(m.name);
-        met_O = [k for k,v in list(Counter(met_names).items()) if v>1]
+        met_O = list(get_transportIndex(cobra_model_I).transportMets.get(reaction_id_I,[]));
         return met_O;
 
-    def calculate_displacement(self, cobra_model, measured_concentration, estimated_concentration):
+    def calculate_displacement(self, cobra_model, measured_concentration, estimated_concentration,
+                               bounds_method_I = 'v1', temperature = None):
         """calculate the thermodynamic displacement from equilibrium
-        
+
         displacement = 1 - Q/Keq
                        1 - (PI(products^stoichiometry)/PI(reactants^stoichiometry))/Keq
 
+        Q/Keq is calculated in ln space:
+        ln(Q/Keq) = SUM[sij*ln(xj)] + dG0_r/(R*T)
+
+        Args:
+            bounds_method_I (str): method used to combine the lb/ub of the concentrations
+                (see _calculate_displacement_arrays)
+            temperature (dict): used to calculate ln(Keq) = -dG0_r/(R*T)
+                (default: the temperature of calculate_dG0_r; required if dG0_r was imported)
         """
-        
-        # initialize hydrogens:
-        hydrogens = [];
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        for compart in compartments:
-             hydrogens.append('h_' + compart);
 
-        # calculate Q and displacements
-        displacement_I = {}
-        for r in cobra_model.reactions:
-            displacement_I[r.id] = {'displacement_lb':None,
-                                    'displacement_ub':None,
-                                    'Q_lb':None,
-                                    'Q_ub':None};
-            products_pi_lb = 1.0;
-            products_pi_ub = 1.0;
-            for p in r.products:
-                if not(p.id in hydrogens): # exclude hydrogen
-                    if p.id in list(measured_concentration.keys()):
-                        # calculate Q using the geometric mean
-                        products_pi_lb *= pow(measured_concentration[p.id]['concentration_lb'],r.get_coefficient(p.id));
-                        products_pi_ub *= pow(measured_concentration[p.id]['concentration_ub'],r.get_coefficient(p.id));
-
-                    elif p.id in list(estimated_concentration.keys()):
-                        products_pi_lb *= pow(estimated_concentration[p.id]['concentration_lb'],r.get_coefficient(p.id));
-                        products_pi_ub *= pow(estimated_concentration[p.id]['concentration_ub'],r.get_coefficient(p.id));
-
-            reactants_pi_lb = 1.0;
-            reactants_pi_ub = 1.0;
-            for react in r.reactants:
-                if not(react.id in hydrogens): # exclude hydrogen
-                    if react.id in list(measured_concentration.keys()):
-                        # Method 1
-                        # calculate Q using the geometric mean
-                        reactants_pi_lb *= pow(measured_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-                        reactants_pi_ub *= pow(measured_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        ## Method 2
-                        ## calculate Q using the geometric mean
-                        #reactants_pi_lb *= pow(measured_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        #reactants_pi_ub *= pow(measured_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-
-                    elif react.id in list(estimated_concentration.keys()):
-                        # Method 1
-                        # calculate Q using the geometric mean
-                        reactants_pi_lb *= pow(estimated_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-                        reactants_pi_ub *= pow(estimated_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        ## Method 2
-                        ## calculate Q using the geometric mean
-                        #reactants_pi_lb *= pow(estimated_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        #reactants_pi_ub *= pow(estimated_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-
-            displacement_I[r.id]['displacement_lb'] = 1/self.dG0_r[r.id]['Keq_lb']*products_pi_lb*reactants_pi_lb;
-            displacement_I[r.id]['displacement_ub'] = 1/self.dG0_r[r.id]['Keq_ub']*products_pi_ub*reactants_pi_ub;
-            displacement_I[r.id]['Q_lb'] = products_pi_lb*reactants_pi_lb;
-            displacement_I[r.id]['Q_ub'] = products_pi_ub*reactants_pi_ub;
-
-        self.displacement = displacement_I;
+        if temperature is None:
+            temperature = self.temperature;
+        if not temperature:
+            print('temperature is required to calculate the displacement');
+            return;
+        hydrogens = self._get_hydrogens(cobra_model);
+        reaction_arrays = self._make_reaction_arrays(cobra_model);
+        displacement_arrays = self._calculate_displacement_arrays(reaction_arrays, hydrogens,
+            measured_concentration, estimated_concentration, temperature, bounds_method_I);
 
-    def _calculate_displacement_v2(self, cobra_model, measured_concentration, estimated_concentration):
-        """calculate the thermodynamic displacement from equilibrium
-        
-        displacement = 1 - Q/Keq
-                       1 - (PI(products^stoichiometry)/PI(reactants^stoichiometry))/Keq
+        self.displacement = self._convert_displacement_arrays(reaction_arrays,displacement_arrays);
+        self.metabolite2reactions = self._make_metabolite2reactions(cobra_model);
 
+    def _calculate_displacement_arrays(self, reaction_arrays, hydrogens, measured_concentration, estimated_concentration,
+                                       temperature, bounds_method_I = 'v1'):
+        """calculate the thermodynamic displacement from equilibrium for all reactions at once
+
+        Args:
+            reaction_arrays (dict): see _make_reaction_arrays
+            hydrogens (list): compartment specific hydrogen ids
+            measured_concentration (dict)
+            estimated_concentration (dict)
+            bounds_method_I (str): method used to combine the lb/ub of the concentrations
+                v1: products and reactants use concentration_lb for Q_lb and concentration_ub for Q_ub (default)
+                v2: reactants use concentration_ub for Q_lb and concentration_lb for Q_ub
+                v3: same as v1, but Q and displacement lb/ub are swapped if lb > ub
+            temperature (dict): used to calculate ln(Keq) = -dG0_r/(R*T)
+                with the average temperature of the reaction metabolites
+
+        Returns:
+            dict: displacement_O: {'displacement_lb','displacement_ub','Q_lb','Q_ub',
+                'ln_displacement_lb','ln_displacement_ub','ln_Q_lb','ln_Q_ub'} of numpy.arrays
+
+        NOTES:
+          the linear values are 0.0 or inf if they are not representable
         """
-        
-        # initialize hydrogens:
-        hydrogens = [];
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        for compart in compartments:
-             hydrogens.append('h_' + compart);
 
-        # calculate Q and displacements
-        displacement_I = {}
+        self._check_bounds_method(bounds_method_I);
+        hydrogens = set(hydrogens);
+
+        # metabolite values (padded with an additional 1.0 entry)
+        #   NOTE: hydrogens and metabolites without concentrations do not contribute to Q
+        metabolites = reaction_arrays['metabolites'];
+        n = len(metabolites) + 1;
+        conc_lb,conc_ub,T = numpy.ones(n),numpy.ones(n),numpy.zeros(n);
+        for j,m in enumerate(metabolites):
+            T[j] = temperature[m.compartment]['temperature'];
+            if m.id in hydrogens: continue;
+            if m.id in measured_concentration:
+                conc_tmp = measured_concentration[m.id];
+            elif m.id in estimated_concentration:
+                conc_tmp = estimated_concentration[m.id];
+            else:
+                continue;
+            conc_lb[j] = conc_tmp['concentration_lb'];
+            conc_ub[j] = conc_tmp['concentration_ub'];
+        with numpy.errstate(divide='ignore'):
+            ln_conc_lb,ln_conc_ub = numpy.log(conc_lb),numpy.log(conc_ub);
+
+        prod,react = reaction_arrays['products'],reaction_arrays['reactants'];
+        def _ln_pi(arrays, values):
+            return self._sum_columns(values[arrays['index']]*arrays['coefficient']);
+
+        # calculate ln Q using the geometric mean
+        products_ln_pi_lb = _ln_pi(prod,ln_conc_lb);
+        products_ln_pi_ub = _ln_pi(prod,ln_conc_ub);
+        if bounds_method_I == 'v2':
+            reactants_ln_pi_lb = _ln_pi(react,ln_conc_ub);
+            reactants_ln_pi_ub = _ln_pi(react,ln_conc_lb);
+        else:
+            reactants_ln_pi_lb = _ln_pi(react,ln_conc_lb);
+            reactants_ln_pi_ub = _ln_pi(react,ln_conc_ub);
+
+        reaction_ids = reaction_arrays['reaction_ids'];
+        T_sum = self._sum_columns(T[react['index']],self._sum_columns(T[prod['index']]));
+        nMets = (prod['index']<n-1).sum(axis=1) + (react['index']<n-1).sum(axis=1);
+        with numpy.errstate(divide='ignore',invalid='ignore'):
+            ln_Keq_lb = -numpy.array([self.dG0_r[rxn_id]['dG_r_lb'] for rxn_id in reaction_ids],dtype=float)/(T_sum/nMets*self.R);
+            ln_Keq_ub = -numpy.array([self.dG0_r[rxn_id]['dG_r_ub'] for rxn_id in reaction_ids],dtype=float)/(T_sum/nMets*self.R);
+        displacement_O = {};
+        displacement_O['ln_Q_lb'] = products_ln_pi_lb + reactants_ln_pi_lb;
+        displacement_O['ln_Q_ub'] = products_ln_pi_ub + reactants_ln_pi_ub;
+        if bounds_method_I == 'v3':
+            swap = displacement_O['ln_Q_lb']>displacement_O['ln_Q_ub'];
+            displacement_O['ln_Q_lb'],displacement_O['ln_Q_ub'] = numpy.where(swap,displacement_O['ln_Q_ub'],displacement_O['ln_Q_lb']),\
+                numpy.where(swap,displacement_O['ln_Q_lb'],displacement_O['ln_Q_ub']);
+        with numpy.errstate(invalid='ignore'):
+            displacement_O['ln_displacement_lb'] = displacement_O['ln_Q_lb'] - ln_Keq_lb;
+            displacement_O['ln_displacement_ub'] = displacement_O['ln_Q_ub'] - ln_Keq_ub;
+            if bounds_method_I == 'v3':
+                swap = displacement_O['ln_displacement_lb']>displacement_O['ln_displacement_ub'];
+                displacement_O['ln_displacement_lb'] = numpy.where(swap,displacement_O['ln_Q_ub'] - ln_Keq_lb,displacement_O['ln_displacement_lb']);
+                displacement_O['ln_displacement_ub'] = numpy.where(swap,displacement_O['ln_Q_lb'] - ln_Keq_ub,displacement_O['ln_displacement_ub']);
+        with numpy.errstate(over='ignore',under='ignore'):
+            for k in ['Q_lb','Q_ub','displacement_lb','displacement_ub']:
+                displacement_O[k] = numpy.exp(displacement_O['ln_' + k]);
+        return displacement_O;
+
+    def _convert_displacement_arrays(self, reaction_arrays, displacement_arrays):
+        """convert the output of _calculate_displacement_arrays to a dictionary
+
+        Returns:
+            dict: displacement_O: {reaction.id: {'displacement_lb','displacement_ub','Q_lb','Q_ub',
+                'ln_displacement_lb','ln_displacement_ub','ln_Q_lb','ln_Q_ub'}}
+        """
+
+        keys = ['displacement_lb','displacement_ub','Q_lb','Q_ub',
+                'ln_displacement_lb','ln_displacement_ub','ln_Q_lb','ln_Q_ub'];
+        displacement_O = {};
+        for i,rxn_id in enumerate(reaction_arrays['reaction_ids']):
+            displacement_O[rxn_id] = {k:float(displacement_arrays[k][i]) for k in keys};
+        return displacement_O;
+
+    def _make_metabolite2reactions(self, cobra_model):
+        """make an index of the reactions each metabolite participates in
+
+        Args:
+            cobra_model (cobra.Model)
+
+        Returns:
+            dict: metabolite2reactions_O: {metabolite.id: [reaction.id,...]}
+        """
+
+        metabolite2reactions_O = {};
         for r in cobra_model.reactions:
-            displacement_I[r.id] = {'displacement_lb':None,
-                                    'displacement_ub':None,
-                                    'Q_lb':None,
-                                    'Q_ub':None};
-            products_pi_lb = 1.0;
-            products_pi_ub = 1.0;
-            for p in r.products:
-                if not(p.id in hydrogens): # exclude hydrogen
-                    if p.id in list(measured_concentration.keys()):
-                        # calculate Q using the geometric mean
-                        products_pi_lb *= pow(measured_concentration[p.id]['concentration_lb'],r.get_coefficient(p.id));
-                        products_pi_ub *= pow(measured_concentration[p.id]['concentration_ub'],r.get_coefficient(p.id));
-
-                    elif p.id in list(estimated_concentration.keys()):
-                        products_pi_lb *= pow(estimated_concentration[p.id]['concentration_lb'],r.get_coefficient(p.id));
-                        products_pi_ub *= pow(estimated_concentration[p.id]['concentration_ub'],r.get_coefficient(p.id));
-
-            reactants_pi_lb = 1.0;
-            reactants_pi_ub = 1.0;
-            for react in r.reactants:
-                if not(react.id in hydrogens): # exclude hydrogen
-                    if react.id in list(measured_concentration.keys()):
-                        ## Method 1
-                        ## calculate Q using the geometric mean
-                        #reactants_pi_lb *= pow(measured_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-                        #reactants_pi_ub *= pow(measured_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        # Method 2
-                        # calculate Q using the geometric mean
-                        reactants_pi_lb *= pow(measured_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        reactants_pi_ub *= pow(measured_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-
-                    elif react.id in list(estimated_concentration.keys()):
-                        ## Method 1
-                        ## calculate Q using the geometric mean
-                        #reactants_pi_lb *= pow(estimated_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-                        #reactants_pi_ub *= pow(estimated_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        # Method 2
-                        # calculate Q using the geometric mean
-                        reactants_pi_lb *= pow(estimated_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        reactants_pi_ub *= pow(estimated_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-
-            displacement_I[r.id]['displacement_lb'] = 1/self.dG0_r[r.id]['Keq_lb']*products_pi_lb*reactants_pi_lb;
-            displacement_I[r.id]['displacement_ub'] = 1/self.dG0_r[r.id]['Keq_ub']*products_pi_ub*reactants_pi_ub;
-            displacement_I[r.id]['Q_lb'] = products_pi_lb*reactants_pi_lb;
-            displacement_I[r.id]['Q_ub'] = products_pi_ub*reactants_pi_ub;
-
-        self.displacement = displacement_I;
+            for m in r.metabolites:
+                if m.id in metabolite2reactions_O:
+                    metabolite2reactions_O[m.id].append(r.id);
+                else:
+                    metabolite2reactions_O[m.id] = [r.id];
+        return metabolite2reactions_O;
+
+    def update_concentrations(self, cobra_model, changes, measured_concentration, estimated_concentration,
+                           pH, ionic_strength, temperature, bounds_method_I = 'v1'):
+        """update dG_r, metabolomics coverage, and displacement for only
+        those reactions affected by a change in metabolite concentrations
+
+        Args:
+            cobra_model (cobra.Model)
+            changes (dict or list): {metabolite.id: {'concentration': float,
+                                                     'concentration_lb': float,
+                                                     'concentration_ub': float,
+                                                     'concentration_var': float,
+                                                     'concentration_units': string}}
+                     a value of None removes the measured concentration
+                     (i.e., the estimated concentration will be used)
+                     alternatively, a list of metabolite ids whose concentrations
+                     have already been changed in measured_concentration
+                     (e.g., after remove_measured_concentrations)
+            measured_concentration (dict): measured concentrations (updated in place)
+            estimated_concentration (dict): estimated concentrations
+            pH
+            ionic_strength
+            temperature
+            bounds_method_I (str): method used to combine the lb/ub of the concentrations
+
+        Returns:
+            list: reactions_O: reaction ids that were recalculated
+
+        NOTES:
+          calculate_dG_r must have been run previously
+        """
+
+        # apply the changes
+        if isinstance(changes,dict):
+            for met_id,conc in changes.items():
+                if conc is None:
+                    measured_concentration.pop(met_id,None);
+                else:
+                    measured_concentration[met_id] = conc;
+            mets_changed = list(changes.keys());
+        else:
+            mets_changed = changes;
+
+        if not self.metabolite2reactions:
+            self.metabolite2reactions = self._make_metabolite2reactions(cobra_model);
+
+        # find the affected reactions
+        reactions_O = [];
+        reactions_set = set();
+        for met_id in mets_changed:
+            if not met_id in self.metabolite2reactions:
+                print("metabolite " + met_id + " not found in the model");
+                continue;
+            for rxn_id in self.metabolite2reactions[met_id]:
+                if not rxn_id in reactions_set:
+                    reactions_set.add(rxn_id);
+                    reactions_O.append(rxn_id);
+        if not reactions_O:
+            return reactions_O;
+
+        # recalculate only the affected reactions
+        hydrogens = self._get_hydrogens(cobra_model);
+        reaction_arrays = self._make_reaction_arrays(cobra_model,
+            [cobra_model.reactions.get_by_id(rxn_id) for rxn_id in reactions_O]);
+        dG_r_arrays = self._calculate_dG_r_arrays(reaction_arrays, hydrogens,
+            measured_concentration, estimated_concentration,
+            pH, ionic_strength, temperature, bounds_method_I);
+        if dG_r_arrays is None:
+            # raise error
+            return
+        dG_r_tmp,metabolomics_coverage_tmp = self._convert_dG_r_arrays(reaction_arrays,dG_r_arrays);
+        self.dG_r.update(dG_r_tmp);
+        self.metabolomics_coverage.update(metabolomics_coverage_tmp);
+        if self.displacement:
+            displacement_arrays = self._calculate_displacement_arrays(reaction_arrays, hydrogens,
+                measured_concentration, estimated_concentration, temperature, bounds_method_I);
+            self.displacement.update(self._convert_displacement_arrays(reaction_arrays,displacement_arrays));
+
+        return reactions_O;
+
+    def _calculate_displacement_v2(self, cobra_model, measured_concentration, estimated_concentration):
+        """calculate the thermodynamic displacement from equilibrium (bounds method v2)"""
+        self.calculate_displacement(cobra_model, measured_concentration, estimated_concentration, bounds_method_I = 'v2');
 
     def _calculate_displacement_v3(self, cobra_model, measured_concentration, estimated_concentration):
-        """calculate the thermodynamic displacement from equilibrium
-        
-        displacement = 1 - Q/Keq
-                       1 - (PI(products^stoichiometry)/PI(reactants^stoichiometry))/Keq
+        """calculate the thermodynamic displacement from equilibrium (bounds method v3)"""
+        self.calculate_displacement(cobra_model, measured_concentration, estimated_concentration, bounds_method_I = 'v3');
 
+    def _make_ln_concentrations(self, cobra_model, measured_concentration, estimated_concentration):
+        """make arrays of ln concentrations aligned to cobra_model.metabolites
+
+        Args:
+            cobra_model (cobra.Model)
+            measured_concentration (dict)
+            estimated_concentration (dict)
+
+        Returns:
+            dict: ln_conc_O: {'ln_concentration_lb': numpy.array,
+                              'ln_concentration_ub': numpy.array,
+                              'included': numpy.array (boolean)}
+
+        NOTES:
+          hydrogens (accounted for by pH) and metabolites without a measured
+          or estimated concentration are given a ln concentration of 0.0
+          (i.e., they do not contribute to Q)
         """
-        
-        # initialize hydrogens:
-        hydrogens = [];
-        compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-        for compart in compartments:
-             hydrogens.append('h_' + compart);
 
-        # calculate Q and displacements
-        displacement_I = {}
-        for r in cobra_model.reactions:
-            displacement_I[r.id] = {'displacement_lb':None,
-                                    'displacement_ub':None,
-                                    'Q_lb':None,
-                                    'Q_ub':None};
-            products_pi_lb = 1.0;
-            products_pi_ub = 1.0;
-            for p in r.products:
-                if not(p.id in hydrogens): # exclude hydrogen
-                    if p.id in list(measured_concentration.keys()):
-                        # calculate Q using the geometric mean
-                        products_pi_lb *= pow(measured_concentration[p.id]['concentration_lb'],r.get_coefficient(p.id));
-                        products_pi_ub *= pow(measured_concentration[p.id]['concentration_ub'],r.get_coefficient(p.id));
-
-                    elif p.id in list(estimated_concentration.keys()):
-                        products_pi_lb *= pow(estimated_concentration[p.id]['concentration_lb'],r.get_coefficient(p.id));
-                        products_pi_ub *= pow(estimated_concentration[p.id]['concentration_ub'],r.get_coefficient(p.id));
-
-            reactants_pi_lb = 1.0;
-            reactants_pi_ub = 1.0;
-            for react in r.reactants:
-                if not(react.id in hydrogens): # exclude hydrogen
-                    if react.id in list(measured_concentration.keys()):
-                        # Method 1
-                        # calculate Q using the geometric mean
-                        reactants_pi_lb *= pow(measured_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-                        reactants_pi_ub *= pow(measured_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        ## Method 2
-                        ## calculate Q using the geometric mean
-                        #reactants_pi_lb *= pow(measured_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        #reactants_pi_ub *= pow(measured_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-
-                    elif react.id in list(estimated_concentration.keys()):
-                        # Method 1
-                        # calculate Q using the geometric mean
-                        reactants_pi_lb *= pow(estimated_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-                        reactants_pi_ub *= pow(estimated_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        ## Method 2
-                        ## calculate Q using the geometric mean
-                        #reactants_pi_lb *= pow(estimated_concentration[react.id]['concentration_ub'],r.get_coefficient(react.id));
-                        #reactants_pi_ub *= pow(estimated_concentration[react.id]['concentration_lb'],r.get_coefficient(react.id));
-
-            Q_lb_tmp = products_pi_lb*reactants_pi_lb;
-            Q_ub_tmp = products_pi_ub*reactants_pi_ub;
-            if Q_lb_tmp>Q_ub_tmp:
-                displacement_I[r.id]['Q_lb'] = products_pi_ub*reactants_pi_ub;
-                displacement_I[r.id]['Q_ub'] = products_pi_lb*reactants_pi_lb;
+        hydrogens = set(self._get_hydrogens(cobra_model));
+        n = len(cobra_model.metabolites);
+        included = numpy.zeros(n,dtype=bool);
+        conc_lb,conc_ub = numpy.ones(n),numpy.ones(n);
+        for j,m in enumerate(cobra_model.metabolites):
+            if m.id in hydrogens: continue;
+            if m.id in measured_concentration:
+                conc_tmp = measured_concentration[m.id];
+            elif m.id in estimated_concentration:
+                conc_tmp = estimated_concentration[m.id];
             else:
-                displacement_I[r.id]['Q_lb'] = products_pi_lb*reactants_pi_lb;
-                displacement_I[r.id]['Q_ub'] = products_pi_ub*reactants_pi_ub;
-            displacement_lb_tmp = 1/self.dG0_r[r.id]['Keq_lb']*displacement_I[r.id]['Q_lb'];
-            displacement_ub_tmp = 1/self.dG0_r[r.id]['Keq_ub']*displacement_I[r.id]['Q_ub'];
-            if displacement_lb_tmp>displacement_ub_tmp:
-                displacement_I[r.id]['displacement_lb'] = 1/self.dG0_r[r.id]['Keq_lb']*displacement_I[r.id]['Q_ub'];
-                displacement_I[r.id]['displacement_ub'] = 1/self.dG0_r[r.id]['Keq_ub']*displacement_I[r.id]['Q_lb'];
-            else:
-                displacement_I[r.id]['displacement_lb'] = 1/self.dG0_r[r.id]['Keq_lb']*displacement_I[r.id]['Q_lb'];
-                displacement_I[r.id]['displacement_ub'] = 1/self.dG0_r[r.id]['Keq_ub']*displacement_I[r.id]['Q_ub'];
+                continue;
+            included[j] = True;
+            conc_lb[j] = conc_tmp['concentration_lb'];
+            conc_ub[j] = conc_tmp['concentration_ub'];
+        ln_conc_O = {'ln_concentration_lb':numpy.log(conc_lb),
+                     'ln_concentration_ub':numpy.log(conc_ub),
+                     'included':included};
+        return ln_conc_O;
+
+    def _make_RT(self, cobra_model, S, temperature):
+        """make an array of R*T for each reaction using the average
+        temperature of the compartments of the reaction metabolites
 
-        self.displacement = displacement_I;
+        Args:
+            cobra_model (cobra.Model)
+            S (scipy.sparse.csr_matrix): stoichiometric matrix (see thermodynamics_utility.make_stoichiometry)
+            temperature (dict)
 
-    def simulate_infeasibleReactions(self,cobra_model_I):
+        Returns:
+            numpy.array: RT_O
+        """
+
+        T = numpy.array([temperature[m.compartment]['temperature'] for m in cobra_model.metabolites]);
+        S_abs = (S != 0).astype(float);
+        nMets = numpy.asarray(S_abs.sum(axis=1)).ravel();
+        with numpy.errstate(divide='ignore',invalid='ignore'):
+            RT_O = self.R*(S_abs.dot(T))/nMets;
+        return RT_O;
+
+    def simulate_infeasibleReactions(self,cobra_model_I,processes_I=1):
         """simulate the effect of constraining thermodynamically infeasible reactions to
         thermodynamically determined directions
         
         Args:
           cobra_model_I
-          reactions_id_I = cobra model reaction ids
+          processes_I (int): number of processes (see optimize_thermoConstraints)
 
         Returns:
           dict: gr_O: {'reaction_id 1':{gr:float, gr_ratio:% change in growth},
@@ -1801,42 +1165,35 @@ class thermodynamics_dG_r_data(thermodynamics_io):
 
         gr_O = {};
         reactions_id_I = list(self.inconsistent_reactions.keys());
-        # determine the orginal growth rate of the model
-        cobra_model_I.optimize();
-        gr_original = cobra_model_I.solution.f;
-        #gr_O['original'] = gr_original;
-        # iterate through each reaction
+        gr = optimize_thermoConstraints(cobra_model_I, reactions_id_I, processes_I);
+        gr_original = gr['original'];
         for rxn in reactions_id_I:
-            gr_O[rxn] = None;
-            # constrain the upper reaction bounds of the model
-            ub = cobra_model_I.reactions.get_by_id(rxn).upper_bound;
-            cobra_model_I.reactions.get_by_id(rxn).upper_bound = 0.0;
-            # check that the lower bounds are not higher than the upper bounds
-            lb = cobra_model_I.reactions.get_by_id(rxn).lower_bound;
-            if lb>0.0:
-                cobra_model_I.reactions.get_by_id(rxn).lower_bound = 0.0;
-            # simulate growth with the constraint
-            cobra_model_I.optimize();
-            gr = cobra_model_I.solution.f
-            if gr: gr_O[rxn] = {'gr':gr, 'gr_ratio':gr/gr_original*100};
+            if gr[rxn]: gr_O[rxn] = {'gr':gr[rxn], 'gr_ratio':gr[rxn]/gr_original*100};
             else: gr_O[rxn] = {'gr':0.0, 'gr_ratio':0.0/gr_original*100};
-            # reset reaction constraint
-            cobra_model_I.reactions.get_by_id(rxn).upper_bound = ub;
 
         self.inconsistent_reactions = gr_O;
 
-    def constrain_infeasibleReactions(self,cobra_model_irreversible,solver=None,verbose_I=False):
+    def constrain_infeasibleReactions(self,cobra_model_irreversible,solver=None,verbose_I=False,batch_I=False):
         """constrain the bounds of thermodynamically infeasible reactions
         that do not impact growth
 
         Args:
             cobra_model_irreversible (cobra.Model): irreversible cobra model
             solver (str): solver name
+            batch_I (boolean): constrain all reactions at once and bisect
+                only if growth is abolished (see _bisect_infeasibleReactions)
 
         Returns:
             cobra_model with reactions removed
         """
 
+        if batch_I:
+            if solver: cobra_model_irreversible.solver = solver;
+            reactions_id_I = [k for k,v in self.inconsistent_reactions.items() if v['gr_ratio'] > 0.0];
+            self._bisect_infeasibleReactions(cobra_model_irreversible,reactions_id_I,
+                self._constrain_reactions,verbose_I);
+            return;
+
         for k,v in self.inconsistent_reactions.items():
             #remove the reaction from the model
             if v['gr_ratio'] > 0.0:
@@ -1855,17 +1212,26 @@ class thermodynamics_dG_r_data(thermodynamics_io):
                     cobra_model_irreversible.reactions.get_by_id(k).upper_bound = ub;
                     cobra_model_irreversible.reactions.get_by_id(k).lower_bound = lb;
 
-    def remove_infeasibleReactions(self,cobra_model,solver=None):
+    def remove_infeasibleReactions(self,cobra_model,solver=None,batch_I=False):
         """remove thermodynamically infeasible reactions
         that do not impact growth
 
         Args:
             cobra_model
+            batch_I (boolean): remove all reactions at once and bisect
+                only if growth is abolished (see _bisect_infeasibleReactions)
 
         Returns:
             cobra_model with reactions removed
         """
 
+        if batch_I:
+            if solver: cobra_model.solver = solver;
+            reactions_id_I = [k for k,v in self.inconsistent_reactions.items() if v['gr_ratio'] > 0.0];
+            self._bisect_infeasibleReactions(cobra_model,reactions_id_I,
+                self._remove_reactions,True);
+            return;
+
         for k,v in self.inconsistent_reactions.items():
             #remove the reaction from the model
             if v['gr_ratio'] > 0.0:
@@ -1877,6 +1243,61 @@ class thermodynamics_dG_r_data(thermodynamics_io):
                     print(rxn.id + ' broke the model!');
                     cobra_model.add_reaction(rxn);
 
+    def _constrain_reactions(self,cobra_model,reactions_id_I):
+        """constrain reactions to their thermodynamically determined direction"""
+        for rxn_id in reactions_id_I:
+            rxn = cobra_model.reactions.get_by_id(rxn_id);
+            # check that the lower bounds are not higher than the upper bounds
+            if rxn.lower_bound>0.0:
+                rxn.lower_bound = 0.0;
+            rxn.upper_bound = 0.0;
+
+    def _remove_reactions(self,cobra_model,reactions_id_I):
+        """remove reactions from the model"""
+        cobra_model.remove_reactions([cobra_model.reactions.get_by_id(rxn_id) for rxn_id in reactions_id_I]);
+
+    def _bisect_infeasibleReactions(self,cobra_model,reactions_id_I,change_func,verbose_I=False):
+        """apply a change to as many reactions as possible without abolishing growth
+
+        All reactions are changed at once. If growth is abolished, the reactions
+        are split in half and each half is tried in turn (first half first),
+        keeping the changes that do not abolish growth.
+
+        Args:
+            cobra_model (cobra.Model)
+            reactions_id_I (list): reaction ids in the order they would be changed one at a time
+            change_func (function): change_func(cobra_model, reaction_ids)
+            verbose_I (boolean): print the reactions that broke the model
+
+        Returns:
+            list: reactions_O: ids of the reactions that were changed
+
+        NOTES:
+          as each change only removes flux solutions, the result is the same as
+          changing the reactions one at a time in the given order
+          and keeping those that do not abolish growth
+        """
+
+        reactions_O = [];
+        stack = [list(reactions_id_I)];
+        while stack:
+            rxns = stack.pop();
+            if not rxns: continue;
+            # test the change without modifying the model
+            with cobra_model:
+                change_func(cobra_model,rxns);
+                gr = cobra_model.slim_optimize(error_value=0.0);
+            if gr:
+                change_func(cobra_model,rxns);
+                reactions_O.extend(rxns);
+            elif len(rxns) == 1:
+                if verbose_I: print(rxns[0] + ' broke the model!');
+            else:
+                mid = len(rxns)//2;
+                stack.append(rxns[mid:]);
+                stack.append(rxns[:mid]);
+        return reactions_O;
+
     def change_feasibleReactions(self,infeasible_reactions_I):
         """change thermodynamically feasible reactions
         to thermodynamically infeasible
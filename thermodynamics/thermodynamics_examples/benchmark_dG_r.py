@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Dependencies from cobra
+from cobra.io import read_sbml_model
+
+# Other dependencies
+import time
+import numpy
+
+# Dependencies from thermodynamics
+from thermodynamics.thermodynamics_simulatedData import thermodynamics_simulatedData
+from thermodynamics.thermodynamics_metabolomicsData import thermodynamics_metabolomicsData
+from thermodynamics.thermodynamics_otherData import thermodynamics_otherData
+from thermodynamics.thermodynamics_dG_f_data import thermodynamics_dG_f_data
+from thermodynamics.thermodynamics_dG_r_data import thermodynamics_dG_r_data
+
+from . import data_dir
+
+def _main_(condition_I = 'oxic', n_repeats_I = 3):
+    """compare the v1/v2/v3 lb/ub methods of thermodynamics_dG_r_data
+    on iJO1366 using the aerobicAnaerobic01_geo data
+
+    Args:
+        condition_I (str): 'oxic' or 'anoxic'
+        n_repeats_I (int): number of timing repeats
+
+    Returns:
+        dict: results_O: {method: {'dG0_r': float (s), 'dG_r': float (s), 'displacement': float (s),
+                                   'tcc': thermodynamic_consistency_check}}
+    """
+
+    ##PART 1: load the model and data
+    #-------
+    data_geo = data_dir + 'aerobicAnaerobic01_geo/'
+    cobra_model = read_sbml_model(data_dir + 'iJO1366.xml')
+
+    simulated_data = thermodynamics_simulatedData()
+    simulated_data.import_fva_data(data_geo + 'aerobicAnaerobic01_fva_' + condition_I + '.json')
+
+    other_data = thermodynamics_otherData()
+    other_data.load_defaultData()
+    other_data.check_data()
+
+    dG_f_data = thermodynamics_dG_f_data(id2KEGGID_filename_I=data_dir + 'id2KEGGID.csv')
+    dG_f_data.import_dG_f(data_geo + 'aerobicAnaerobic01_dG_f01.json')
+    dG_f_data.format_dG_f()
+    dG_f_data.generate_estimated_dG_f(cobra_model)
+
+    metabolomics_data = thermodynamics_metabolomicsData()
+    metabolomics_data.import_metabolomics_data(data_geo + 'aerobicAnaerobic01_' + condition_I + '_geo01.json')
+    metabolomics_data.format_metabolomics_data()
+    metabolomics_data.generate_estimated_metabolomics_data(cobra_model)
+
+    ##PART 2: time each method
+    #-------
+    results_O = {};
+    for method in ['v1','v2','v3']:
+        tcc = thermodynamics_dG_r_data()
+        timings = {'dG0_r':[],'dG_r':[],'displacement':[]};
+        for i in range(n_repeats_I):
+            start = time.time();
+            tcc.calculate_dG0_r(cobra_model, dG_f_data.measured_dG_f, dG_f_data.estimated_dG_f,
+                other_data.temperature, bounds_method_I = method);
+            timings['dG0_r'].append(time.time()-start);
+            start = time.time();
+            tcc.calculate_dG_r(cobra_model, metabolomics_data.measured_concentrations,
+                metabolomics_data.estimated_concentrations,
+                other_data.pH, other_data.ionic_strength, other_data.temperature,
+                bounds_method_I = method);
+            timings['dG_r'].append(time.time()-start);
+            start = time.time();
+            tcc.calculate_displacement(cobra_model, metabolomics_data.measured_concentrations,
+                metabolomics_data.estimated_concentrations, bounds_method_I = method);
+            timings['displacement'].append(time.time()-start);
+        tcc.check_thermodynamicConsistency(cobra_model, simulated_data.fva_data,
+            metabolomics_data.measured_concentrations, metabolomics_data.estimated_concentrations,
+            other_data.pH, other_data.ionic_strength, other_data.temperature);
+        results_O[method] = {k:min(v) for k,v in timings.items()};
+        results_O[method]['dG0_r_data'] = tcc.dG0_r;
+        results_O[method]['dG_r_data'] = tcc.dG_r;
+        results_O[method]['tcc'] = tcc.thermodynamic_consistency_check;
+
+    ##PART 3: report the runtimes and the differences to v1
+    #-------
+    rxn_ids = [r.id for r in cobra_model.reactions];
+    print('method\tdG0_r (s)\tdG_r (s)\tdisplacement (s)');
+    for method in ['v1','v2','v3']:
+        print('%s\t%.4f\t%.4f\t%.4f' %(method,results_O[method]['dG0_r'],
+            results_O[method]['dG_r'],results_O[method]['displacement']));
+    print('method\tdG_r_lb max|diff|\tdG_r_ub max|diff|\t# lb>ub\t# infeasible\t# changed feasibility');
+    for method in ['v1','v2','v3']:
+        dG_r_lb = numpy.array([results_O[method]['dG_r_data'][r]['dG_r_lb'] for r in rxn_ids]);
+        dG_r_ub = numpy.array([results_O[method]['dG_r_data'][r]['dG_r_ub'] for r in rxn_ids]);
+        dG_r_lb_v1 = numpy.array([results_O['v1']['dG_r_data'][r]['dG_r_lb'] for r in rxn_ids]);
+        dG_r_ub_v1 = numpy.array([results_O['v1']['dG_r_data'][r]['dG_r_ub'] for r in rxn_ids]);
+        n_infeasible = len([r for r in rxn_ids if not results_O[method]['tcc'][r]]);
+        n_changed = len([r for r in rxn_ids if results_O[method]['tcc'][r] != results_O['v1']['tcc'][r]]);
+        print('%s\t%.4f\t%.4f\t%d\t%d\t%d' %(method,
+            numpy.max(numpy.abs(dG_r_lb-dG_r_lb_v1)),numpy.max(numpy.abs(dG_r_ub-dG_r_ub_v1)),
+            numpy.sum(dG_r_lb>dG_r_ub),n_infeasible,n_changed));
+    return results_O;
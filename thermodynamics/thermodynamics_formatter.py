@@ -5,6 +5,9 @@ import json, csv
 from math import sqrt,exp,pow
 from numpy import average, var, log
 
+from .thermodynamics_io import generalize_compartments2all
+from .thermodynamics_metabolomicsData import convert_cv2concentrations
+
 def convert_fluxBounds2var(flux_bounds):
     """convert flux bounds from FVA to median and variance
     
@@ -44,10 +47,11 @@ def convert_cv2varAndmM2M_concentrations(measured_values):
             'concentration_var': float,
             'concentration_units': 'M'}
     """
+    keys = list(measured_values.keys())
+    conc = convert_cv2concentrations([measured_values[k]['concentration'] for k in keys],
+        [measured_values[k]['concentration_cv'] for k in keys]);
     measured_values_O = {};
-    for k,v in measured_values.items():
-         concM = v['concentration']*1e-3;
-         concMvar = v['concentration_cv']/100*(v['concentration']*1e-3)*v['concentration_cv']/100*(v['concentration']*1e-3);
+    for k,concM,concMvar in zip(keys,conc['concentration'].tolist(),conc['concentration_var'].tolist()):
          measured_values_O[k + '_c'] = {'concentration': concM,
                                              'concentration_var': concMvar,
                                              'concentration_units': 'M'}
@@ -93,12 +97,11 @@ def convert_cv2lbubAndmM2M_concentrations(measured_values,min_value):
             'concentration_ub': float,
             'concentration_units': 'M'}
     """
+    keys = list(measured_values.keys())
+    conc = convert_cv2concentrations([measured_values[k]['concentration'] for k in keys],
+        [measured_values[k]['concentration_cv'] for k in keys]);
     measured_values_O = {};
-    for k,v in measured_values.items():
-         concMlb = 0.0;
-         concMub = 0.0;
-         concMlb = v['concentration']*1e-3 - v['concentration_cv']/100*(v['concentration']*1e-3);
-         concMub = v['concentration']*1e-3 + v['concentration_cv']/100*(v['concentration']*1e-3);
+    for k,concMlb,concMub in zip(keys,conc['concentration_lb'].tolist(),conc['concentration_ub'].tolist()):
          if concMlb<0: concMlb = min_value;
          measured_values_O[k + '_c'] = {'concentration_lb': concMlb,
                                              'concentration_ub': concMub,
@@ -220,18 +223,10 @@ def generalize_compartmentLBUB2all_concentration(cobra_model, lbub=None, excepti
                                    'concentration_ub':0.01,
                                    'concentration_units':'M'};
 
-    default_values = {};
-    for m in cobra_model.metabolites:
-        default_values[m.id] = {'concentration_lb': lbub[m.compartment]['concentration_lb'],
-                               'concentration_ub': lbub[m.compartment]['concentration_ub'],
-                               'concentration_units': lbub[m.compartment]['concentration_units']};
-        if exceptions:        
-            for k,v in exceptions.items():
-                if k in m.id:
-                    default_values[m.id] = {'concentration_lb':v['concentration_lb'],
-                                   'concentration_ub':v['concentration_ub'],
-                                   'concentration_units':v['concentration_units']};
-    
+    default_values = generalize_compartments2all(cobra_model.metabolites, lbub,
+        ['concentration_lb','concentration_ub','concentration_units'],
+        exceptions);
+
     return default_values;
 
 def generalize_compartment2all_concentration(cobra_model, concentration=None, exceptions=None):
@@ -353,22 +348,10 @@ def generalize_compartment2all_concentration(cobra_model, concentration=None, ex
                                    'concentration_ub':sqrt(y)*conc,
                                    'concentration_units':'M'};
 
-    default_values = {};
-    for m in cobra_model.metabolites:
-        default_values[m.id] = {'concentration': concentration[m.compartment]['concentration'],
-                               'concentration_var': concentration[m.compartment]['concentration_var'],
-                               'concentration_lb': concentration[m.compartment]['concentration_lb'],
-                               'concentration_ub': concentration[m.compartment]['concentration_ub'],
-                               'concentration_units': concentration[m.compartment]['concentration_units']};
-        if exceptions:        
-            for k,v in exceptions.items():
-                if k in m.id:
-                    default_values[m.id] = {'concentration':v['concentration'],
-                                   'concentration_var':v['concentration_var'],
-                                   'concentration_lb':v['concentration_lb'],
-                                   'concentration_ub':v['concentration_ub'],
-                                   'concentration_units':v['concentration_units']};
-    
+    default_values = generalize_compartments2all(cobra_model.metabolites, concentration,
+        ['concentration','concentration_var','concentration_lb','concentration_ub','concentration_units'],
+        exceptions);
+
     return default_values;
 
 def generalize_compartmentLBUB2all_dG_f(cobra_model, lbub=None, exceptions=None):
@@ -395,18 +378,10 @@ def generalize_compartmentLBUB2all_dG_f(cobra_model, lbub=None, exceptions=None)
             lbub[c] = {'dG_f_lb':0.0,
                                    'dG_f_ub':0.0,
                                    'dG_f_units':'kJ/mol'};
-    default_values = {};
-    for m in cobra_model.metabolites:
-        default_values[m.id] = {'dG_f_lb': lbub[m.compartment]['dG_f_lb'],
-                               'dG_f_ub': lbub[m.compartment]['dG_f_ub'],
-                               'dG_f_units': lbub[m.compartment]['dG_f_units']};
-        if exceptions:    
-            for k,v in exceptions.items():
-                if k in m.id:
-                    default_values[m.id] = {'dG_f_lb':v['dG_f_lb'],
-                                   'dG_f_ub':v['dG_f_ub'],
-                                   'dG_f_units':v['dG_f_units']};
-    
+    default_values = generalize_compartments2all(cobra_model.metabolites, lbub,
+        ['dG_f_lb','dG_f_ub','dG_f_units'],
+        exceptions);
+
     return default_values;
 
 def generalize_compartment2all_dG_f(cobra_model, dG_f=None, exceptions=None):
@@ -440,20 +415,11 @@ def generalize_compartment2all_dG_f(cobra_model, dG_f=None, exceptions=None):
                                    'dG_f_var':1e12, # based on the convention described in
                                                    # doi:10.1371/journal.pcbi.1003098
                                    'dG_f_units':'kJ/mol'};
-    default_values = {};
-    for m in cobra_model.metabolites:
-        default_values[m.id] = {'dG_f': dG_f[m.compartment]['dG_f'],
-                               'dG_f_var': dG_f[m.compartment]['dG_f_var'],
-                               'dG_f_lb': dG_f[m.compartment]['dG_f'] - sqrt(dG_f[m.compartment]['dG_f_var']),
-                               'dG_f_ub': dG_f[m.compartment]['dG_f'] + sqrt(dG_f[m.compartment]['dG_f_var']),
-                               'dG_f_units': dG_f[m.compartment]['dG_f_units']};
-        if exceptions:    
-            for k,v in exceptions.items():
-                if k in m.id:
-                    default_values[m.id] = {'dG_f':v['dG_f'],
-                                   'dG_f_var':v['dG_f_var'],
-                                   'dG_f_lb':v['dG_f_lb'],
-                                   'dG_f_ub':v['dG_f_ub'],
-                                   'dG_f_units':v['dG_f_units']};
-    
+    # the lower and upper bounds are estimated from the variance
+    dG_f = {c:dict(v,dG_f_lb=v['dG_f'] - sqrt(v['dG_f_var']),
+        dG_f_ub=v['dG_f'] + sqrt(v['dG_f_var'])) for c,v in dG_f.items()};
+    default_values = generalize_compartments2all(cobra_model.metabolites, dG_f,
+        ['dG_f','dG_f_var','dG_f_lb','dG_f_ub','dG_f_units'],
+        exceptions);
+
     return default_values;
\ No newline at end of file
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """helper functions for generating thermodynamic analysis input"""
 
-import json, csv
+import json, csv, re
 from math import sqrt,exp,pow
 
 class thermodynamics_io:
@@ -9,7 +9,8 @@ class thermodynamics_io:
 
     def import_values_json(self, filename):
         """import values from a json file"""
-        data = json.load(open(filename))
+        with open(filename) as infile:
+            data = json.load(infile)
         return data;
 
     def export_values_json(self, filename, data):
@@ -68,6 +69,61 @@ def checkInput_dG_f(measured_values_I):
 
 def import_values_json(filename):
     """import values from a json file"""
-    data = json.load(open(filename))
+    with open(filename) as infile:
+        data = json.load(infile)
     return data;
 
+class exceptionMatcher():
+    """match metabolite ids against exceptions given as substrings of the id
+
+    equivalent to
+        for k in exceptions: if k in metabolite.id: match = k
+    i.e., the last matching exception (in dict order) wins,
+    but all exceptions are checked with a single compiled regex
+    """
+
+    def __init__(self, exceptions_I):
+        self.priority = {k:i for i,k in enumerate(exceptions_I)}
+        # the highest priority alternative is tried first at each position
+        alternatives = '|'.join(re.escape(k) for k in reversed(list(self.priority.keys())))
+        self.pattern = re.compile(alternatives)
+        self.pattern_all = re.compile('(?=(' + alternatives + '))')
+
+    def match(self, id_I):
+        """return the exception that applies to id_I (None if no exception matches)"""
+        if not self.priority: return None
+        matches = [m.group(1) for m in self.pattern_all.finditer(id_I)]
+        return max(matches,key=self.priority.get) if matches else None
+
+def generalize_compartments2all(metabolites_I, compartment_values_I, keys_I, exceptions_I=None, compartments_I=None):
+    """fill the values of each metabolite from the values of its compartment
+
+    Args:
+        metabolites_I (list): Metabolite objects
+        compartment_values_I (dict): compartment: {key: value}
+        keys_I (list): keys to copy from the compartment and exception values
+        exceptions_I (dict): metabolite.id substring: {key: value}
+            (see exceptionMatcher)
+        compartments_I (list): compartments to include (default: all)
+
+    Returns:
+        dict: values_O: metabolite.id: {key: value}
+    """
+    matcher = exceptionMatcher(exceptions_I) if exceptions_I else None
+    search = matcher.pattern.search if matcher and matcher.priority else None
+    templates = {}
+    exception_templates = {}
+    values_O = {}
+    for m in metabolites_I:
+        c = m.compartment
+        if compartments_I is not None and not c in compartments_I: continue
+        template = templates.get(c)
+        if template is None:
+            template = templates[c] = {k:compartment_values_I[c][k] for k in keys_I}
+        if search is not None and search(m.id) is not None:
+            k = matcher.match(m.id)
+            if not k in exception_templates:
+                exception_templates[k] = {key:exceptions_I[k][key] for key in keys_I}
+            template = exception_templates[k]
+        values_O[m.id] = template.copy()
+    return values_O
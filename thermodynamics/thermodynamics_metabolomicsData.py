@@ -1,11 +1,70 @@
 
 # -*- coding: utf-8 -*-
 import json, csv
+import itertools
 from math import sqrt,exp,pow
 from numpy import average, var, log
 from copy import copy
-
-from .thermodynamics_io import thermodynamics_io
+import numpy
+
+from .thermodynamics_io import thermodynamics_io, generalize_compartments2all
+
+# conversion factors to M
+concentration_units = {'M':1.0,'mM':1.0e-3,'uM':1.0e-6,'nM':1.0e-9}
+
+def convert_cv2concentrations(concentration_I, cv_I, units_I='mM'):
+    """convert concentrations with a coefficient of variation (CV = SD/Ave*100) to M
+
+    Args:
+        concentration_I (array-like): concentrations
+        cv_I (array-like): coefficients of variation (%)
+        units_I (str): units of concentration_I (see concentration_units)
+
+    Returns:
+        dict: {'concentration','concentration_var','concentration_lb','concentration_ub': numpy.array}
+            lb = ave - SD (may be negative), ub = ave + SD
+    """
+    concM = numpy.asarray(concentration_I,dtype=float)*concentration_units[units_I]
+    concMsd = numpy.asarray(cv_I,dtype=float)/100*concM
+    return {'concentration':concM,
+            'concentration_var':concMsd*numpy.asarray(cv_I,dtype=float)/100*concM,
+            'concentration_lb':concM - concMsd,
+            'concentration_ub':concM + concMsd}
+
+def aggregate_replicates(replicates_I, units_I='mM'):
+    """geometric mean, geometric variance, and lb/ub of replicate concentrations
+
+    Args:
+        replicates_I (array-like): replicate concentrations
+            (metabolites x replicates or samples x metabolites x replicates);
+            missing values are given as nan
+        units_I (str): units of replicates_I (see concentration_units)
+
+    Returns:
+        dict: {'concentration','concentration_var','concentration_lb','concentration_ub',
+               'n_replicates': numpy.array (metabolites or samples x metabolites)}
+
+    NOTES:
+      concentrations are converted to M
+      concentration = exp(ave(ln(x)))
+      concentration_var = exp(var(ln(x)))
+      lb/ub = exp(ave(ln(x)) -/+ SD(ln(x)))
+      missing and non-positive replicates are ignored;
+      metabolites without replicates are nan
+    """
+    x = numpy.asarray(replicates_I,dtype=float)*concentration_units[units_I]
+    valid = x > 0
+    n = valid.sum(axis=-1)
+    with numpy.errstate(divide='ignore',invalid='ignore'):
+        ln_x = numpy.where(valid,numpy.log(numpy.where(valid,x,1.0)),0.0)
+        ln_ave = ln_x.sum(axis=-1)/n
+        ln_var = (numpy.where(valid,ln_x - ln_ave[...,None],0.0)**2).sum(axis=-1)/n
+    ln_sd = numpy.sqrt(ln_var)
+    return {'concentration':numpy.exp(ln_ave),
+            'concentration_var':numpy.exp(ln_var),
+            'concentration_lb':numpy.exp(ln_ave - ln_sd),
+            'concentration_ub':numpy.exp(ln_ave + ln_sd),
+            'n_replicates':n}
 
 class thermodynamics_metabolomicsData(thermodynamics_io):
     """Class to handle metabolomics data"""
@@ -22,6 +81,7 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
             self.estimated_concentrations = {}
         self.measured_concentrations_intracellular = {}
         self.measured_concentrations_extracellular = {}
+        self.measured_concentrations_samples = []
 
     def import_metabolomics_data(self, concentration_filename_I): #deprecated
         """import measured values required for analysis"""
@@ -38,6 +98,82 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
 
         self.measured_concentrations_extracellular = self._checkInput_concentrations(self.import_values_json(concentration_filename_I));
         
+    def import_metabolomics_data_stream(self, concentration_filename_I, sample_column_I='sample_name',
+            met_column_I='met_id', chunk_size_I=10000):
+        """import measured values for many samples from a CSV or JSON-lines file
+
+        the file is read in chunks of rows, and the concentrations
+        of one sample at a time are kept in memory
+
+        Args:
+            concentration_filename_I (str): .csv file with a header,
+                or a JSON-lines file (one JSON object per row)
+                with one row per sample and metabolite:
+                sample_column_I, met_column_I, 'concentration', 'concentration_var',
+                'concentration_lb', 'concentration_ub', 'concentration_units'
+            sample_column_I (str): column of the sample names
+            met_column_I (str): column of the metabolite ids
+            chunk_size_I (int): number of rows to read at a time
+
+        Yields:
+            tuple: (sample_name, measured_values):
+                measured_values: {metabolite.id: {'concentration': float,
+                    'concentration_var': float,
+                    'concentration_lb': float,
+                    'concentration_ub': float,
+                    'concentration_units': 'M'}}
+                (see _checkInput_concentrations and _convert_metabolomics_names)
+
+        NOTES:
+          the rows of a sample are expected to be contiguous;
+          a sample that appears again later in the file is yielded again
+        """
+
+        sample_current = None
+        measured_values = {}
+        samples_done = set()
+        with open(concentration_filename_I) as infile:
+            if concentration_filename_I.endswith('.csv'):
+                rows = csv.DictReader(infile)
+            else:
+                rows = (json.loads(line) for line in infile if line.strip())
+            while True:
+                chunk = list(itertools.islice(rows,chunk_size_I))
+                if not chunk: break
+                for sample,sample_rows in itertools.groupby(chunk,key=lambda row: row[sample_column_I]):
+                    if sample != sample_current:
+                        if sample_current is not None:
+                            samples_done.add(sample_current)
+                            yield sample_current, measured_values
+                        if sample in samples_done:
+                            print('rows of sample ' + str(sample) + ' are not contiguous')
+                        sample_current = sample
+                        measured_values = {}
+                    chunk_values = {}
+                    for row in sample_rows:
+                        chunk_values[row[met_column_I]] = self._parse_concentration_row(row,
+                            [sample_column_I,met_column_I])
+                    measured_values.update(self._convert_metabolomics_names(
+                        self._checkInput_concentrations(chunk_values)))
+        if sample_current is not None:
+            yield sample_current, measured_values
+
+    def import_metabolomics_replicates(self, metabolite_ids_I, replicates_I, units_I='mM'):
+        """import measured replicates required for analysis
+
+        metabolites x replicates are imported as measured_concentrations;
+        samples x metabolites x replicates are imported as
+        measured_concentrations_samples (one measured_concentrations per sample)
+
+        see aggregate_replicates
+        """
+
+        measured_values = self._convert_replicates2concentrations(metabolite_ids_I, replicates_I, units_I);
+        if isinstance(measured_values,list):
+            self.measured_concentrations_samples = [self._checkInput_concentrations(v) for v in measured_values];
+        else:
+            self.measured_concentrations = self._checkInput_concentrations(measured_values);
+
     def format_metabolomics_data(self): #deprecated
         """format data"""
         
@@ -95,6 +231,21 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
                 print((str(k) + ' has invalid units of ' + str(v) + ' and will be ignored'))
         return measured_values_O;
 
+    def _parse_concentration_row(self, row_I, exclude_I=[]):
+        """convert a row of a concentration table to a concentration dict
+
+        concentration values given as strings (i.e., CSV) are converted to float
+        and empty values are omitted
+        """
+        value_O = {}
+        for k,v in row_I.items():
+            if k in exclude_I or v is None or v == '': continue
+            if k in ['concentration','concentration_var','concentration_lb','concentration_ub',
+                     'concentration_cv'] and isinstance(v,str):
+                v = float(v)
+            value_O[k] = v
+        return value_O
+
     def _convert_cv2varAndmM2M_concentrations(self, measured_values):
         """convered measured concentration values from mM to M
 
@@ -112,15 +263,59 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
                 'concentration_var': float,
                 'concentration_units': 'M'}
         """
+        keys = list(measured_values.keys())
+        conc = convert_cv2concentrations([measured_values[k]['concentration'] for k in keys],
+            [measured_values[k]['concentration_cv'] for k in keys]);
         measured_values_O = {};
-        for k,v in measured_values.items():
-             concM = v['concentration']*1e-3;
-             concMvar = v['concentration_cv']/100*(v['concentration']*1e-3)*v['concentration_cv']/100*(v['concentration']*1e-3);
+        for k,concM,concMvar in zip(keys,conc['concentration'].tolist(),conc['concentration_var'].tolist()):
              measured_values_O[k + '_c'] = {'concentration': concM,
                                                  'concentration_var': concMvar,
                                                  'concentration_units': 'M'}
         return measured_values_O
 
+    def _convert_replicates2concentrations(self, metabolite_ids_I, replicates_I, units_I='mM'):
+        """convert replicate concentrations to geometric means and variances in M
+
+        Args:
+            metabolite_ids_I (list): metabolite ids
+            replicates_I (array-like): replicate concentrations
+                (metabolites x replicates or samples x metabolites x replicates)
+                (see aggregate_replicates)
+            units_I (str): units of replicates_I
+
+        Returns:
+            dict: measured_values_O: {metabolite.id: {'concentration': float,
+                'concentration_var': float,
+                'concentration_lb': float,
+                'concentration_ub': float,
+                'concentration_units': 'M'}
+                or a list of measured_values_O (one for each sample)
+
+        NOTES:
+          metabolites without replicates are omitted
+        """
+        conc = aggregate_replicates(replicates_I, units_I);
+        keys = ['concentration','concentration_var','concentration_lb','concentration_ub']
+        if conc['n_replicates'].ndim == 1:
+            samples = [[conc[k].tolist() for k in keys] + [conc['n_replicates'].tolist()]]
+        else:
+            samples = [[conc[k][i].tolist() for k in keys] + [conc['n_replicates'][i].tolist()]
+                for i in range(conc['n_replicates'].shape[0])]
+        measured_values_O = [];
+        for sample in samples:
+            measured_values = {};
+            for met,ave,var_,lb,ub,n in zip(metabolite_ids_I,*sample):
+                if not n: continue
+                measured_values[met] = {'concentration': ave,
+                                        'concentration_var': var_,
+                                        'concentration_lb': lb,
+                                        'concentration_ub': ub,
+                                        'concentration_units': 'M'}
+            measured_values_O.append(measured_values)
+        if conc['n_replicates'].ndim == 1:
+            return measured_values_O[0]
+        return measured_values_O
+
     def _compartementalize_concentrations(self, measured_values):
         """add a compartment identifier to intracellular metabolites
 
@@ -182,12 +377,11 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
                 'concentration_var': float,
                 'concentration_units': 'M'}
         """
+        keys = list(measured_values.keys())
+        conc = convert_cv2concentrations([measured_values[k]['concentration'] for k in keys],
+            [measured_values[k]['concentration_cv'] for k in keys]);
         measured_values_O = {};
-        for k,v in measured_values.items():
-             concMlb = 0.0;
-             concMub = 0.0;
-             concMlb = v['concentration']*1e-3 - v['concentration_cv']/100*(v['concentration']*1e-3);
-             concMub = v['concentration']*1e-3 + v['concentration_cv']/100*(v['concentration']*1e-3);
+        for k,concMlb,concMub in zip(keys,conc['concentration_lb'].tolist(),conc['concentration_ub'].tolist()):
              if concMlb<0: concMlb = min_value;
              measured_values_O[k + '_c'] = {'concentration_lb': concMlb,
                                                  'concentration_ub': concMub,
@@ -240,18 +434,10 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
                                        'concentration_ub':0.01,
                                        'concentration_units':'M'};
 
-        default_values = {};
-        for m in cobra_model.metabolites:
-            default_values[m.id] = {'concentration_lb': lbub[m.compartment]['concentration_lb'],
-                                   'concentration_ub': lbub[m.compartment]['concentration_ub'],
-                                   'concentration_units': lbub[m.compartment]['concentration_units']};
-            if exceptions:        
-                for k,v in exceptions.items():
-                    if k in m.id:
-                        default_values[m.id] = {'concentration_lb':v['concentration_lb'],
-                                       'concentration_ub':v['concentration_ub'],
-                                       'concentration_units':v['concentration_units']};
-    
+        default_values = generalize_compartments2all(cobra_model.metabolites, lbub,
+            ['concentration_lb','concentration_ub','concentration_units'],
+            exceptions);
+
         return default_values;
 
     def _generalize_compartment2all_concentration(self, cobra_model, concentration=None, exceptions=None):
@@ -385,22 +571,10 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
                                        'concentration_ub':sqrt(y)*conc,
                                        'concentration_units':'M'};
 
-        default_values = {};
-        for m in cobra_model.metabolites:
-            default_values[m.id] = {'concentration': concentration[m.compartment]['concentration'],
-                                   'concentration_var': concentration[m.compartment]['concentration_var'],
-                                   'concentration_lb': concentration[m.compartment]['concentration_lb'],
-                                   'concentration_ub': concentration[m.compartment]['concentration_ub'],
-                                   'concentration_units': concentration[m.compartment]['concentration_units']};
-            if exceptions:        
-                for k,v in exceptions.items():
-                    if k in m.id:
-                        default_values[m.id] = {'concentration':v['concentration'],
-                                       'concentration_var':v['concentration_var'],
-                                       'concentration_lb':v['concentration_lb'],
-                                       'concentration_ub':v['concentration_ub'],
-                                       'concentration_units':v['concentration_units']};
-    
+        default_values = generalize_compartments2all(cobra_model.metabolites, concentration,
+            ['concentration','concentration_var','concentration_lb','concentration_ub','concentration_units'],
+            exceptions);
+
         return default_values;
 
     def _generalize_externalCompartments2all_concentration(self, cobra_model, concentration=None, exceptions=None):
@@ -531,23 +705,10 @@ class thermodynamics_metabolomicsData(thermodynamics_io):
                                        'concentration_ub':1.0,
                                        'concentration_units':'M'};
 
-        default_values = {};
-        for m in cobra_model.metabolites:
-            if m.compartment in compartments:
-                default_values[m.id] = {'concentration': concentration[m.compartment]['concentration'],
-                                       'concentration_var': concentration[m.compartment]['concentration_var'],
-                                       'concentration_lb': concentration[m.compartment]['concentration_lb'],
-                                       'concentration_ub': concentration[m.compartment]['concentration_ub'],
-                                       'concentration_units': concentration[m.compartment]['concentration_units']};
-                if exceptions:        
-                    for k,v in exceptions.items():
-                        if k in m.id:
-                            default_values[m.id] = {'concentration':v['concentration'],
-                                           'concentration_var':v['concentration_var'],
-                                           'concentration_lb':v['concentration_lb'],
-                                           'concentration_ub':v['concentration_ub'],
-                                           'concentration_units':v['concentration_units']};
-    
+        default_values = generalize_compartments2all(cobra_model.metabolites, concentration,
+            ['concentration','concentration_var','concentration_lb','concentration_ub','concentration_units'],
+            exceptions, compartments);
+
         return default_values;
 
     def _convert_metabolomics_names(self, measured_values):
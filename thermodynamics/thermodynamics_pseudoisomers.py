@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Legendre transform of pseudoisomer groups (Alberty, 2003)"""
+
+import numpy
+
+# same constants as component_contribution
+R = 8.31e-3 # kJ/(K*mol)
+default_T = 298.15 # K
+DH_A = 2.91482 # kJ/mol kg^0.5 mol^-0.5 (RT*alpha at default_T)
+DH_B = 1.6 # kg^0.5 mol^-0.5
+
+def debye_huckel(ionic_strength_I, temperature_I=None):
+    """Debye-Huckel term RT*ln(gamma)/z^2 (kJ/mol)
+
+    Args:
+        ionic_strength_I (float or numpy.array): ionic strength (M)
+        temperature_I (float or numpy.array): temperature (K)
+            None: the constant of component_contribution (DH_A) is used
+            otherwise: the temperature dependent coefficient of Alberty (2003)
+
+    NOTES:
+      both agree at default_T
+    """
+    if temperature_I is None:
+        alpha = DH_A
+    else:
+        alpha = 9.20483e-3*temperature_I - 1.284668e-5*temperature_I**2 + 4.95199e-8*temperature_I**3
+    sqrt_I = numpy.sqrt(ionic_strength_I)
+    return alpha*sqrt_I/(1.0 + DH_B*sqrt_I)
+
+def pack_pseudoisomers(ids_I, dG0_f_I, compounds_I):
+    """pack the pseudoisomers of each compound into flat arrays
+
+    Args:
+        ids_I (list): compound ids (e.g., KEGG ids)
+        dG0_f_I (list): dG0_f (kJ/mol) of the first species of each compound
+        compounds_I (dict): {compound id: {'pKas': list, 'nHs': list, 'zs': list}}
+            species ordered from the least to the most protonated
+            (pKas in descending order, as in the component_contribution compound cache)
+
+    Returns:
+        dict: pseudoisomers_O: {'ids': list (compounds that were packed),
+                                'dG0': numpy.array (species),
+                                'pKa_sum': numpy.array (species),
+                                'nH': numpy.array (species),
+                                'z': numpy.array (species),
+                                'offsets': numpy.array (compounds; index of the first species)}
+
+    NOTES:
+      compounds without pseudoisomer data are not packed
+      dG0 of species j = dG0_f - RT*ln(10)*pKa_sum_j at default_T,
+      where pKa_sum_j = SUM[pKa_k for k < j]
+      (see transform_pseudoisomers for other temperatures)
+    """
+
+    ids = []
+    dG0 = []
+    pKa_sum = []
+    nH = []
+    z = []
+    offsets = []
+    for cid,dG0_f in zip(ids_I,dG0_f_I):
+        if not cid in compounds_I: continue
+        compound = compounds_I[cid]
+        ids.append(cid)
+        offsets.append(len(dG0))
+        pKa_sum_c = numpy.cumsum([0.0] + list(compound['pKas']))
+        dG0.extend(dG0_f - pKa_sum_c*R*default_T*numpy.log(10))
+        pKa_sum.extend(pKa_sum_c)
+        nH.extend(compound['nHs'])
+        z.extend(compound['zs'])
+    pseudoisomers_O = {'ids':ids,
+                       'dG0':numpy.array(dG0,dtype=float),
+                       'pKa_sum':numpy.array(pKa_sum,dtype=float),
+                       'nH':numpy.array(nH,dtype=float),
+                       'z':numpy.array(z,dtype=float),
+                       'offsets':numpy.array(offsets,dtype=int)}
+    return pseudoisomers_O
+
+def select_pseudoisomers(pseudoisomers_I, ids_I):
+    """select the pseudoisomers of a subset of the packed compounds
+
+    Args:
+        pseudoisomers_I (dict): see pack_pseudoisomers
+        ids_I (list): compound ids to select (ids that were not packed are ignored)
+
+    Returns:
+        dict: pseudoisomers_O: see pack_pseudoisomers
+    """
+
+    ids_set = set(ids_I)
+    n_species = len(pseudoisomers_I['dG0'])
+    ends = list(pseudoisomers_I['offsets'][1:]) + [n_species]
+    ids = []
+    species = []
+    offsets = []
+    for cid,start,end in zip(pseudoisomers_I['ids'],pseudoisomers_I['offsets'],ends):
+        if not cid in ids_set: continue
+        ids.append(cid)
+        offsets.append(len(species))
+        species.extend(range(start,end))
+    species = numpy.array(species,dtype=int)
+    pseudoisomers_O = {'ids':ids,
+                       'dG0':pseudoisomers_I['dG0'][species],
+                       'pKa_sum':pseudoisomers_I['pKa_sum'][species],
+                       'nH':pseudoisomers_I['nH'][species],
+                       'z':pseudoisomers_I['z'][species],
+                       'offsets':numpy.array(offsets,dtype=int)}
+    return pseudoisomers_O
+
+def transform_pseudoisomers(pseudoisomers_I, pH_I, ionic_strength_I, temperature_I,
+                            temperature_dependent_I=False):
+    """transform packed pseudoisomers to the given pH, ionic strength, and temperature
+
+    dG0_j  = dG0_f - RT*ln(10)*pKa_sum_j
+    dG0'_j = dG0_j + nH_j*(RT*ln(10)*pH + DH) - z_j^2*DH
+    dG0'   = -RT*ln(SUM[exp(-dG0'_j/RT)])
+
+    as in component_contribution (compound._dG0_prime_vector and compound._transform)
+
+    Args:
+        pseudoisomers_I (dict): see pack_pseudoisomers
+        pH_I (float or numpy.array)
+        ionic_strength_I (float or numpy.array): ionic strength (M)
+        temperature_I (float or numpy.array): temperature (K)
+            arrays of conditions are broadcast against each other
+        temperature_dependent_I (boolean): use the temperature dependent Debye-Huckel
+            coefficient (default: the constant of component_contribution; see debye_huckel)
+
+    Returns:
+        numpy.array: dG0_prime_O: transformed dG0_f of each packed compound (kJ/mol)
+            (conditions x compounds if arrays of conditions are given)
+    """
+
+    scalar = numpy.ndim(pH_I) == numpy.ndim(ionic_strength_I) == numpy.ndim(temperature_I) == 0
+    pH,I,T = numpy.broadcast_arrays(numpy.atleast_1d(pH_I),numpy.atleast_1d(ionic_strength_I),
+        numpy.atleast_1d(temperature_I))
+    pH,I,T = pH.astype(float)[:,None],I.astype(float)[:,None],T.astype(float)[:,None]
+    offsets = pseudoisomers_I['offsets']
+    if not len(offsets):
+        dG0_prime_O = numpy.zeros((pH.shape[0],0))
+        return dG0_prime_O[0] if scalar else dG0_prime_O
+    RT = R*T
+    DH = debye_huckel(I,T if temperature_dependent_I else None)
+    dG0 = pseudoisomers_I['dG0'] + pseudoisomers_I['pKa_sum']*R*(default_T - T)*numpy.log(10)
+    dG0_prime = dG0 + pseudoisomers_I['nH']*(RT*numpy.log(10)*pH + DH) - \
+                pseudoisomers_I['z']**2*DH
+    # log-sum-exp over the species of each compound
+    x = -dG0_prime/RT
+    x_max = numpy.maximum.reduceat(x,offsets,axis=1)
+    n_species = numpy.diff(numpy.append(offsets,x.shape[1]))
+    x_sum = numpy.add.reduceat(numpy.exp(x - numpy.repeat(x_max,n_species,axis=1)),offsets,axis=1)
+    dG0_prime_O = -RT*(x_max + numpy.log(x_sum))
+    return dG0_prime_O[0] if scalar else dG0_prime_O
@@ -5,12 +5,132 @@ from cobra.flux_analysis import flux_variability_analysis
 from cobra.flux_analysis.single_deletion import single_reaction_deletion,single_gene_deletion
 from cobra.flux_analysis.parsimonious import optimize_minimal_flux
 from cobra.flux_analysis.loopless import construct_loopless_model
+from cobra.core.reaction import Reaction
+from cobra.util.solver import fix_objective_as_constraint
 
 import json, csv
-from math import sqrt,exp,pow
+import os
+import hashlib
+import multiprocessing
+from math import sqrt,exp,pow,fabs
+import numpy
 from numpy import average, var, log
 
 from .thermodynamics_io import thermodynamics_io
+from .thermodynamics_utility import make_stoichiometry, find_coupledReactions, invalidate_transportIndex
+
+def make_model_hash(cobra_model_I, genes_I=False):
+    """hash the stoichiometry, bounds, and objective of a model
+
+    Args:
+        cobra_model_I (cobra.Model)
+        genes_I (boolean): include the gene reaction rules
+
+    Returns:
+        str: md5 hexdigest
+    """
+
+    objective = getattr(cobra_model_I,'objective',None)
+    reactions = []
+    for rxn in sorted(cobra_model_I.reactions,key=lambda r: r.id):
+        reactions.append([rxn.id,rxn.lower_bound,rxn.upper_bound,rxn.objective_coefficient,
+            sorted([m.id,float(v)] for m,v in rxn.metabolites.items()),
+            rxn.gene_reaction_rule if genes_I else None])
+    model = {'reactions':reactions,
+             'objective_direction':getattr(objective,'direction','max')}
+    return hashlib.md5(json.dumps(model,sort_keys=True).encode('utf-8')).hexdigest()
+
+def calculate_fluxSum_bounds(S_I, lb_I, ub_I):
+    """calculate bounds on the flux-sum of each metabolite from bounds on the reaction fluxes
+
+    flux-sum = 0.5*SUM[|S_ij*v_j|] = SUM[production] = SUM[consumption] (at steady state)
+
+    Args:
+        S_I (scipy.sparse matrix): stoichiometric coefficients (reactions x metabolites)
+        lb_I (numpy.array): flux lower bounds (reactions)
+        ub_I (numpy.array): flux upper bounds (reactions)
+
+    Returns:
+        numpy.array: fluxSum_lb_O (metabolites)
+        numpy.array: fluxSum_ub_O (metabolites)
+
+    NOTES:
+      the maximum (minimum) production and consumption are found for each reaction
+      independently, so the bounds contain, but may be wider than, the exact range
+      a flux vector can be given with lb_I == ub_I
+    """
+
+    P = S_I.multiply(S_I > 0).tocsr()
+    N = -S_I.multiply(S_I < 0).tocsr()
+    ub_pos,ub_neg = numpy.maximum(ub_I,0.0),numpy.maximum(-ub_I,0.0)
+    lb_pos,lb_neg = numpy.maximum(lb_I,0.0),numpy.maximum(-lb_I,0.0)
+    production_max = P.T.dot(ub_pos) + N.T.dot(lb_neg)
+    consumption_max = N.T.dot(ub_pos) + P.T.dot(lb_neg)
+    production_min = P.T.dot(lb_pos) + N.T.dot(ub_neg)
+    consumption_min = N.T.dot(lb_pos) + P.T.dot(ub_neg)
+    fluxSum_lb_O = numpy.maximum(production_min,consumption_min)
+    fluxSum_ub_O = numpy.minimum(production_max,consumption_max)
+    return fluxSum_lb_O,fluxSum_ub_O
+
+def _optimize_fluxSum(cobra_model_I, coefficients_I):
+    """minimize and maximize the flux-sum of a single metabolite
+
+    Args:
+        cobra_model_I (cobra.Model)
+        coefficients_I (dict): {reaction.id: objective coefficient}
+
+    NOTES:
+      the objective is reverted when leaving the model context;
+      the solver problem is reused between calls so that the previous
+      solution warm-starts the next
+    """
+    with cobra_model_I:
+        cobra_model_I.objective = {cobra_model_I.reactions.get_by_id(k):v
+            for k,v in coefficients_I.items()}
+        cobra_model_I.objective.direction = 'min'
+        lb = cobra_model_I.slim_optimize(error_value=float('nan'))
+        cobra_model_I.objective.direction = 'max'
+        ub = cobra_model_I.slim_optimize(error_value=float('nan'))
+    return lb,ub
+
+_fluxSum_model = None # model used by the worker processes
+
+def _init_fluxSum_worker(cobra_model_I):
+    """store the model in the worker process"""
+    global _fluxSum_model
+    _fluxSum_model = cobra_model_I
+
+def _fluxSum_worker(item_I):
+    """minimize and maximize the flux-sum of a single metabolite in a worker process"""
+    met_id,coefficients = item_I
+    return met_id, _optimize_fluxSum(_fluxSum_model, coefficients)
+
+def _delete(cobra_model_I, id_I, genes_I=False):
+    """simulate growth with a single reaction (or gene) knocked out
+
+    NOTES:
+      the bound changes are reverted when leaving the model context
+      (see thermodynamics_tfba._delete_reaction)
+    """
+    with cobra_model_I:
+        if genes_I:
+            cobra_model_I.genes.get_by_id(id_I).knock_out()
+        else:
+            cobra_model_I.reactions.get_by_id(id_I).knock_out()
+        gr = cobra_model_I.slim_optimize(error_value=float('nan'))
+    return gr
+
+_deletion_model = None # model used by the worker processes
+
+def _init_deletion_worker(cobra_model_I):
+    """store the model in the worker process"""
+    global _deletion_model
+    _deletion_model = cobra_model_I
+
+def _deletion_worker(item_I):
+    """simulate a single reaction (or gene) deletion in a worker process"""
+    id_I,genes_I = item_I
+    return id_I, _delete(_deletion_model, id_I, genes_I)
 
 class thermodynamics_simulatedData(thermodynamics_io):
     """Class to generate and handle COBRA simulated data"""
@@ -19,7 +139,8 @@ class thermodynamics_simulatedData(thermodynamics_io):
                  sra_data_I={},
                  sga_data_I={},
                  fba_primal_data_I={},
-                 fba_dual_data_I={}):
+                 fba_dual_data_I={},
+                 cache_dir_I=None):
         if fva_data_I:
             self.fva_data = self._convert_fluxBounds2var(fva_data_I)
         else:
@@ -37,49 +158,172 @@ class thermodynamics_simulatedData(thermodynamics_io):
         else:
             self.fba_dual_data = {}
         if sga_data_I:
-            self.sga_data = sra_data_I
+            self.sga_data = sga_data_I
         else:
             self.sga_data = {}
+        self.cache_dir = cache_dir_I # directory of the deletion results cache (None: no cache)
+        self.blocked_reactions = [] # see reduce_model
+        self.reduced_mapping = {} # {reduced reaction.id: {reaction.id: ratio}}
+        self.fluxSum_data = {} # see generate_fluxSum_data
 
     def check_data(self):
         """check data integrity"""
         return
 
     def generate_sra_data(self, cobra_model, reaction_list=None,
-                            method_I='fba', solver='glpk', verbose_I=True):
+                            method_I='fba', solver='glpk', verbose_I=True, processes_I=1):
         """Single reaction deletion analysis
 
         Args:
             cobra_model (cobra.Model): cobra model object
             reaction_list (list(cobra.Reaction)): list of cobra model reactions to use with SRA
+                (default: all reactions)
             method_I (string): 'fba', 'moma'
             solver (string): default = 'glpk'
             verbose_I (boolean): print messages to the console
+            processes_I (int): number of processes for 'fba' (default: 1; None: all cpus)
+
+        NOTES:
+          if self.cache_dir is set, the results are cached by a hash of the
+          stoichiometry, bounds, and objective of the model (see make_model_hash)
+          'fba' deletions are simulated with the solver of the model (see _optimize_deletions);
+          other methods use cobra.flux_analysis.single_reaction_deletion
         """
         if verbose_I:
             print('Single Reaction Deletion...')
 
+        cache_filename = self._get_cache_filename('sra', make_model_hash(cobra_model),
+            method_I, [getattr(r,'id',r) for r in reaction_list] if reaction_list else None)
+        sra_data = self._import_cache(cache_filename)
+        if sra_data is not None:
+            self.sra_data.update(sra_data)
+            return
+
         # single reaction deletion
         cobra_model.solver = solver
-        single_reaction_deletions = single_reaction_deletion(cobra_model,
-                        #reaction_list=reaction_list,
-                        method=method_I
-                        )
+        if method_I == 'fba':
+            reaction_ids = [getattr(r,'id',r) for r in reaction_list] if reaction_list \
+                else [r.id for r in cobra_model.reactions]
+            single_reaction_deletions = self._optimize_deletions(cobra_model,
+                reaction_ids, False, processes_I)
+        else:
+            single_reaction_deletions = self._read_deletions(single_reaction_deletion(cobra_model,
+                            reaction_list=reaction_list,
+                            method=method_I
+                            ))
 
         # FBA
         cobra_model.optimize()
 
-        # for k,v in single_reaction_deletions[0].items():
-        #     self.sra_data[k] = {'gr':None,'gr_ratio':None,'method':method_I}
-        #     if v:
-        #         self.sra_data[k] = {'gr':v,'gr_ratio':v/cobra_model.objective.value}
-        for i in range(len(single_reaction_deletions.index)):
-            self.sra_data[single_reaction_deletions.index[i]] = {'gr':None,'gr_ratio':None,'method':method_I}
-            if single_reaction_deletions.flux[i]:
-                self.sra_data[single_reaction_deletions.index[i]] = {
-                    'gr':single_reaction_deletions.flux[i],
-                    'gr_ratio':single_reaction_deletions.flux[i]/cobra_model.objective.value}
+        sra_data = self._convert_deletions(single_reaction_deletions,
+            cobra_model.objective.value, method_I)
+        self._export_cache(cache_filename, sra_data)
+        self.sra_data.update(sra_data)
+
+    def _convert_deletions(self, gr_I, gr_original_I, method_I):
+        """convert the single deletion growth rates to {id: {'gr','gr_ratio'}}
+
+        Args:
+            gr_I (dict): {id: growth rate (nan if infeasible)}
+            gr_original_I (float): growth rate of the original model
+            method_I (str)
+        """
+        data_O = {}
+        for k,v in gr_I.items():
+            data_O[k] = {'gr':None,'gr_ratio':None,'method':method_I}
+            if v:
+                data_O[k] = {'gr':v,'gr_ratio':v/gr_original_I}
+        return data_O
+
+    def _read_deletions(self, deletions_I):
+        """read the growth rates of cobra single deletion results
+
+        Args:
+            deletions_I (pandas.DataFrame): single deletion results
+                (cobra<0.11: index: id, column: 'flux';
+                 cobra>=0.11: index or column 'ids': frozenset of ids, column: 'growth')
+
+        Returns:
+            dict: {id: growth rate}
+        """
+        if 'ids' in deletions_I.columns:
+            deletions_I = deletions_I.set_index('ids')
+        column = 'growth' if 'growth' in deletions_I.columns else 'flux'
+        gr_O = {}
+        for k,v in deletions_I[column].items():
+            if isinstance(k,(frozenset,set)):
+                k, = k
+            gr_O[k] = v
+        return gr_O
+
+    def _optimize_deletions(self, cobra_model, ids_I, genes_I=False, processes_I=1):
+        """simulate the single deletion of each reaction (or gene) by FBA
+
+        Args:
+            cobra_model (cobra.Model)
+            ids_I (list): reaction (or gene) ids
+            genes_I (boolean): ids_I are gene ids
+            processes_I (int): number of processes (default: 1; None: all cpus)
 
+        Returns:
+            dict: {id: growth rate (nan if infeasible)} in the order of ids_I
+
+        NOTES:
+          the model is sent once to each process (see _optimize_fluxSums)
+        """
+        processes_I = min(self._get_processes(processes_I),len(ids_I))
+        if processes_I > 1:
+            chunksize = max(1,len(ids_I)//(processes_I*4))
+            pool = multiprocessing.Pool(processes_I,
+                initializer=_init_deletion_worker, initargs=(cobra_model,))
+            try:
+                gr = dict(pool.imap_unordered(_deletion_worker,
+                    [(k,genes_I) for k in ids_I],chunksize=chunksize))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            gr = {k:_delete(cobra_model,k,genes_I) for k in ids_I}
+        return {k:gr[k] for k in ids_I}
+
+    def _get_processes(self, processes_I):
+        """get the number of processes (None: all cpus)"""
+        if processes_I is None:
+            processes_I = multiprocessing.cpu_count()
+        return processes_I
+
+    def _get_cache_filename(self, analysis_I, model_hash_I, method_I, ids_I=None):
+        """get the cache filename of an analysis (None if no cache_dir is set)
+
+        the filename is keyed by the model hash, the method,
+        and the reactions or genes that were deleted
+        """
+        if not self.cache_dir:
+            return None
+        key = hashlib.md5(json.dumps([model_hash_I,method_I,
+            sorted(ids_I) if ids_I is not None else None]).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, analysis_I + '_' + key + '.json')
+
+    def _import_cache(self, filename_I):
+        """import cached results (None if not cached)"""
+        if filename_I is None or not os.path.exists(filename_I):
+            return None
+        with open(filename_I) as infile:
+            return json.load(infile)
+
+    def _export_cache(self, filename_I, data_I):
+        """export results to the cache
+
+        the results are written to a temporary file that replaces filename_I
+        when complete, so that a partially written cache is never read
+        """
+        if filename_I is None:
+            return
+        os.makedirs(os.path.dirname(filename_I), exist_ok=True)
+        filename_tmp = filename_I + '.tmp'
+        with open(filename_tmp, 'w') as outfile:
+            json.dump(data_I, outfile)
+        os.replace(filename_tmp, filename_I)
 
     def export_sra_data(self, filename):
         """export sra data"""
@@ -162,31 +406,53 @@ class thermodynamics_simulatedData(thermodynamics_io):
             self.fba_dual_data[k] = v
 
     def generate_sga_data(self, cobra_model, gene_list=None,
-                            method_I='fba', solver='glpk'):
+                            method_I='fba', solver='glpk', verbose_I=True, processes_I=1):
         """Single gene deletion analysis
         
         Args:
-            gene_list (list): list of genes
+            gene_list (list): list of genes (default: all genes)
             method_I (str): 'fba', 'moma'
+            solver (string): default = 'glpk'
+            verbose_I (boolean): print messages to the console
+            processes_I (int): number of processes for 'fba' (default: 1; None: all cpus)
+
+        NOTES:
+          if self.cache_dir is set, the results are cached by a hash of the
+          stoichiometry, bounds, objective, and gene reaction rules of the model
+          'fba' deletions are simulated with the solver of the model (see _optimize_deletions);
+          other methods use cobra.flux_analysis.single_gene_deletion
         """
 
-        print('Single Reaction Deletion...')
+        if verbose_I:
+            print('Single Gene Deletion...')
+
+        cache_filename = self._get_cache_filename('sga', make_model_hash(cobra_model, genes_I=True),
+            method_I, [getattr(g,'id',g) for g in gene_list] if gene_list else None)
+        sga_data = self._import_cache(cache_filename)
+        if sga_data is not None:
+            self.sga_data.update(sga_data)
+            return
 
         # single gene deletion
-        single_gene_deletions = single_gene_deletion(cobra_model,
-                        #gene_list=gene_list,
-                        method=method_I,
-                        solver=solver
-                        )
+        cobra_model.solver = solver
+        if method_I == 'fba':
+            gene_ids = [getattr(g,'id',g) for g in gene_list] if gene_list \
+                else [g.id for g in cobra_model.genes]
+            single_gene_deletions = self._optimize_deletions(cobra_model,
+                gene_ids, True, processes_I)
+        else:
+            single_gene_deletions = self._read_deletions(single_gene_deletion(cobra_model,
+                            gene_list=gene_list,
+                            method=method_I
+                            ))
 
         # FBA
-        cobra_model.solver = solver
         cobra_model.optimize()
 
-        for k,v in single_gene_deletions[0].items():
-            self.sga_data[k] = {'gr':None,'gr_ratio':None,'method':method_I}
-            if v:
-                self.sga_data[k] = {'gr':v,'gr_ratio':v/cobra_model.objective.value}
+        sga_data = self._convert_deletions(single_gene_deletions,
+            cobra_model.objective.value, method_I)
+        self._export_cache(cache_filename, sga_data)
+        self.sga_data.update(sga_data)
 
     def export_sga_data(self, filename):
         """export sga data"""
@@ -197,12 +463,325 @@ class thermodynamics_simulatedData(thermodynamics_io):
         """import sga data"""
         self.sga_data = json.load(open(filename))
 
-    #TODO:
-    def reduce_model(self,cobra_model,method_I='fba',solver='glpk'):
-        """reduce the model"""
-        pass
-    def generate_fluxSum_data(self,cobra_model,method_I='fba',solver='glpk'):
+    def reduce_model(self,cobra_model,solver='glpk',threshold_I=1e-6,merge_coupled_I=True):
+        """reduce the model
+
+        1. remove the blocked reactions (i.e., |flux| < threshold_I in fva_data)
+        2. remove the orphan metabolites
+        3. merge fully coupled chains of reactions (i.e., reactions linked by
+           a metabolite that takes part in only those two reactions)
+           into a single lumped reaction
+           (see thermodynamics_utility.find_coupledReactions)
+
+        Args:
+            cobra_model (cobra.Model): cobra model object
+            solver (str): solver of the FVA used if fva_data is empty
+            threshold_I (float): largest absolute flux of a blocked reaction
+            merge_coupled_I (boolean): merge fully coupled chains
+
+        Returns:
+            cobra.Model: reduced_model: reduced copy of the model
+
+        NOTES:
+          if fva_data is empty, the blocked reactions are found by FVA with fraction_of_optimum=0.0
+          the mapping of the reactions of the reduced model to the original reactions
+          is stored in reduced_mapping: {reduced reaction.id: {reaction.id: ratio}}
+          where flux(reaction.id) = ratio*flux(reduced reaction.id)
+          (see expand_reduced_fluxes and reduce_dG_r)
+        """
+
+        # find the blocked reactions
+        fva_data = self.fva_data
+        if not fva_data:
+            cobra_model.solver = solver
+            fva = flux_variability_analysis(cobra_model, fraction_of_optimum=0.0)
+            fva_data = dict(zip(list(fva.index),fva.to_dict('records')))
+        self.blocked_reactions = []
+        for rxn in cobra_model.reactions:
+            if not rxn.id in fva_data: continue
+            lb,ub = self._get_fluxBounds(fva_data[rxn.id])
+            if fabs(lb) < threshold_I and fabs(ub) < threshold_I:
+                self.blocked_reactions.append(rxn.id)
+
+        # remove the blocked reactions and orphan metabolites
+        reduced_model = cobra_model.copy()
+        reduced_model.remove_reactions([reduced_model.reactions.get_by_id(r) for r in self.blocked_reactions])
+        self._remove_orphanMetabolites(reduced_model)
+        self.reduced_mapping = {rxn.id:{rxn.id:1.0} for rxn in reduced_model.reactions}
+
+        if merge_coupled_I:
+            # reactions split into a forward and a reverse reaction are not merged
+            split = [rxn.id for rxn in reduced_model.reactions
+                if rxn.id + '_reverse' in reduced_model.reactions]
+            for group in find_coupledReactions(reduced_model, excluded_I=split):
+                self._merge_coupledReactions(reduced_model, [(rxn_id,float(ratio)) for rxn_id,ratio,met in group])
+            self._remove_orphanMetabolites(reduced_model)
+        return reduced_model
+
+    def expand_reduced_fluxes(self, fluxes_I):
+        """expand the fluxes of a reduced model to the reactions of the original model
+
+        Args:
+            fluxes_I (dict): {reduced reaction.id: float}
+                or {reduced reaction.id: {'minimum': float, 'maximum': float}}
+
+        Returns:
+            dict: fluxes_O: {reaction.id: float or {'minimum': float, 'maximum': float}}
+                blocked reactions have a flux of 0.0
+        """
+        fluxes_O = {}
+        for rxn in self.blocked_reactions:
+            fluxes_O[rxn] = 0.0
+        for k,v in fluxes_I.items():
+            for rxn,ratio in self.reduced_mapping.get(k,{k:1.0}).items():
+                if isinstance(v,dict):
+                    bounds = [ratio*v['minimum'],ratio*v['maximum']]
+                    fluxes_O[rxn] = {'minimum':min(bounds),'maximum':max(bounds)}
+                else:
+                    fluxes_O[rxn] = ratio*v
+        return fluxes_O
+
+    def reduce_dG_r(self, dG_r_I):
+        """map the dG_r of the original reactions to the reactions of a reduced model
+
+        Args:
+            dG_r_I (dict): {reaction.id: {'dG_r','dG_r_var','dG_r_lb','dG_r_ub'}}
+                (dG_r or dG0_r)
+
+        Returns:
+            dict: dG_r_O: {reduced reaction.id: {'dG_r','dG_r_var','dG_r_units','dG_r_lb','dG_r_ub'}}
+
+        NOTES:
+          the dG_r of a lumped reaction is the ratio weighted sum of the dG_r
+          of its reactions (see reduced_mapping) and its variance is the
+          squared ratio weighted sum of the variances; lumped reactions with a reaction
+          without dG_r are left out (i.e., they are not constrained by tfba/tfva)
         """
-        perform a fluxSum analysis        
+        dG_r_O = {}
+        for rxn_id,mapping in self.reduced_mapping.items():
+            missing = [rxn for rxn in mapping if not rxn in dG_r_I]
+            if missing:
+                if len(mapping) > 1:
+                    print('dG_r not available for ' + ', '.join(missing) + ' of ' + rxn_id)
+                continue
+            if len(mapping) == 1 and rxn_id in mapping and mapping[rxn_id] == 1.0:
+                dG_r_O[rxn_id] = dG_r_I[rxn_id]
+                continue
+            dG_r,dG_r_var,dG_r_lb,dG_r_ub = 0.0,0.0,0.0,0.0
+            for rxn,ratio in mapping.items():
+                v = dG_r_I[rxn]
+                dG_r += ratio*v['dG_r']
+                dG_r_var += ratio**2*v['dG_r_var']
+                dG_r_lb += min(ratio*v['dG_r_lb'],ratio*v['dG_r_ub'])
+                dG_r_ub += max(ratio*v['dG_r_lb'],ratio*v['dG_r_ub'])
+            dG_r_O[rxn_id] = {'dG_r':dG_r,
+                              'dG_r_var':dG_r_var,
+                              'dG_r_units':'kJ/mol',
+                              'dG_r_lb':dG_r_lb,
+                              'dG_r_ub':dG_r_ub}
+        return dG_r_O
+
+    def _get_fluxBounds(self, fva_I):
+        """get the lb/ub of an FVA result ({'minimum','maximum'} or {'flux_lb','flux_ub'})"""
+        if 'flux_lb' in fva_I:
+            return fva_I['flux_lb'],fva_I['flux_ub']
+        return fva_I['minimum'],fva_I['maximum']
+
+    def _remove_orphanMetabolites(self, cobra_model):
+        """remove the metabolites that do not take part in any reaction"""
+        used = set()
+        for rxn in cobra_model.reactions:
+            used.update(m.id for m in rxn.metabolites)
+        orphans = [m for m in cobra_model.metabolites if not m.id in used]
+        if orphans:
+            cobra_model.remove_metabolites(orphans)
+
+    def _merge_coupledReactions(self, cobra_model, group_I, tolerance_I=1e-9):
+        """merge a group of fully coupled reactions into a single lumped reaction
+
+        Args:
+            group_I (list): [(reaction.id, ratio),...] (see reduce_model)
+
+        NOTES:
+          the bounds of the lumped reaction are the intersection of the scaled bounds
+          of the coupled reactions; groups whose metabolites cancel out
+          or whose bounds do not intersect are not merged
         """
-        pass
\ No newline at end of file
+        stoichiometry = {}
+        metabolites = {}
+        lb,ub = float('-inf'),float('inf')
+        genes = []
+        for rxn_id,ratio in group_I:
+            rxn = cobra_model.reactions.get_by_id(rxn_id)
+            for m,v in rxn.metabolites.items():
+                metabolites[m.id] = m
+                stoichiometry[m.id] = stoichiometry.get(m.id,0.0) + ratio*v
+            if ratio > 0:
+                lb,ub = max(lb,rxn.lower_bound/ratio),min(ub,rxn.upper_bound/ratio)
+            else:
+                lb,ub = max(lb,rxn.upper_bound/ratio),min(ub,rxn.lower_bound/ratio)
+            if rxn.gene_reaction_rule:
+                genes.append('(' + rxn.gene_reaction_rule + ')')
+        stoichiometry = {k:v for k,v in stoichiometry.items() if fabs(v) > tolerance_I}
+        if not stoichiometry or lb > ub:
+            return
+        lumped_id = 'lumped_' + group_I[0][0]
+        while lumped_id in cobra_model.reactions:
+            lumped_id += '_'
+        lumped = Reaction(lumped_id)
+        lumped.add_metabolites({metabolites[k]:v for k,v in stoichiometry.items()})
+        lumped.gene_reaction_rule = ' and '.join(genes)
+        cobra_model.remove_reactions([cobra_model.reactions.get_by_id(r) for r,ratio in group_I])
+        cobra_model.add_reaction(lumped)
+        invalidate_transportIndex(cobra_model)
+        if lb > lumped.upper_bound:
+            lumped.upper_bound = ub
+            lumped.lower_bound = lb
+        else:
+            lumped.lower_bound = lb
+            lumped.upper_bound = ub
+        mapping = {}
+        for rxn_id,ratio in group_I:
+            for k,v in self.reduced_mapping.pop(rxn_id).items():
+                mapping[k] = ratio*v
+        self.reduced_mapping[lumped_id] = mapping
+
+    def generate_fluxSum_data(self, cobra_model, method_I='fva', solver='glpk',
+            fva_data_I=None, fraction_of_optimum=0.9, metabolite_list=None,
+            verbose_I=True, processes_I=1):
+        """perform a fluxSum analysis (range of the turnover of each metabolite)
+
+        flux-sum = 0.5*SUM[|S_ij*v_j|]
+
+        Args:
+            cobra_model (cobra.Model): cobra model object
+            method_I (str): 'fva': bounds from the flux bounds in fva_data_I
+                                   (see calculate_fluxSum_bounds)
+                            'lp': exact bounds by minimizing and maximizing the flux-sum
+                                  of each metabolite
+            solver (str): default = 'glpk'
+            fva_data_I (dict): {reaction.id: {'minimum','maximum'} or {'flux_lb','flux_ub'}}
+                or {reaction.id: float} (e.g., tfva_data or fba_primal_data)
+                (default: fva_data; reactions that are not included use the model bounds)
+            fraction_of_optimum (float): fraction of the optimum that must be maintained ('lp')
+            metabolite_list (list): metabolite ids to use with 'lp' (default: all metabolites)
+            verbose_I (boolean): print messages to the console
+            processes_I (int): number of processes for 'lp' (default: 1; None: all cpus)
+
+        the results are stored in fluxSum_data:
+            {metabolite.id: {'fluxSum_lb','fluxSum_ub','fluxSum_units','method'}}
+
+        NOTES:
+          'lp' is linear only if the flux through each reaction of the metabolite
+          has a single sign (e.g., an irreversible model);
+          the bounds from fva_data_I are kept for the other metabolites
+          and for metabolites whose bounds are already fixed
+        """
+        if verbose_I:
+            print('FluxSum...')
+        if not method_I in ['fva','lp']:
+            print('method not recognized.')
+            return
+        if fva_data_I is None:
+            fva_data_I = self.fva_data
+
+        # bounds from the flux bounds
+        reaction_ids,metabolite_ids,S = make_stoichiometry(cobra_model)
+        lb = numpy.zeros(len(reaction_ids))
+        ub = numpy.zeros(len(reaction_ids))
+        for i,rxn in enumerate(cobra_model.reactions):
+            if rxn.id in fva_data_I and isinstance(fva_data_I[rxn.id],dict):
+                lb[i],ub[i] = self._get_fluxBounds(fva_data_I[rxn.id])
+            elif rxn.id in fva_data_I:
+                lb[i] = ub[i] = fva_data_I[rxn.id]
+            else:
+                lb[i],ub[i] = rxn.lower_bound,rxn.upper_bound
+        fluxSum_lb,fluxSum_ub = calculate_fluxSum_bounds(S,lb,ub)
+        fluxSum_data = {}
+        for j,met_id in enumerate(metabolite_ids):
+            fluxSum_data[met_id] = {'fluxSum_lb':float(fluxSum_lb[j]),'fluxSum_ub':float(fluxSum_ub[j]),
+                                    'fluxSum_units':'mmol*gDW-1*hr-1','method':'fva'}
+
+        if method_I == 'lp':
+            items = self._get_fluxSum_coefficients(cobra_model,reaction_ids,metabolite_ids,S,
+                fluxSum_lb,fluxSum_ub,metabolite_list)
+            cobra_model.solver = solver
+            with cobra_model:
+                fix_objective_as_constraint(cobra_model,fraction=fraction_of_optimum)
+                for met_id,(met_lb,met_ub) in self._optimize_fluxSums(cobra_model,items,processes_I):
+                    fluxSum_data[met_id].update({'fluxSum_lb':met_lb,'fluxSum_ub':met_ub,'method':'lp'})
+        self.fluxSum_data = fluxSum_data
+
+    def _get_fluxSum_coefficients(self, cobra_model, reaction_ids_I, metabolite_ids_I, S_I,
+            fluxSum_lb_I, fluxSum_ub_I, metabolite_list_I=None, tolerance_I=1e-9):
+        """get the objective coefficients of the flux-sum of each metabolite
+
+        Returns:
+            list: items_O: [(metabolite.id, {reaction.id: 0.5*|S_ij|*sign(v_j)}),...]
+                metabolites with fixed bounds or reactions that can carry flux
+                in both directions are not included
+        """
+        bounds = [(r.lower_bound,r.upper_bound) for r in cobra_model.reactions]
+        if metabolite_list_I is None:
+            metabolite_list_I = metabolite_ids_I
+        met2col = {m:j for j,m in enumerate(metabolite_ids_I)}
+        S = S_I.tocsc()
+        items_O = []
+        reversible = []
+        for met_id in metabolite_list_I:
+            j = met2col[getattr(met_id,'id',met_id)]
+            if fluxSum_ub_I[j] - fluxSum_lb_I[j] < tolerance_I: continue
+            coefficients = {}
+            for i,s in zip(S.indices[S.indptr[j]:S.indptr[j+1]],S.data[S.indptr[j]:S.indptr[j+1]]):
+                lb,ub = bounds[i]
+                if lb >= 0.0:
+                    coefficients[reaction_ids_I[i]] = 0.5*fabs(s)
+                elif ub <= 0.0:
+                    coefficients[reaction_ids_I[i]] = -0.5*fabs(s)
+                else:
+                    coefficients = None
+                    break
+            if coefficients is None:
+                reversible.append(metabolite_ids_I[j])
+            else:
+                items_O.append((metabolite_ids_I[j],coefficients))
+        if reversible:
+            print(str(len(reversible)) + ' metabolites take part in reversible reactions; ' +
+                  'the flux-sum bounds from the flux bounds are used')
+        return items_O
+
+    def _optimize_fluxSums(self, cobra_model, items_I, processes_I=1):
+        """minimize and maximize the flux-sum of each metabolite
+
+        Args:
+            cobra_model (cobra.Model)
+            items_I (list): see _get_fluxSum_coefficients
+            processes_I (int): number of processes (default: 1; None: all cpus)
+
+        Returns:
+            list: [(metabolite.id, (lb, ub)),...]
+
+        NOTES:
+          the model is sent once to each process and each process optimizes a
+          chunk of metabolites on its own copy (see thermodynamics_utility.optimize_thermoConstraints)
+        """
+        processes_I = min(self._get_processes(processes_I),len(items_I))
+        if processes_I > 1:
+            chunksize = max(1,len(items_I)//(processes_I*4))
+            pool = multiprocessing.Pool(processes_I,
+                initializer=_init_fluxSum_worker, initargs=(cobra_model,))
+            try:
+                return list(pool.imap_unordered(_fluxSum_worker,items_I,chunksize=chunksize))
+            finally:
+                pool.close()
+                pool.join()
+        return [(met_id,_optimize_fluxSum(cobra_model,coefficients)) for met_id,coefficients in items_I]
+
+    def export_fluxSum_data(self, filename):
+        """export fluxSum data"""
+        with open(filename, 'w') as outfile:
+            json.dump(self.fluxSum_data, outfile, indent=4);
+
+    def import_fluxSum_data(self,filename):
+        """import fluxSum data"""
+        self.fluxSum_data = json.load(open(filename))
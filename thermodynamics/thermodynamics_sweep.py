@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+# Other dependencies
+import numpy
+
+from .thermodynamics_io import thermodynamics_io
+from .thermodynamics_dG_r_data import thermodynamics_dG_r_data
+from .thermodynamics_pseudoisomers import pack_pseudoisomers, select_pseudoisomers, transform_pseudoisomers
+
+class thermodynamics_sweep(thermodynamics_io):
+    """Sweep pH, ionic strength, and temperature conditions
+
+    dG_f is transformed for all conditions of a compartment at once
+    and dG0_r/dG_r are calculated for each condition with the
+    thermodynamics_dG_r_data array engine.
+    Results are stored as numpy.arrays (conditions x metabolites or conditions x reactions)
+    """
+
+    def __init__(self,conditions_I=[]):
+        if conditions_I:
+            self.conditions = conditions_I
+        else:
+            self.conditions = [] # [{'pH':{compartment:{'pH':float}},'ionic_strength':{...},'temperature':{...}}]
+        self.metabolite_ids = []
+        self.reaction_ids = []
+        self.dG_f = {} # {'dG_f': numpy.array (conditions x metabolites)}
+        self.dG0_r = {} # {'dG_r','dG_r_var','dG_r_lb','dG_r_ub': numpy.array (conditions x reactions)}
+        self.dG_r = {} # {'dG_r','dG_r_var','dG_r_lb','dG_r_ub': numpy.array (conditions x reactions)}
+
+    def make_conditions(self, pH_I, ionic_strength_I, temperature_I):
+        """make a grid of conditions from the values of each compartment
+
+        Args:
+            pH_I (dict): {compartment: [float,...]}
+            ionic_strength_I (dict): {compartment: [float,...]} (M)
+            temperature_I (dict): {compartment: [float,...]} (K)
+
+        Returns:
+            list: conditions_O: one condition for each combination of values
+                [{'pH':{compartment:{'pH':float}},
+                  'ionic_strength':{compartment:{'ionic_strength':float,'ionic_strength_units':'M'}},
+                  'temperature':{compartment:{'temperature':float,'temperature_units':'K'}}},...]
+        """
+
+        compartments = sorted(pH_I.keys())
+        axes = []
+        for c in compartments:
+            axes.append([('pH',c,v) for v in pH_I[c]])
+            axes.append([('ionic_strength',c,v) for v in ionic_strength_I[c]])
+            axes.append([('temperature',c,v) for v in temperature_I[c]])
+        units = {'pH':None,'ionic_strength':'M','temperature':'K'}
+
+        conditions_O = []
+        for point in itertools.product(*axes):
+            condition = {'pH':{},'ionic_strength':{},'temperature':{}}
+            for key,c,v in point:
+                condition[key][c] = {key:v}
+                if units[key]: condition[key][c][key + '_units'] = units[key]
+            conditions_O.append(condition)
+        self.conditions = conditions_O
+        return conditions_O
+
+    def sweep(self, cobra_model, dG_f_data, measured_concentration, estimated_concentration,
+              conditions_I=None, compounds_I=None, bounds_method_I='v1'):
+        """calculate dG_f, dG0_r, and dG_r for each condition
+
+        Args:
+            cobra_model (cobra.Model)
+            dG_f_data (thermodynamics_dG_f_data): with dG0_f and estimated_dG_f
+            measured_concentration (dict)
+            estimated_concentration (dict)
+            conditions_I (list): see make_conditions (default: self.conditions)
+            compounds_I (str, list, or dict): pseudoisomer data
+                (see thermodynamics_dG_f_data._get_compounds_pseudoisomers)
+            bounds_method_I (str): see thermodynamics_dG_r_data.calculate_dG_r
+
+        NOTES:
+          dG_f_data.dG0_f is populated by get_transformed_dG_f
+          metabolites without pseudoisomer data use dG_f_data.estimated_dG_f
+        """
+
+        if conditions_I is not None: self.conditions = conditions_I
+        conditions = self.conditions
+        n_conditions = len(conditions)
+        metabolites = [m for m in cobra_model.metabolites]
+        self.metabolite_ids = [m.id for m in metabolites]
+        met2index = {m.id:j for j,m in enumerate(metabolites)}
+
+        # transform dG_f for all conditions of a compartment at once
+        dG0_f_ids = list(dG_f_data.dG0_f.keys())
+        pseudoisomers = pack_pseudoisomers(dG0_f_ids,
+            [dG_f_data.dG0_f[k]['dG_f'] for k in dG0_f_ids],
+            dG_f_data._get_compounds_pseudoisomers(dG0_f_ids, compounds_I))
+        dG_f = numpy.full((n_conditions,len(metabolites)),numpy.nan)
+        dG_f_var = numpy.full(len(metabolites),numpy.nan)
+        compartments = list(set(cobra_model.metabolites.list_attr('compartment')))
+        for c in compartments:
+            kegg_ids = [k for k in pseudoisomers['ids']
+                if k in dG_f_data.KEGGID2id and dG_f_data.KEGGID2id[k] + '_' + c in met2index]
+            if not kegg_ids or not n_conditions: continue
+            pseudoisomers_c = select_pseudoisomers(pseudoisomers, kegg_ids)
+            columns = [met2index[dG_f_data.KEGGID2id[k] + '_' + c] for k in pseudoisomers_c['ids']]
+            dG_f[:,columns] = transform_pseudoisomers(pseudoisomers_c,
+                numpy.array([condition['pH'][c]['pH'] for condition in conditions]),
+                numpy.array([condition['ionic_strength'][c]['ionic_strength'] for condition in conditions]),
+                numpy.array([condition['temperature'][c]['temperature'] for condition in conditions]))
+            dG_f_var[columns] = [dG_f_data.dG0_f[k]['dG_f_var'] for k in pseudoisomers_c['ids']]
+        self.dG_f = {'dG_f':dG_f,'dG_f_var':dG_f_var}
+
+        # calculate dG0_r and dG_r for each condition
+        tcc = thermodynamics_dG_r_data()
+        reaction_arrays = tcc._make_reaction_arrays(cobra_model)
+        hydrogens = tcc._get_hydrogens(cobra_model)
+        self.reaction_ids = reaction_arrays['reaction_ids']
+        keys = ['dG_r','dG_r_var','dG_r_lb','dG_r_ub']
+        self.dG0_r = {k:numpy.full((n_conditions,len(self.reaction_ids)),numpy.nan) for k in keys}
+        self.dG_r = {k:numpy.full((n_conditions,len(self.reaction_ids)),numpy.nan) for k in keys}
+        measured_columns = numpy.nonzero(~numpy.isnan(dG_f_var))[0]
+        for i,condition in enumerate(conditions):
+            measured_dG_f = dG_f_data._convert_var2lbub_dG_f({self.metabolite_ids[j]:{
+                'dG_f':float(dG_f[i,j]),'dG_f_var':float(dG_f_var[j]),'dG_f_units':'kJ/mol'}
+                for j in measured_columns})
+            dG0_r_arrays = tcc._calculate_dG0_r_arrays(reaction_arrays, measured_dG_f,
+                dG_f_data.estimated_dG_f, condition['temperature'], bounds_method_I)
+            if dG0_r_arrays is None:
+                print('condition ' + str(i) + ': not all metabolites have a dG_f')
+                continue
+            dG_r_arrays = tcc._calculate_dG_r_arrays(reaction_arrays, hydrogens,
+                measured_concentration, estimated_concentration,
+                condition['pH'], condition['ionic_strength'], condition['temperature'],
+                bounds_method_I, dG0_r_arrays)
+            if dG_r_arrays is None:
+                print('condition ' + str(i) + ': not all metabolites have a concentration')
+                continue
+            for k in keys:
+                self.dG0_r[k][i] = dG0_r_arrays[k]
+                self.dG_r[k][i] = dG_r_arrays[k]
+
+    def get_condition(self, condition_index_I, data_I='dG_r'):
+        """get the results of a single condition
+
+        Args:
+            condition_index_I (int): index of the condition in self.conditions
+            data_I (str): 'dG0_r' or 'dG_r'
+
+        Returns:
+            dict: data_O: {reaction.id: {'dG_r','dG_r_var','dG_r_lb','dG_r_ub','dG_r_units'}}
+        """
+
+        data = getattr(self,data_I)
+        data_O = {}
+        for i,rxn_id in enumerate(self.reaction_ids):
+            data_O[rxn_id] = {k:float(v[condition_index_I,i]) for k,v in data.items()}
+            data_O[rxn_id]['dG_r_units'] = 'kJ/mol'
+        return data_O
@@ -15,9 +15,35 @@ from cobra.solvers import solver_dict, get_solver_name
 from thermodynamics.thermodynamics_utility import find_transportRxns, null, find_transportMetsAndRxns
 from thermodynamics.thermodynamics_io import thermodynamics_io
 from thermodynamics.thermodynamics_simulatedData import thermodynamics_simulatedData
+from thermodynamics.thermodynamics_dG_p_data import thermodynamics_dG_p_data
 
 # Other dependencies
 import csv,json,sys
+import multiprocessing
+
+def _delete_reaction(cobra_model_I, reaction_id_I):
+    """simulate growth with the flux through a single reaction fixed to zero
+
+    NOTES:
+      the bound changes are reverted when leaving the model context;
+      the solver problem is reused between calls so that the previous
+      solution warm-starts the next
+    """
+    with cobra_model_I:
+        cobra_model_I.reactions.get_by_id(reaction_id_I).knock_out();
+        gr = cobra_model_I.slim_optimize(error_value=float('nan'));
+    return gr;
+
+_tfba_sra_model = None; # constrained model used by the worker processes
+
+def _init_tfba_sra_worker(cobra_model_I):
+    """store the constrained model in the worker process"""
+    global _tfba_sra_model
+    _tfba_sra_model = cobra_model_I;
+
+def _tfba_sra_worker(reaction_id_I):
+    """simulate a single reaction deletion in a worker process"""
+    return reaction_id_I, _delete_reaction(_tfba_sra_model, reaction_id_I);
 
 class thermodynamics_tfba(thermodynamics_io):    
     """1. Runs thermodynamic flux balance analysis analysis on a cobra.Model object
@@ -102,11 +128,17 @@ class thermodynamics_tfba(thermodynamics_io):
         self.tfva_concentrations_data = {};
         self.tfva_analysis = {};
         self.tsampling_dG_r_data = {};
+        self.mdf_data = {};
+        self.tfba_sra_data = {};
         
     def export_tfva_data(self, filename):
         """export tfva data"""       
         with open(filename, 'w') as outfile:
             json.dump(self.tfva_data, outfile, indent=4)
+    def export_tfba_sra_data(self, filename):
+        """export tfba_sra data"""
+        with open(filename, 'w') as outfile:
+            json.dump(self.tfba_sra_data, outfile, indent=4)
     def export_tfva_dG_r_data(self, filename):
         """export tfva_dG_r data"""      
         with open(filename, 'w') as outfile:
@@ -174,7 +206,7 @@ class thermodynamics_tfba(thermodynamics_io):
         # find system boundaries and the objective reaction
         system_boundaries = [x.id for x in cobra_model_irreversible.reactions if x.boundary == 'system_boundary'];
         objectives = [x.id for x in cobra_model_irreversible.reactions if x.objective_coefficient == 1];
-        transporters = find_transportRxns(cobra_model_irreversible);
+        transporters = set(find_transportRxns(cobra_model_irreversible));
         # add variables and constraints to model for tfba
         reactions = [r for r in cobra_model_irreversible.reactions];
         dG_r_variables = {};
@@ -316,6 +348,116 @@ class thermodynamics_tfba(thermodynamics_io):
         solution = cobra_model_irreversible.optimize()
         self.tfba_data = {k:v for k,v in solution.fluxes.to_dict().items() if k in reaction_list}
 
+    def tfba_sra(self, cobra_model_irreversible, dG_r, dG_r_coverage, thermodynamic_consistency_check,
+        use_measured_dG_r=True, reaction_list=None, solver='glpk', processes_I=1):
+        """performs single reaction deletion analysis on the thermodynamically constrained model
+
+        the dG_r constraints (see tfba) are added once, and each reaction in turn
+        is deleted (vi=0) and the MILP is re-solved
+
+        Args:
+            cobra_model_irreversible (cobra.Model)
+            dG_r (dict)
+            dG_r_coverage (dict)
+            thermodynamic_consistency_check (dict)
+            use_measured_dG_r (boolean)
+            reaction_list (list): reaction ids to delete (default: all reactions of the model)
+            solver (str)
+            processes_I (int): number of processes (default: 1; None: all cpus)
+
+        the results are stored in tfba_sra_data: {reaction.id: {'gr': float, 'gr_ratio': float}}
+        (gr is nan if the deletion is infeasible)
+
+        NOTES:
+          the model is sent once to each process and each process deletes a
+          chunk of reactions on its own copy (see thermodynamics_utility.optimize_thermoConstraints)
+        """
+        if reaction_list is None:
+            reaction_list = [r.id for r in cobra_model_irreversible.reactions];
+        else:
+            reaction_list = [getattr(r,'id',r) for r in reaction_list];
+        # add constraints
+        self._add_dG_r_constraints(cobra_model_irreversible,dG_r, dG_r_coverage, thermodynamic_consistency_check, use_measured_dG_r);
+        cobra_model_irreversible.solver = solver
+        gr_original = cobra_model_irreversible.slim_optimize(error_value=float('nan'));
+        # delete each reaction in turn
+        gr = {};
+        if processes_I is None:
+            processes_I = multiprocessing.cpu_count();
+        processes_I = min(processes_I,len(reaction_list));
+        if processes_I > 1:
+            chunksize = max(1,len(reaction_list)//(processes_I*4));
+            pool = multiprocessing.Pool(processes_I,
+                initializer=_init_tfba_sra_worker, initargs=(cobra_model_irreversible,));
+            try:
+                for rxn,v in pool.imap_unordered(_tfba_sra_worker,reaction_list,chunksize=chunksize):
+                    gr[rxn] = v;
+            finally:
+                pool.close();
+                pool.join();
+        else:
+            for rxn in reaction_list:
+                gr[rxn] = _delete_reaction(cobra_model_irreversible, rxn);
+        self.tfba_sra_data = {};
+        for rxn in reaction_list:
+            gr_ratio = gr[rxn]/gr_original if gr_original else None;
+            self.tfba_sra_data[rxn] = {'gr':gr[rxn],'gr_ratio':gr_ratio};
+
+    def mdf(self, cobra_model_irreversible, measured_concentration, estimated_concentration,
+        dG0_r, temperature, fluxes=None, flux_threshold=1e-6, pH=None):
+        """calculate the max-min driving force (MDF) of a flux distribution
+
+        a single LP over the active reactions of the flux distribution
+        (see thermodynamics_dG_p_data.calculate_mdf)
+        max B
+        -di*(dG0_ri+dG_r_transi+RT*SUM[sij*ln(xj)])>=B, {i: |vi|>flux_threshold}
+        ln(xj_lb)<=ln(xj)<=ln(xj_ub)
+
+        where:
+        di is the direction of the flux through reaction i
+        dG_r_transi is the transport term (membrane potential and proton transport)
+        of reaction i (see thermodynamics_dG_r_data.calculate_dG_r)
+
+        a positive B indicates that there is a set of concentrations for which
+        the flux distribution is thermodynamically feasible (without solving the MILP)
+
+        Args:
+            cobra_model_irreversible (cobra.Model)
+            measured_concentration (dict)
+            estimated_concentration (dict)
+            dG0_r (dict)
+            temperature (dict)
+            fluxes (dict): {reaction.id: float} (default: self.tfba_data)
+            flux_threshold (float): minimum absolute flux of an active reaction
+            pH (dict): used to calculate dG_r_trans
+
+        Returns:
+            dict: mdf_data: {'mdf': float,'mdf_units','feasible','bottlenecks',
+                'driving_force','ln_concentration','status'}
+
+        NOTES:
+          system boundary and objective reactions, and reactions without a dG0_r are not included
+          transport reactions are not included if no pH is given
+        """
+        if fluxes is None: fluxes = self.tfba_data;
+        # active reactions in the direction of the flux
+        reactions = [];
+        stoichiometry = [];
+        for r in cobra_model_irreversible.reactions:
+            if not r.id in fluxes or fabs(fluxes[r.id]) <= flux_threshold: continue;
+            if r.boundary == 'system_boundary' or not r.reactants or not r.products: continue;
+            if r.objective_coefficient != 0 or not r.id in dG0_r: continue;
+            reactions.append(r.id);
+            stoichiometry.append(1 if fluxes[r.id] > 0 else -1);
+        tccp = thermodynamics_dG_p_data(pathways_I={'fluxes':{'reactions':reactions,'stoichiometry':stoichiometry}});
+        tccp.calculate_mdf(cobra_model_irreversible, dG0_r, measured_concentration, estimated_concentration, temperature,
+            pH=pH);
+        if 'fluxes' in tccp.mdf:
+            self.mdf_data = tccp.mdf['fluxes'];
+        else:
+            self.mdf_data = {'mdf':None,'mdf_units':'kJ/mol','feasible':None,'bottlenecks':[],
+                             'driving_force':{},'ln_concentration':{},'status':'no active reactions'};
+
     def tfva(self, cobra_model_irreversible, dG_r, dG_r_coverage, thermodynamic_consistency_check, use_measured_dG_r=True,
              reaction_list=None,fraction_of_optimum=1.0, solver='glpk',
              objective_sense="maximize", **solver_args):
@@ -488,7 +630,7 @@ class thermodynamics_tfba(thermodynamics_io):
         # find system boundaries and the objective reaction
         system_boundaries = [x.id for x in cobra_model_irreversible.reactions if x.boundary == 'system_boundary'];
         objectives = [x.id for x in cobra_model_irreversible.reactions if x.objective_coefficient == 1];
-        transporters = find_transportRxns(cobra_model_irreversible);
+        transporters = set(find_transportRxns(cobra_model_irreversible));
         # bounds
         dG_r_indicator_constraint = 1-1e-6;
         # add variables and constraints to model for tfba
@@ -802,7 +944,7 @@ class thermodynamics_tfba(thermodynamics_io):
         # find system boundaries and the objective reaction
         system_boundaries = [x.id for x in cobra_model_irreversible.reactions if x.boundary == 'system_boundary'];
         objectives = [x.id for x in cobra_model_irreversible.reactions if x.objective_coefficient == 1];
-        transporters = find_transportRxns(cobra_model_irreversible);
+        transporters = set(find_transportRxns(cobra_model_irreversible));
         # adjustment for transport reactions (Henry et al, 2007, Biophysical Journal 92(5) 1792?1805)
         mets_trans = find_transportMetsAndRxns(cobra_model_irreversible);
         # bounds
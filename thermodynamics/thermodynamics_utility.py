@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 # Dependencies
 import operator, json, csv
-from collections import Counter
+import multiprocessing
+from collections import deque
+from fractions import Fraction
+from scipy.sparse import csr_matrix
 # Dependencies from cobra
 from cobra.io.sbml import create_cobra_model_from_sbml_file
 from cobra.io.sbml import write_cobra_model_to_sbml_file
@@ -11,30 +14,118 @@ from cobra.core.model import Model
 from cobra.core.metabolite import Metabolite
 from cobra.core.reaction import Reaction
 
+class TransportIndex():
+    """index of the transport metabolites and transport reactions of a cobra.Model
+
+    transport metabolite definition:
+        1. different id (same base id but different compartment)
+        2. same name
+        3. different compartment
+
+    The index is built in a single pass by grouping the metabolites by name;
+    only names shared by more than one metabolite can be transport metabolites.
+    Use get_transportIndex to obtain the index cached on the model.
+    """
+
+    def __init__(self, cobra_model_I):
+        self.key = self.make_key(cobra_model_I);
+        self.name2metabolites = {}; # {metabolite.name: [metabolite.id,...]}
+        self.transportMets = {}; # {reaction.id: [metabolite.name,...]}
+        self.transportRxns = []; # [reaction.id,...] in model order
+        self.build(cobra_model_I);
+
+    @staticmethod
+    def make_key(cobra_model_I):
+        """make a cheap key of the reactions and metabolites of the model
+
+        the key is the number of reactions and metabolites and the identity
+        of the reaction and metabolite lists, so that added or removed
+        reactions and metabolites and copies of the model are detected
+        without visiting every reaction
+
+        NOTES:
+          in place edits (e.g., renaming a metabolite or changing the
+          metabolites of a reaction) are not detected;
+          call invalidate_transportIndex after such edits
+        """
+        return (len(cobra_model_I.reactions),id(cobra_model_I.reactions),
+            len(cobra_model_I.metabolites),id(cobra_model_I.metabolites));
+
+    def build(self, cobra_model_I):
+        """group the metabolites by name and find the transport metabolites of each reaction"""
+
+        self.name2metabolites = {};
+        for m in cobra_model_I.metabolites:
+            if m.name in self.name2metabolites:
+                self.name2metabolites[m.name].append(m.id);
+            else:
+                self.name2metabolites[m.name] = [m.id];
+        shared_names = set([k for k,v in self.name2metabolites.items() if len(v)>1]);
+
+        self.transportMets = {};
+        self.transportRxns = [];
+        for rxn in cobra_model_I.reactions:
+            # count the shared names in the same order as products + reactants
+            names_cnt = {};
+            for m in rxn.products + rxn.reactants:
+                if m.name in shared_names:
+                    names_cnt[m.name] = names_cnt.get(m.name,0) + 1;
+            mets = [k for k,v in names_cnt.items() if v>1];
+            if mets:
+                self.transportMets[rxn.id] = mets;
+                self.transportRxns.append(rxn.id);
+
+    def is_valid(self, cobra_model_I):
+        """check that the index still matches the reactions of the model"""
+        return self.key == self.make_key(cobra_model_I);
+
+def get_transportIndex(cobra_model_I):
+    """return the TransportIndex cached on the model, (re)building it if
+    reactions or metabolites were added to or removed from the model
+
+    Args:
+        cobra_model_I (cobra.Model)
+
+    Returns:
+        TransportIndex
+
+    NOTES:
+      validating the cached index is O(1); bulk operations should
+      call get_transportIndex once and reuse the returned index
+    """
+
+    transport_index = getattr(cobra_model_I,'_transport_index',None);
+    if transport_index is None or not transport_index.is_valid(cobra_model_I):
+        transport_index = TransportIndex(cobra_model_I);
+        cobra_model_I._transport_index = transport_index;
+    return transport_index;
+
+def invalidate_transportIndex(cobra_model_I):
+    """remove the TransportIndex cached on the model
+
+    NOTES:
+      required after in place edits of the names of the metabolites
+      or of the metabolites of a reaction (see TransportIndex.make_key)
+    """
+    cobra_model_I._transport_index = None;
+
 def find_transportMets(cobra_model_I, reaction_id_I):
+    """find the transport metabolites of a reaction
 
-    """ 
     transport metabolite definition:
     	1. different id (same base id but different compartment)
     	2. same name
     	3. different compartment
-        
-    Not full proof
-
-    import re
-    compartments = list(set(cobra_model.metabolites.list_attr('compartment')));
-    met_ID
-    for compart in compartments:
-	    comp_tmp = '_' + compart;
-	    met_tmp = re.sub(comp_tmp,'',met_ID)
-    met_ids.append(met_tmp)"""
-
-    met_ids = cobra_model_I.reactions.get_by_id(reaction_id_I).products + cobra_model_I.reactions.get_by_id(reaction_id_I).reactants
-    met_names = [];
-    mets_O = [];
-    for m in met_ids:
-        met_names.append(m.name);
-    met_O = [k for k,v in list(Counter(met_names).items()) if v>1]
+
+    Args:
+        cobra_model_I (cobra.Model)
+        reaction_id_I (string): reaction id
+
+    Returns:
+        list: met_O: names of the transport metabolites
+    """
+
+    met_O = list(get_transportIndex(cobra_model_I).transportMets.get(reaction_id_I,[]));
     return met_O;
 
 def find_transportRxns(cobra_model_I):
@@ -51,15 +142,7 @@ def find_transportRxns(cobra_model_I):
     #Method 1
     rxn_O = [rxn.id for rxn in cobra_model_I.exchanges]
     #Method 2
-    for rxn in cobra_model_I.reactions:
-        mets = [];
-        mets = find_transportMets(cobra_model_I, rxn.id);
-        #products = rxn.products;
-        #reactants = rxn.reactants;
-        #product_names = [x.name for x in products];
-        #reactant_names = [x.name for x in reactants];
-        if mets:
-            rxn_O.append(rxn.id);
+    rxn_O.extend(get_transportIndex(cobra_model_I).transportRxns);
     return rxn_O;
 
 def find_transportMetsAndRxns(cobra_model_I):
@@ -72,14 +155,126 @@ def find_transportMetsAndRxns(cobra_model_I):
     2. the reaction is not a system boundary reaction
     """
 
-    metsAndRxns_O = {};
-    for rxn in cobra_model_I.reactions:
-        mets = [];
-        mets = find_transportMets(cobra_model_I, rxn.id);
-        if mets:
-            metsAndRxns_O[rxn.id] = mets;
+    metsAndRxns_O = {k:list(v) for k,v in get_transportIndex(cobra_model_I).transportMets.items()};
     return metsAndRxns_O;
 
+def make_stoichiometry(cobra_model_I):
+    """make a sparse reaction x metabolite stoichiometric matrix
+
+    Args:
+        cobra_model_I (cobra.Model)
+
+    Returns:
+        list: reaction_ids_O: row ids
+        list: metabolite_ids_O: column ids
+        scipy.sparse.csr_matrix: S_O: stoichiometric coefficients (reactions x metabolites)
+    """
+
+    reaction_ids_O = [r.id for r in cobra_model_I.reactions];
+    metabolite_ids_O = [m.id for m in cobra_model_I.metabolites];
+    met2col = {m:j for j,m in enumerate(metabolite_ids_O)};
+    rows,cols,coefficients = [],[],[];
+    for i,r in enumerate(cobra_model_I.reactions):
+        for m,c in r.metabolites.items():
+            rows.append(i);
+            cols.append(met2col[m.id]);
+            coefficients.append(c);
+    S_O = csr_matrix((coefficients,(rows,cols)),
+        shape=(len(reaction_ids_O),len(metabolite_ids_O)));
+    return reaction_ids_O,metabolite_ids_O,S_O;
+
+def find_coupledReactions(cobra_model_I, excluded_I=[]):
+    """find the groups of fully coupled reactions
+
+    two reactions are fully coupled if they share a metabolite that takes
+    part in no other reaction (at steady state, v_b = -c_a/c_b*v_a)
+
+    Args:
+        cobra_model_I (cobra.Model): reversible or irreversible
+            (reaction.id + '_reverse') cobra model
+        excluded_I (list): reaction ids that are not coupled
+
+    Returns:
+        list: groups_O: [[(reaction.id, ratio, metabolite.id),...],...]
+            reactions are ordered from an end of the chain;
+            ratio (fractions.Fraction) is the flux of the reaction relative to
+            the flux of the first reaction, and metabolite.id couples the reaction
+            to an earlier reaction of the group (None for the first reaction)
+
+    NOTES:
+      a reaction and its '_reverse' reaction are treated as one reaction
+      (given by the forward reaction.id)
+      system boundary and objective reactions are not coupled, and metabolites
+      that take part in them are not used to couple reactions
+      coefficients are converted to fractions (limit_denominator(1000))
+      groups with inconsistent flux ratios (i.e., blocked) are left out
+    """
+
+    # pair each irreversible reaction with its reverse reaction
+    rxn_ids = set([r.id for r in cobra_model_I.reactions]);
+    base = {};
+    forward = {};
+    for r in cobra_model_I.reactions:
+        if r.id.endswith('_reverse') and r.id[:-len('_reverse')] in rxn_ids:
+            base[r.id] = r.id[:-len('_reverse')];
+        else:
+            base[r.id] = r.id;
+            forward[r.id] = r;
+    excluded = set([base.get(r,r) for r in excluded_I]);
+    excluded.update([base[r.id] for r in cobra_model_I.reactions
+        if getattr(r,'boundary',None) in (True,'system_boundary') or not r.reactants or not r.products
+        or r.objective_coefficient != 0]);
+
+    # couple the reactions through the metabolites of two reactions
+    met2rxns = {};
+    for b,r in forward.items():
+        for m,c in r.metabolites.items():
+            met2rxns.setdefault(m.id,[]).append((b,c));
+    edges = {};
+    for m,rxns in met2rxns.items():
+        if len(rxns) != 2: continue;
+        (a,c_a),(b,c_b) = rxns;
+        if a == b or a in excluded or b in excluded: continue;
+        ratio = -Fraction(c_a).limit_denominator(1000)/Fraction(c_b).limit_denominator(1000); # v_b = ratio*v_a
+        edges.setdefault(a,[]).append((b,ratio,m));
+        edges.setdefault(b,[]).append((a,1/ratio,m));
+
+    groups_O = [];
+    visited = set();
+    for r in cobra_model_I.reactions:
+        b = base[r.id];
+        if not b in edges or b in visited: continue;
+        # connected group of reactions
+        component = [b];
+        visited.add(b);
+        stack = [b];
+        while stack:
+            n = stack.pop();
+            for o,ratio,m in edges[n]:
+                if not o in visited:
+                    visited.add(o);
+                    component.append(o);
+                    stack.append(o);
+        # propagate the flux ratios from an end of the chain
+        ends = [n for n in component if len(set([e[0] for e in edges[n]]))==1];
+        root = ends[0] if ends else component[0];
+        ratios = {root:Fraction(1)};
+        group = [(root,ratios[root],None)];
+        queue = deque([root]);
+        consistent = True;
+        while queue:
+            n = queue.popleft();
+            for o,ratio,m in edges[n]:
+                if o in ratios:
+                    if ratios[o] != ratios[n]*ratio: consistent = False;
+                else:
+                    ratios[o] = ratios[n]*ratio;
+                    group.append((o,ratios[o],m));
+                    queue.append(o);
+        if consistent:
+            groups_O.append(group);
+    return groups_O;
+
 def load_thermoModel(anoxic = False):
     ijo1366_sbml = "/home/user/code/thermodynamics/thermodynamics_data/iJO1366.xml"
     # Read in the sbml file and define the model conditions
@@ -554,39 +749,94 @@ def load_thermoModel(anoxic = False):
 
     return cobra_model;
 
-def simulate_thermoConstraints(cobra_model_I,reactions_id_I):
+def _constrain_thermoConstraint(cobra_model_I, reaction_id_I):
+    """simulate growth with a single reaction constrained to its
+    thermodynamically determined direction
+
+    NOTES:
+      the bound changes are reverted when leaving the model context;
+      the solver problem (and its basis) is reused between calls
+    """
+    with cobra_model_I:
+        rxn = cobra_model_I.reactions.get_by_id(reaction_id_I);
+        # check that the lower bounds are not higher than the upper bounds
+        if rxn.lower_bound>0.0:
+            rxn.lower_bound = 0.0;
+        # constrain the upper reaction bounds of the model
+        rxn.upper_bound = 0.0;
+        gr = cobra_model_I.slim_optimize(error_value=0.0);
+    return gr;
+
+_thermoConstraints_model = None; # model used by the worker processes
+
+def _init_thermoConstraints_worker(cobra_model_I):
+    """store the model in the worker process"""
+    global _thermoConstraints_model
+    _thermoConstraints_model = cobra_model_I;
+
+def _thermoConstraints_worker(reaction_id_I):
+    """simulate a single constraint in a worker process"""
+    return reaction_id_I, _constrain_thermoConstraint(_thermoConstraints_model, reaction_id_I);
+
+def optimize_thermoConstraints(cobra_model_I, reactions_id_I, processes_I=1):
+    """simulate growth with each reaction in turn constrained to its
+    thermodynamically determined direction
+
+    Args:
+        cobra_model_I (cobra.Model)
+        reactions_id_I (list): cobra model reaction ids
+        processes_I (int): number of processes (default: 1; None: all cpus)
+
+    Returns:
+        dict: gr_O: {'original':float, 'reaction_id 1':float,...}
+
+    NOTES:
+      the model is sent once to each process and each process simulates a
+      chunk of reactions on its own copy, so that the LP basis of the
+      previous solution is used to warm-start the next
+    """
+
+    gr_O = {};
+    # determine the orginal growth rate of the model
+    gr_O['original'] = cobra_model_I.slim_optimize(error_value=0.0);
+    if processes_I is None:
+        processes_I = multiprocessing.cpu_count();
+    processes_I = min(processes_I,len(reactions_id_I));
+    if processes_I > 1:
+        chunksize = max(1,len(reactions_id_I)//(processes_I*4));
+        pool = multiprocessing.Pool(processes_I,
+            initializer=_init_thermoConstraints_worker, initargs=(cobra_model_I,));
+        try:
+            for rxn,gr in pool.imap_unordered(_thermoConstraints_worker,reactions_id_I,chunksize=chunksize):
+                gr_O[rxn] = gr;
+        finally:
+            pool.close();
+            pool.join();
+    else:
+        for rxn in reactions_id_I:
+            gr_O[rxn] = _constrain_thermoConstraint(cobra_model_I, rxn);
+    return gr_O;
+
+def simulate_thermoConstraints(cobra_model_I,reactions_id_I,processes_I=1):
     """simulate the effect of constraining a list of model reactions to
     thermodynamically determined directions"""
     # Input:
     #   cobra_model_I
     #   reactions_id_I = cobra model reaction ids
+    #   processes_I = number of processes (see optimize_thermoConstraints)
     # Output:
     #   gr_O = {'original':gr,
     #           'reaction_id 1':[gr, % change in growth],
     #           'reaction_id 2':[gr, % change in growth],...}
 
+    gr = optimize_thermoConstraints(cobra_model_I, reactions_id_I, processes_I);
+    gr_original = gr['original'];
     gr_O = {};
-    # determine the orginal growth rate of the model
-    cobra_model_I.optimize();
-    gr_original = cobra_model_I.objective.value;
     gr_O['original'] = gr_original;
     # iterate through each reaction
     for rxn in reactions_id_I:
-        gr_O[rxn] = None;
-        # constrain the upper reaction bounds of the model
-        ub = cobra_model_I.reactions.get_by_id(rxn).upper_bound;
-        cobra_model_I.reactions.get_by_id(rxn).upper_bound = 0.0;
-        # check that the lower bounds are not higher than the upper bounds
-        lb = cobra_model_I.reactions.get_by_id(rxn).lower_bound;
-        if lb>0.0:
-            cobra_model_I.reactions.get_by_id(rxn).lower_bound = 0.0;
-        # simulate growth with the constraint
-        cobra_model_I.optimize();
-        gr = cobra_model_I.objective.value
-        if gr: gr_O[rxn] = [gr, gr/gr_original*100];
+        if gr[rxn]: gr_O[rxn] = [gr[rxn], gr[rxn]/gr_original*100];
         else: gr_O[rxn] = [0.0, 0.0/gr_original*100];
-        # reset reaction constraint
-        cobra_model_I.reactions.get_by_id(rxn).upper_bound = ub;
 
     return gr_O;
 